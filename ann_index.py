@@ -0,0 +1,313 @@
+import json
+import os
+import tempfile
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+try:
+    import hnswlib
+except ImportError:  # hnswlib is optional; exact search is used without it
+    hnswlib = None
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+ANN_INDEX_PATH = os.getenv("ANN_INDEX_PATH", "ann_index.bin")
+ANN_EF_SEARCH = int(os.getenv("ANN_EF_SEARCH", "64"))
+ANN_EF_CONSTRUCTION = int(os.getenv("ANN_EF_CONSTRUCTION", "200"))
+ANN_M = int(os.getenv("ANN_M", "16"))
+ANN_MIN_PROFILES = int(os.getenv("ANN_MIN_PROFILES", "100000"))
+ANN_VERIFY_BATCH = 100_000
+
+
+def ann_available():
+    """Return True if the optional hnswlib dependency is installed."""
+    return hnswlib is not None
+
+
+class HnswIndex:
+    """
+    HNSW approximate nearest neighbour index layered over a VectorIndex.
+
+    The exact VectorIndex stays the source of truth for profiles and vectors and
+    serves as the fallback: pools smaller than ANN_MIN_PROFILES and calls with
+    exact=True are answered by brute force. Graph labels are assigned per email
+    and persisted next to the graph so it can be reloaded at startup; an array
+    mapping exact-index rows to labels turns row filters into label masks.
+
+    ef_search is the recall/latency knob: higher values visit more of the graph,
+    raising recall@k at the cost of latency.
+    """
+
+    def __init__(self, exact_index, path=ANN_INDEX_PATH, ef_search=ANN_EF_SEARCH):
+        self.exact = exact_index
+        self.path = path
+        self.ef_search = ef_search
+        self._graph = None
+        self._emails = []
+        self._label_by_email = {}
+        # Exact-index row -> graph label, -1 for rows not in the graph
+        self._label_by_row = np.full(0, -1, dtype=np.int64)
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.exact)
+
+    @property
+    def _meta_path(self):
+        return self.path + ".json"
+
+    def _new_graph(self, capacity):
+        graph = hnswlib.Index(space="ip", dim=self.exact.dimension)
+        graph.init_index(
+            max_elements=max(capacity, 1024),
+            ef_construction=ANN_EF_CONSTRUCTION,
+            M=ANN_M,
+        )
+        return graph
+
+    def _ensure_capacity(self, extra):
+        needed = len(self._emails) + extra
+        if needed > self._graph.get_max_elements():
+            self._graph.resize_index(max(needed, self._graph.get_max_elements() * 2))
+
+    def _set_row_labels(self, rows, labels):
+        rows = np.asarray(rows, dtype=np.int64)
+        if not len(rows):
+            return
+        needed = int(rows.max()) + 1
+        if needed > len(self._label_by_row):
+            grown = np.full(max(needed, 2 * len(self._label_by_row)), -1, np.int64)
+            grown[: len(self._label_by_row)] = self._label_by_row
+            self._label_by_row = grown
+        self._label_by_row[rows] = labels
+
+    def _map_rows(self, exact_index):
+        """Rebuild the row -> label array for exact_index from the graph's emails."""
+        self._label_by_row = np.full(len(exact_index), -1, dtype=np.int64)
+        rows, labels = [], []
+        for label, email in enumerate(self._emails):
+            row = exact_index.row_of(email)
+            if row is not None:
+                rows.append(row)
+                labels.append(label)
+        self._set_row_labels(rows, labels)
+
+    def _add(self, emails, vectors, rows):
+        labels = []
+        for email in emails:
+            label = self._label_by_email.get(email)
+            if label is None:
+                label = len(self._emails)
+                self._emails.append(email)
+                self._label_by_email[email] = label
+            labels.append(label)
+        self._graph.add_items(vectors, np.asarray(labels, dtype=np.int64))
+        self._set_row_labels(rows, labels)
+        self._dirty = True
+
+    def build(self):
+        """Build the graph from every vector in the exact index."""
+        with self._lock:
+            size = len(self.exact)
+            self._graph = self._new_graph(size)
+            self._emails = []
+            self._label_by_email = {}
+            self._label_by_row = np.full(size, -1, dtype=np.int64)
+            if size:
+                emails = [self.exact.profile_at(row)[1] for row in range(size)]
+                self._add(emails, self.exact.vectors(), np.arange(size))
+
+    def load(self):
+        """
+        Load the persisted graph and reconcile it with the exact index.
+
+        Profiles missing from the graph are added and vectors that changed
+        since the graph was saved are replaced. Returns False if nothing usable
+        was found on disk.
+        """
+        if not (os.path.exists(self.path) and os.path.exists(self._meta_path)):
+            return False
+        with open(self._meta_path) as f:
+            meta = json.load(f)
+        if meta.get("dimension") != self.exact.dimension:
+            return False
+
+        with self._lock:
+            self._emails = meta["emails"]
+            self._label_by_email = {email: i for i, email in enumerate(self._emails)}
+            self._graph = hnswlib.Index(space="ip", dim=self.exact.dimension)
+            self._graph.load_index(self.path, max_elements=len(self._emails))
+            self._label_by_row = np.full(len(self.exact), -1, dtype=np.int64)
+
+            # Re-add vectors that are missing or changed since the last save
+            size = len(self.exact)
+            for start in range(0, size, ANN_VERIFY_BATCH):
+                rows = np.arange(start, min(start + ANN_VERIFY_BATCH, size))
+                emails = [self.exact.profile_at(row)[1] for row in rows]
+                vectors = self.exact.vectors(rows)
+                known, stale = [], []
+                for i, email in enumerate(emails):
+                    (known if email in self._label_by_email else stale).append(i)
+                if known:
+                    stored = np.asarray(
+                        self._graph.get_items(
+                            [self._label_by_email[emails[i]] for i in known]
+                        ),
+                        dtype=vectors.dtype,
+                    )
+                    changed = ~np.all(
+                        np.isclose(stored, vectors[known], atol=1e-5), axis=1
+                    )
+                    stale.extend(np.asarray(known)[changed].tolist())
+                if known:
+                    self._set_row_labels(
+                        rows[known], [self._label_by_email[emails[i]] for i in known]
+                    )
+                if stale:
+                    self._ensure_capacity(len(stale))
+                    self._add([emails[i] for i in stale], vectors[stale], rows[stale])
+        return True
+
+    def rebind(self, exact_index, changed_rows):
+        """
+        Move the graph onto a newer exact index, re-adding only changed rows.
+
+        Used when swapping to a snapshot that lists the rows changed since the
+        one this graph was reconciled with. Rows may be renumbered between
+        snapshots, so the row -> label array is rebuilt for the new index.
+        Returns False if there is no graph to patch.
+        """
+        with self._lock:
+            if self._graph is None or exact_index.dimension != self.exact.dimension:
+                return False
+            if len(changed_rows):
+                emails = [exact_index.profile_at(row)[1] for row in changed_rows]
+                self._ensure_capacity(len(emails))
+                self._add(emails, exact_index.vectors(changed_rows), changed_rows)
+            self._map_rows(exact_index)
+            self.exact = exact_index
+        return True
+
+    def _temp_path(self, path):
+        # Unique per writer, so workers saving at the same time do not collide
+        fd, tmp_path = tempfile.mkstemp(
+            prefix=os.path.basename(path) + ".",
+            suffix=".tmp",
+            dir=os.path.dirname(os.path.abspath(path)),
+        )
+        os.close(fd)
+        return tmp_path
+
+    def save(self):
+        """Persist the graph and its email labels if they changed."""
+        with self._lock:
+            if self._graph is None or not self._dirty:
+                return
+            tmp_path = self._temp_path(self.path)
+            tmp_meta_path = self._temp_path(self._meta_path)
+            try:
+                self._graph.save_index(tmp_path)
+                with open(tmp_meta_path, "w") as f:
+                    json.dump(
+                        {"dimension": self.exact.dimension, "emails": self._emails}, f
+                    )
+                os.replace(tmp_path, self.path)
+                os.replace(tmp_meta_path, self._meta_path)
+            finally:
+                for path in (tmp_path, tmp_meta_path):
+                    if os.path.exists(path):
+                        os.remove(path)
+            self._dirty = False
+
+    def upsert(self, profile, vector):
+        """Insert or update a profile in both the exact index and the graph."""
+        row = self.exact.upsert(profile, vector)
+        with self._lock:
+            if self._graph is None:
+                return row
+            self._ensure_capacity(1)
+            self._add([profile[1]], self.exact.vectors([row]), [row])
+        return row
+
+    def row_of(self, email):
+        """Return the row of a profile in the exact index."""
+        return self.exact.row_of(email)
+
+    def filter_rows(self, **filters):
+        """Evaluate structured filters on the exact index."""
+        return self.exact.filter_rows(**filters)
+
+    def search(self, query_vector, k=10, rows=None, ef_search=None, exact=False):
+        """
+        Return the k approximately most similar profiles.
+
+        When rows is given and small enough, the surviving rows are scored
+        exactly; otherwise the graph search skips labels outside rows, falling
+        back to exact scoring if the filtered graph search cannot fill k.
+
+        Args:
+            query_vector (numpy.ndarray): The (unnormalized) query embedding.
+            k (int): Number of results.
+            rows (numpy.ndarray, optional): Restrict results to these rows.
+            ef_search (int, optional): Overrides the configured ef_search.
+            exact (bool): Force the brute-force path.
+
+        Returns:
+            list: (profile, similarity_score) tuples, best first.
+        """
+        pool = len(self.exact) if rows is None else len(rows)
+        if exact or self._graph is None or pool < ANN_MIN_PROFILES:
+            return self.exact.search(query_vector, k, rows=rows)
+
+        allowed = None
+        if rows is not None:
+            # Read the array before _emails: labels are appended to _emails first
+            label_by_row = self._label_by_row
+            rows = np.asarray(rows, dtype=np.int64)
+            labels = label_by_row[rows[rows < len(label_by_row)]]
+            allowed = np.zeros(len(self._emails), dtype=bool)
+            allowed[labels[labels >= 0]] = True
+            pool = int(allowed.sum())
+
+        k = min(k, pool)
+        if k <= 0:
+            return []
+        query = np.asarray(query_vector, dtype=np.float32).reshape(1, -1)
+        query = query / max(float(np.linalg.norm(query)), 1e-12)
+        try:
+            with self._lock:
+                self._graph.set_ef(max(ef_search or self.ef_search, k))
+                if allowed is None:
+                    labels, distances = self._graph.knn_query(query, k=k)
+                else:
+                    labels, distances = self._graph.knn_query(
+                        query, k=k, filter=lambda label: bool(allowed[label])
+                    )
+        except RuntimeError as e:
+            # hnswlib raises when a sparse filter leaves fewer than k reachable
+            print(f"Error in filtered HNSW search, scoring exactly: {e}")
+            return self.exact.search(query_vector, k, rows=rows)
+
+        results = []
+        for label, distance in zip(labels[0], distances[0]):
+            row = self.exact.row_of(self._emails[label])
+            if row is not None:
+                # hnswlib "ip" distance is 1 - inner product
+                results.append((self.exact.profile_at(row), float(1.0 - distance)))
+        return results
+
+    def search_batch(self, query_vectors, k=10, rows=None):
+        """
+        Return the k approximately most similar profiles for each query.
+
+        Pools below ANN_MIN_PROFILES are scored exactly in one blocked pass;
+        larger ones query the graph once per query.
+        """
+        pool = len(self.exact) if rows is None else len(rows)
+        if self._graph is None or pool < ANN_MIN_PROFILES:
+            return self.exact.search_batch(query_vectors, k, rows=rows)
+        return [self.search(query, k, rows=rows) for query in query_vectors]
@@ -0,0 +1,73 @@
+"""
+Recall@10 and query latency of the HNSW backend against exact search on
+synthetic clustered embeddings, for a range of ef_search values.
+
+Usage:
+    python benchmarks/bench_ann.py --size 1000000 --ef 16 32 64 128 256
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import ann_index  # noqa: E402
+from ann_index import HnswIndex, ann_available  # noqa: E402
+from vector_index import VectorIndex  # noqa: E402
+
+
+def synthetic_embeddings(rng, size, dim, clusters=256):
+    # Resume embeddings are clustered by role/skill set rather than uniform
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    labels = rng.integers(0, clusters, size)
+    noise = rng.standard_normal((size, dim), dtype=np.float32) * 0.6
+    return centers[labels] + noise
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128, 256])
+    args = parser.parse_args()
+
+    if not ann_available():
+        sys.exit("hnswlib is not installed")
+
+    rng = np.random.default_rng(0)
+    embeddings = synthetic_embeddings(rng, args.size, args.dim)
+    profiles = [(f"n{i}", f"{i}@example.com", "", "", 0, "") for i in range(args.size)]
+    queries = synthetic_embeddings(rng, args.queries, args.dim)
+
+    exact = VectorIndex.from_embeddings(profiles, embeddings)
+    ann_index.ANN_MIN_PROFILES = 0
+    start = time.perf_counter()
+    index = HnswIndex(exact, path=os.devnull)
+    index.build()
+    print(f"built HNSW over {args.size} vectors in {time.perf_counter() - start:.1f}s")
+
+    start = time.perf_counter()
+    truth = [
+        {profile[1] for profile, _ in exact.search(query, args.k)} for query in queries
+    ]
+    exact_ms = (time.perf_counter() - start) * 1000 / args.queries
+    print(f"{'backend':>12} {'recall@' + str(args.k):>10} {'ms/query':>10}")
+    print(f"{'exact':>12} {1.0:>10.3f} {exact_ms:>10.3f}")
+
+    for ef in args.ef:
+        start = time.perf_counter()
+        found = [
+            {profile[1] for profile, _ in index.search(query, args.k, ef_search=ef)}
+            for query in queries
+        ]
+        ann_ms = (time.perf_counter() - start) * 1000 / args.queries
+        recall = np.mean([len(f & t) / len(t) for f, t in zip(found, truth)])
+        print(f"{'hnsw ef=' + str(ef):>12} {recall:>10.3f} {ann_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
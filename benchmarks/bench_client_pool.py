@@ -0,0 +1,61 @@
+"""
+Per-upload generation latency with a client built per resume (the previous
+behaviour) against the pooled client, using the local stub generation server.
+
+Usage:
+    python benchmarks/bench_client_pool.py --uploads 50 --workers 8
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from stub_generation_server import start_stub_server  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploads", type=int, default=50)
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--auth-latency", type=float, default=0.8)
+    args = parser.parse_args()
+
+    server, config = start_stub_server(0, args.latency, args.auth_latency)
+    os.environ["GENERATION_URL"] = f"http://127.0.0.1:{server.server_address[1]}"
+    import model  # noqa: E402  (reads GENERATION_URL on import)
+
+    prompts = [f"resume {i}" for i in range(args.uploads)]
+
+    def per_resume_client(prompt):
+        start = time.perf_counter()
+        model.initialize_model("stub").generate(prompt=prompt)
+        return time.perf_counter() - start
+
+    def pooled_client(prompt):
+        start = time.perf_counter()
+        model.generate_text("stub", prompt)
+        return time.perf_counter() - start
+
+    for label, fn in [
+        ("per-resume client", per_resume_client),
+        ("pooled client", pooled_client),
+    ]:
+        config["token_requests"] = 0
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.workers) as executor:
+            latencies = list(executor.map(fn, prompts))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{label:>18}: {sum(latencies) / len(latencies) * 1000:8.1f} ms/upload, "
+            f"{elapsed:6.2f}s total, {config['token_requests']} token fetches"
+        )
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+"""
+Throughput of concurrent resume upserts and profile queries against SQLite,
+comparing the previous access pattern (a fresh connection per call, rollback
+journal, CREATE TABLE IF NOT EXISTS and SELECT-then-INSERT/UPDATE on every
+upload) with the pooled WAL connections and single writer thread.
+
+Usage:
+    python benchmarks/bench_db_concurrency.py --uploaders 16 --readers 4 --seconds 10
+"""
+import argparse
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import close_database, connection, write  # noqa: E402
+from utils import upsert_resume  # noqa: E402
+
+SKILLS = "python, sql, fastapi, docker, kubernetes, machine learning, pandas"
+
+
+def make_resume(worker, i):
+    email = f"candidate{(worker * 7919 + i) % 5000}@example.com"
+    return (f"Candidate {i}", email, "555-0100", f"Org {i % 50}", i % 30, SKILLS)
+
+
+def previous_upsert(db_path, resume):
+    with sqlite3.connect(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS resumes
+                 (Name TEXT, Email TEXT PRIMARY KEY, Phone_Number TEXT,
+                  Current_Organization TEXT, Years_Experience INTEGER, Skills TEXT)"""
+        )
+        conn.commit()
+        cursor.execute("SELECT COUNT(*) FROM resumes WHERE email=?", (resume[1],))
+        if cursor.fetchone()[0] > 0:
+            cursor.execute(
+                """UPDATE resumes SET name=?, phone_number=?, current_organization=?,
+                       years_experience=?, skills=? WHERE email=?""",
+                resume[:1] + resume[2:] + resume[1:2],
+            )
+        else:
+            cursor.execute("INSERT INTO resumes VALUES (?, ?, ?, ?, ?, ?)", resume)
+        cursor.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS resume_skills_fts
+                 USING fts5(Email UNINDEXED, Skills)"""
+        )
+        cursor.execute("DELETE FROM resume_skills_fts WHERE Email = ?", (resume[1],))
+        cursor.execute(
+            "INSERT INTO resume_skills_fts (Email, Skills) VALUES (?, ?)",
+            (resume[1], resume[5]),
+        )
+        conn.commit()
+
+
+def previous_query(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(
+            "SELECT Name, Email, Current_Organization FROM resumes LIMIT 200"
+        ).fetchall()
+    finally:
+        conn.close()
+
+
+def pooled_upsert(db_path, resume):
+    # Triggers on resumes keep the skill index in step
+    write(lambda conn: upsert_resume(conn, resume), db_path)
+
+
+def pooled_query(db_path):
+    with connection(db_path) as conn:
+        return conn.execute(
+            "SELECT Name, Email, Current_Organization FROM resumes LIMIT 200"
+        ).fetchall()
+
+
+def run(mode, uploaders, readers, seconds):
+    db_path = os.path.join(tempfile.mkdtemp(prefix="bench_db_"), "bench.db")
+    upsert, query = (
+        (previous_upsert, previous_query)
+        if mode == "previous"
+        else (pooled_upsert, pooled_query)
+    )
+    # Create the tables before the clock starts
+    upsert(db_path, make_resume(0, 0))
+
+    counts = {"writes": 0, "reads": 0, "errors": 0}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def loop(worker, fn, counter):
+        i = 0
+        while time.perf_counter() < deadline:
+            try:
+                fn(worker, i)
+                key = counter
+            except sqlite3.Error:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+            i += 1
+
+    threads = [
+        threading.Thread(
+            target=loop,
+            args=(w, lambda w, i: upsert(db_path, make_resume(w, i)), "writes"),
+        )
+        for w in range(uploaders)
+    ] + [
+        threading.Thread(target=loop, args=(r, lambda r, i: query(db_path), "reads"))
+        for r in range(readers)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if mode == "pooled":
+        close_database()
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--uploaders", type=int, default=16)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    args = parser.parse_args()
+
+    print(f"{'mode':>10} {'writes/s':>10} {'reads/s':>10} {'db errors':>10}")
+    for mode in ("previous", "pooled"):
+        counts = run(mode, args.uploaders, args.readers, args.seconds)
+        print(
+            f"{mode:>10} {counts['writes'] / args.seconds:>10.0f} "
+            f"{counts['reads'] / args.seconds:>10.0f} {counts['errors']:>10}"
+        )
+
+
+if __name__ == "__main__":
+    main()
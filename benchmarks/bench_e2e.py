@@ -0,0 +1,319 @@
+"""
+End-to-end load test of /upload and /top-matches against synthetic data.
+
+For each corpus size the database is topped up with synthetic profiles (see
+synthetic_resumes.seed_corpus). The API is then started under uvicorn,
+pointed at the stub generation server in place of watsonx, and driven at a
+fixed concurrency:
+
+- upload: every synthetic resume PDF (born-digital, plus a fraction of
+  scanned ones that need Tesseract and poppler) is posted once. With
+  `--upload-endpoint stream` each request sends one file to /upload/stream and
+  ends when that file has been stored. With `jobs` it is queued with /upload
+  and /jobs/{id} is polled until the file is done.
+- match: distinct job descriptions are posted to /top-matches.
+
+For each phase the report shows p50/p95/p99 latency, throughput and failures.
+It also shows peak RSS of the server and its children (uvicorn workers, OCR
+pool) and the time until /ready. No network access is needed once the
+embedding model is in the local cache. Runs can be compared with --json.
+
+Usage:
+    python benchmarks/bench_e2e.py --corpus-sizes 1000 10000 100000 1000000 \\
+        --uploads 200 --scanned-fraction 0.2 --queries 500 --concurrency 16 \\
+        --llm-latency 0.5 --json results.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import httpx
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from bench_upload_memory import sample_rss  # noqa: E402
+from synthetic_resumes import (  # noqa: E402
+    job_descriptions,
+    seed_corpus,
+    write_resume_pdfs,
+)
+
+from database import close_database  # noqa: E402
+from model import embed_texts  # noqa: E402
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+STUB_SERVER = os.path.join(os.path.dirname(__file__), "stub_generation_server.py")
+
+
+def start_process(args, env=None):
+    return subprocess.Popen(
+        args,
+        cwd=REPO_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+
+def wait_until_ready(base_url, timeout):
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout:
+        try:
+            if httpx.get(f"{base_url}/ready", timeout=5).status_code == 200:
+                return time.perf_counter() - start
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise TimeoutError(f"Server at {base_url} not ready after {timeout:.0f}s")
+
+
+class RssSampler:
+    """Track the peak RSS of a process tree while a phase runs."""
+
+    def __init__(self, pid):
+        self.pid = pid
+
+    def __enter__(self):
+        self._stop, self._samples = threading.Event(), []
+        self._thread = threading.Thread(
+            target=sample_rss, args=(self.pid, self._stop, self._samples)
+        )
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    @property
+    def peak_mb(self):
+        return max(self._samples, default=0) / 2**20
+
+
+async def run_concurrently(items, concurrency, request):
+    """
+    Call `await request(item)` for every item, at most `concurrency` at a time.
+
+    Returns:
+        tuple: (latencies of successful requests, failures, wall seconds)
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, failures = [], []
+
+    async def timed_request(item):
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                await request(item)
+            except Exception as e:
+                failures.append(str(e))
+            else:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(timed_request(item) for item in items))
+    return latencies, failures, time.perf_counter() - start
+
+
+async def upload_phase(base_url, files, concurrency, endpoint):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+
+        async def upload(item):
+            path, _ = item
+            with open(path, "rb") as f:
+                content = f.read()
+            payload = [("files", (os.path.basename(path), content, "application/pdf"))]
+            if endpoint == "stream":
+                response = await client.post("/upload/stream", files=payload)
+                response.raise_for_status()
+                record = json.loads(response.text.splitlines()[0])
+                if record["status"] != "completed":
+                    raise RuntimeError(record.get("error"))
+                return
+            response = await client.post("/upload", files=payload)
+            response.raise_for_status()
+            job_id = response.json()["job_id"]
+            while True:
+                job = (await client.get(f"/jobs/{job_id}")).json()
+                if job["status"] == "completed":
+                    if job["failed_files"]:
+                        raise RuntimeError(job["files"][0]["error"])
+                    return
+                await asyncio.sleep(0.05)
+
+        return await run_concurrently(files, concurrency, upload)
+
+
+async def match_phase(base_url, descriptions, concurrency):
+    async with httpx.AsyncClient(base_url=base_url, timeout=None) as client:
+
+        async def match(description):
+            response = await client.post(
+                "/top-matches", json={"job_description": description}
+            )
+            response.raise_for_status()
+
+        return await run_concurrently(descriptions, concurrency, match)
+
+
+def summarize(phase, corpus_size, latencies, failures, seconds, peak_mb, unit):
+    if failures:
+        print(f"  {len(failures)} {phase} failure(s), e.g. {failures[0]}")
+    percentiles = (
+        np.percentile(latencies, [50, 95, 99]) * 1000 if latencies else [np.nan] * 3
+    )
+    return {
+        "phase": phase,
+        "corpus_size": corpus_size,
+        "requests": len(latencies) + len(failures),
+        "failures": len(failures),
+        "p50_ms": float(percentiles[0]),
+        "p95_ms": float(percentiles[1]),
+        "p99_ms": float(percentiles[2]),
+        "throughput": len(latencies) / seconds if seconds else 0.0,
+        "unit": unit,
+        "peak_rss_mb": peak_mb,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--corpus-sizes", type=int, nargs="+", default=[1000, 10000, 100000]
+    )
+    parser.add_argument("--uploads", type=int, default=100)
+    parser.add_argument("--scanned-fraction", type=float, default=0.2)
+    parser.add_argument(
+        "--upload-endpoint", choices=["stream", "jobs"], default="stream"
+    )
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--llm-error-rate", type=float, default=0.0)
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--stub-port", type=int, default=8901)
+    parser.add_argument("--ready-timeout", type=float, default=1800.0)
+    parser.add_argument("--workdir", help="Keep the database and PDFs here")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_e2e_")
+    db_path = os.path.join(workdir, "bench.db")
+    if args.scanned_fraction and not (
+        shutil.which("tesseract") and shutil.which("pdftoppm")
+    ):
+        print("tesseract/poppler not found; scanned uploads will not be OCRed")
+    descriptions = job_descriptions(args.queries)
+    dim = embed_texts(["dimension probe"]).shape[1]
+
+    stub = start_process(
+        [
+            sys.executable,
+            STUB_SERVER,
+            "--port", str(args.stub_port),
+            "--latency", str(args.llm_latency),
+            "--auth-latency", "0",
+            "--error-rate", str(args.llm_error_rate),
+        ]
+    )
+    env = dict(
+        os.environ,
+        DB_PATH=db_path,
+        MODEL_ID=os.getenv("MODEL_ID", "stub"),
+        GENERATION_URL=f"http://127.0.0.1:{args.stub_port}",
+        UPLOAD_SPOOL_DIR=os.path.join(workdir, "spool"),
+        ANN_INDEX_PATH=os.path.join(workdir, "ann_index.bin"),
+        LLM_REQUESTS_PER_SECOND=os.getenv("LLM_REQUESTS_PER_SECOND", "0"),
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    results = []
+    try:
+        for round_number, corpus_size in enumerate(sorted(args.corpus_sizes)):
+            # New resumes each round, so the extraction caches do not hit
+            files = write_resume_pdfs(
+                os.path.join(workdir, f"pdfs_{corpus_size}"),
+                args.uploads,
+                args.scanned_fraction,
+                seed=round_number,
+                start=max(args.corpus_sizes) + round_number * args.uploads,
+            )
+            start = time.perf_counter()
+            seeded = seed_corpus(db_path, corpus_size, dim)
+            print(
+                f"corpus {seeded} profiles ({dim}-dim), "
+                f"seeded in {time.perf_counter() - start:.0f}s"
+            )
+            server = start_process(
+                [
+                    sys.executable, "-m", "uvicorn", "main:app",
+                    "--port", str(args.port),
+                    "--workers", str(args.workers),
+                ],
+                env,
+            )
+            try:
+                with RssSampler(server.pid) as startup:
+                    ready_seconds = wait_until_ready(base_url, args.ready_timeout)
+                print(
+                    f"  ready in {ready_seconds:.1f}s, "
+                    f"peak RSS {startup.peak_mb:.0f} MB"
+                )
+                with RssSampler(server.pid) as sampler:
+                    outcome = asyncio.run(
+                        upload_phase(
+                            base_url, files, args.concurrency, args.upload_endpoint
+                        )
+                    )
+                upload = summarize(
+                    "upload", seeded, *outcome, sampler.peak_mb, "files/s"
+                )
+                with RssSampler(server.pid) as sampler:
+                    outcome = asyncio.run(
+                        match_phase(base_url, descriptions, args.concurrency)
+                    )
+                match = summarize(
+                    "match", seeded, *outcome, sampler.peak_mb, "queries/s"
+                )
+                for result in (upload, match):
+                    result["ready_seconds"] = ready_seconds
+                    results.append(result)
+            finally:
+                server.terminate()
+                server.wait()
+    finally:
+        stub.terminate()
+        stub.wait()
+        close_database()
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    print(
+        f"\n{'phase':>7} {'corpus':>9} {'requests':>9} {'failed':>7} "
+        f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'throughput':>15} "
+        f"{'peak RSS MB':>12}"
+    )
+    for r in results:
+        print(
+            f"{r['phase']:>7} {r['corpus_size']:>9} {r['requests']:>9} "
+            f"{r['failures']:>7} {r['p50_ms']:>9.1f} {r['p95_ms']:>9.1f} "
+            f"{r['p99_ms']:>9.1f} {r['throughput']:>7.1f} {r['unit']:<7} "
+            f"{r['peak_rss_mb']:>12.0f}"
+        )
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"settings": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
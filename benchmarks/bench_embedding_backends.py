@@ -0,0 +1,119 @@
+"""
+Throughput and accuracy of the embedding backends on a fixture of resumes.
+
+Every profile in benchmarks/fixtures/resumes.json is embedded with the float32
+"torch" backend and with each candidate backend. The report shows texts/s,
+the mean and minimum cosine between each candidate vector and its float32
+counterpart, and the mean top-10 overlap of the rankings for the fixture's job
+descriptions.
+
+A backend passes when its minimum cosine reaches --min-cosine and its top-k
+overlap reaches --min-overlap; the script exits non-zero if any backend fails,
+so run it before switching EMBEDDING_BACKEND, which re-embeds every profile.
+
+Usage:
+    EMBEDDING_BATCH_SIZE=64 EMBEDDING_THREADS=4 \\
+        python benchmarks/bench_embedding_backends.py --backends torch-int8 --repeats 3
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from embedding_store import build_profile_text  # noqa: E402
+from model import EMBEDDING_BATCH_SIZE, EMBEDDING_THREADS, embed_texts  # noqa: E402
+from vector_index import normalize_rows, top_k_indices  # noqa: E402
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "resumes.json")
+REFERENCE_BACKEND = "torch"
+MIN_COSINE = 0.98
+MIN_OVERLAP = 0.9
+
+
+def load_fixture(path):
+    with open(path) as f:
+        fixture = json.load(f)
+    texts = [
+        build_profile_text(
+            profile["current_organization"],
+            profile["years_experience"],
+            profile["skills"],
+        )
+        for profile in fixture["profiles"]
+    ]
+    return texts, fixture["job_descriptions"]
+
+
+def embed(texts, backend, repeats):
+    embed_texts(texts[:8], backend=backend)  # load and warm up the model
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        vectors = embed_texts(texts, backend=backend)
+        timings.append(time.perf_counter() - start)
+    return normalize_rows(vectors), len(texts) / np.median(timings)
+
+
+def top_k_overlap(reference_queries, reference, queries, candidate, k):
+    overlaps = []
+    for reference_query, query in zip(reference_queries, queries):
+        expected = set(top_k_indices(reference @ reference_query, k).tolist())
+        actual = set(top_k_indices(candidate @ query, k).tolist())
+        overlaps.append(len(expected & actual) / k)
+    return float(np.mean(overlaps))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--fixture", default=FIXTURE)
+    parser.add_argument("--backends", nargs="+", default=["torch-int8"])
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-cosine", type=float, default=MIN_COSINE)
+    parser.add_argument("--min-overlap", type=float, default=MIN_OVERLAP)
+    args = parser.parse_args()
+
+    texts, job_descriptions = load_fixture(args.fixture)
+    print(
+        f"{len(texts)} profiles, {len(job_descriptions)} job descriptions, "
+        f"batch size {EMBEDDING_BATCH_SIZE}, threads {EMBEDDING_THREADS or 'default'}"
+    )
+
+    reference, reference_rate = embed(texts, REFERENCE_BACKEND, args.repeats)
+    reference_queries = normalize_rows(
+        embed_texts(job_descriptions, backend=REFERENCE_BACKEND)
+    )
+
+    print(
+        f"{'backend':>12} {'texts/s':>9} {'speedup':>8} "
+        f"{'mean cos':>9} {'min cos':>8} {f'top-{args.k}':>7}"
+    )
+    print(f"{REFERENCE_BACKEND:>12} {reference_rate:>9.0f} {1:>7.2f}x")
+    failed = []
+    for backend in args.backends:
+        vectors, rate = embed(texts, backend, args.repeats)
+        queries = normalize_rows(embed_texts(job_descriptions, backend=backend))
+        cosines = np.sum(vectors * reference, axis=1)
+        overlap = top_k_overlap(reference_queries, reference, queries, vectors, args.k)
+        passed = cosines.min() >= args.min_cosine and overlap >= args.min_overlap
+        if not passed:
+            failed.append(backend)
+        print(
+            f"{backend:>12} {rate:>9.0f} {rate / reference_rate:>7.2f}x "
+            f"{cosines.mean():>9.4f} {cosines.min():>8.4f} {overlap:>7.2f} "
+            f"{'ok' if passed else 'FAIL'}"
+        )
+    if failed:
+        print(
+            f"Below min cosine {args.min_cosine} or top-{args.k} overlap "
+            f"{args.min_overlap}: {', '.join(failed)}"
+        )
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Query latency of the in-memory VectorIndex against the previous matching path
+(sklearn cosine_similarity followed by a full np.argsort) on synthetic profiles.
+
+Usage:
+    python benchmarks/bench_matching.py --sizes 1000 10000 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_index import VectorIndex  # noqa: E402
+
+
+def previous_path(query, embeddings, k):
+    similarities = cosine_similarity([query], embeddings)[0]
+    return np.argsort(similarities)[-k:][::-1]
+
+
+def time_it(fn, repeats):
+    fn()  # warm-up
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000, 1_000_000]
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"{'profiles':>10} {'previous ms':>12} {'index ms':>10} {'speedup':>8}")
+    for size in args.sizes:
+        embeddings = rng.standard_normal((size, args.dim), dtype=np.float32)
+        profiles = [(f"n{i}", f"{i}@example.com", "", "", 0, "") for i in range(size)]
+        index = VectorIndex.from_embeddings(profiles, embeddings)
+        query = rng.standard_normal(args.dim, dtype=np.float32)
+
+        previous_ms = time_it(
+            lambda: previous_path(query, embeddings, args.k), args.repeats
+        )
+        index_ms = time_it(lambda: index.search(query, args.k), args.repeats)
+        print(
+            f"{size:>10} {previous_ms:>12.2f} {index_ms:>10.2f} "
+            f"{previous_ms / index_ms:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
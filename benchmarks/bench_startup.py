@@ -0,0 +1,134 @@
+"""
+Cold-start cost of the API: `import main` time, time until a uvicorn worker
+answers its first request, time until /ready reports ready and time until the
+first /top-matches response.
+
+Pass --repo to measure another checkout, e.g. the previous release created
+with `git worktree add /tmp/previous <ref>`, and compare the two runs. Against
+checkouts without /ready the ready column is left empty.
+
+Usage:
+    python benchmarks/bench_startup.py --repeats 3 --db resume_data.db
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import httpx
+import numpy as np
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+IMPORT_SNIPPET = (
+    "import time; start = time.perf_counter(); import main; "
+    "print(time.perf_counter() - start)"
+)
+
+
+def measure_import(repo, env):
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SNIPPET],
+        cwd=repo,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def wait_for(url, client, accept, deadline, **kwargs):
+    while time.perf_counter() < deadline:
+        try:
+            response = client.request(url=url, **kwargs)
+            if accept(response):
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    return None
+
+
+def measure_server(repo, env, port, timeout):
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=repo,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = start + timeout
+    try:
+        with httpx.Client(base_url=base_url, timeout=timeout) as client:
+            first = wait_for("/docs", client, lambda r: True, deadline, method="GET")
+            ready = wait_for(
+                "/ready",
+                client,
+                lambda r: r.status_code in (200, 404),
+                deadline,
+                method="GET",
+            )
+            if ready is not None and client.get("/ready").status_code == 404:
+                ready = None
+            top_matches = wait_for(
+                "/top-matches",
+                client,
+                lambda r: r.status_code < 500,
+                deadline,
+                method="POST",
+                json={"job_description": "python developer with fastapi experience"},
+            )
+    finally:
+        server.terminate()
+        server.wait()
+    return [
+        None if moment is None else moment - start
+        for moment in (first, ready, top_matches)
+    ]
+
+
+def fmt(values):
+    values = [v for v in values if v is not None]
+    return f"{np.median(values):>10.2f}" if values else f"{'-':>10}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repo", default=REPO_DIR)
+    parser.add_argument("--db", help="Database to copy for each run (default: empty)")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    args = parser.parse_args()
+
+    imports, first, ready, top_matches = [], [], [], []
+    for _ in range(args.repeats):
+        workdir = tempfile.mkdtemp(prefix="bench_startup_")
+        db_path = os.path.join(workdir, "bench.db")
+        if args.db:
+            shutil.copy(args.db, db_path)
+        env = dict(
+            os.environ,
+            DB_PATH=db_path,
+            UPLOAD_SPOOL_DIR=os.path.join(workdir, "spool"),
+            ANN_INDEX_PATH=os.path.join(workdir, "ann_index.bin"),
+        )
+        imports.append(measure_import(args.repo, env))
+        timings = measure_server(args.repo, env, args.port, args.timeout)
+        first.append(timings[0])
+        ready.append(timings[1])
+        top_matches.append(timings[2])
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print(f"median seconds over {args.repeats} run(s) of {args.repo}")
+    print(f"{'import':>10} {'first req':>10} {'ready':>10} {'top-match':>10}")
+    print(f"{fmt(imports)} {fmt(first)} {fmt(ready)} {fmt(top_matches)}")
+
+
+if __name__ == "__main__":
+    main()
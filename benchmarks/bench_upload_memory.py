@@ -0,0 +1,147 @@
+"""
+Peak server RSS while ingesting a large upload.
+
+Generates N synthetic PDFs (text plus an incompressible image so each file has
+real weight), starts the API under uvicorn against a temporary database and
+the stub generation server, posts every file in one request and samples the
+server's RSS until the upload has been fully processed.
+
+Usage:
+    python benchmarks/bench_upload_memory.py --files 500 --pdf-kb 400 --endpoint stream
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import fitz
+import httpx
+import numpy as np
+import psutil
+from faker import Faker
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from stub_generation_server import start_stub_server  # noqa: E402
+
+REPO_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+
+def write_pdfs(directory, count, pdf_kb, seed=0):
+    fake = Faker()
+    fake.seed_instance(seed)
+    rng = np.random.default_rng(seed)
+    side = max(int((pdf_kb * 1024 / 3) ** 0.5), 8)
+    paths = []
+    for i in range(count):
+        document = fitz.open()
+        page = document.new_page()
+        text = "\n".join(
+            [fake.name(), fake.email(), fake.phone_number(), fake.company()]
+            + [fake.sentence(12) for _ in range(20)]
+        )
+        page.insert_textbox(fitz.Rect(50, 50, 550, 500), text, fontsize=9)
+        noise = rng.integers(0, 256, (side, side, 3), dtype=np.uint8)
+        pixmap = fitz.Pixmap(fitz.csRGB, side, side, noise.tobytes(), False)
+        page.insert_image(fitz.Rect(50, 520, 250, 720), pixmap=pixmap)
+        path = os.path.join(directory, f"resume_{i}.pdf")
+        document.save(path)
+        paths.append(path)
+    return paths
+
+
+def sample_rss(pid, stop, samples):
+    process = psutil.Process(pid)
+    while not stop.is_set():
+        try:
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                rss += child.memory_info().rss
+            samples.append(rss)
+        except psutil.Error:
+            pass
+        time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--files", type=int, default=500)
+    parser.add_argument("--pdf-kb", type=int, default=400)
+    parser.add_argument("--endpoint", choices=["stream", "jobs"], default="stream")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_upload_memory_")
+    paths = write_pdfs(workdir, args.files, args.pdf_kb)
+    total_mb = sum(os.path.getsize(path) for path in paths) / 2**20
+    print(f"generated {args.files} PDFs, {total_mb:.0f} MB in total")
+
+    stub, _ = start_stub_server(0, args.llm_latency, 0.0)
+    env = dict(
+        os.environ,
+        DB_PATH=os.path.join(workdir, "bench.db"),
+        MODEL_ID="stub",
+        GENERATION_URL=f"http://127.0.0.1:{stub.server_address[1]}",
+        UPLOAD_SPOOL_DIR=os.path.join(workdir, "spool"),
+        LLM_REQUESTS_PER_SECOND="0",
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.port)],
+        cwd=REPO_DIR,
+        env=env,
+    )
+    base_url = f"http://127.0.0.1:{args.port}"
+    try:
+        for _ in range(600):
+            try:
+                httpx.get(f"{base_url}/docs", timeout=1)
+                break
+            except httpx.HTTPError:
+                time.sleep(0.5)
+        baseline = psutil.Process(server.pid).memory_info().rss
+
+        stop, samples = threading.Event(), []
+        sampler = threading.Thread(target=sample_rss, args=(server.pid, stop, samples))
+        sampler.start()
+
+        start = time.perf_counter()
+        handles = [open(path, "rb") for path in paths]
+        files = [
+            ("files", (os.path.basename(handle.name), handle, "application/pdf"))
+            for handle in handles
+        ]
+        with httpx.Client(base_url=base_url, timeout=None) as client:
+            if args.endpoint == "stream":
+                with client.stream("POST", "/upload/stream", files=files) as response:
+                    processed = sum(1 for line in response.iter_lines() if line)
+            else:
+                job_id = client.post("/upload", files=files).json()["job_id"]
+                while True:
+                    job = client.get(f"/jobs/{job_id}").json()
+                    if job["status"] == "completed":
+                        break
+                    time.sleep(0.5)
+                processed = job["completed_files"] + job["failed_files"]
+        elapsed = time.perf_counter() - start
+        for handle in handles:
+            handle.close()
+
+        stop.set()
+        sampler.join()
+        peak = max(samples) if samples else baseline
+        print(f"processed {processed} files in {elapsed:.1f}s via /{args.endpoint}")
+        print(
+            f"server RSS: baseline {baseline / 2**20:.0f} MB, "
+            f"peak {peak / 2**20:.0f} MB"
+        )
+    finally:
+        server.terminate()
+        server.wait()
+        stub.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Memory, latency and ranking quality of float32, float16 and int8 vector
+storage in VectorIndex, with and without the float32 rerank of the top
+candidates.
+
+Profiles are synthetic clustered vectors (so neighbours are meaningful) and
+queries are noisy copies of random profiles. Recall is the top-k overlap with
+exact float32 search.
+
+Usage:
+    python benchmarks/bench_vector_storage.py --size 200000 --queries 100
+"""
+import argparse
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from vector_index import VectorIndex  # noqa: E402
+
+
+def clustered_vectors(rng, size, dim, clusters=256, spread=0.6):
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    assignment = rng.integers(0, clusters, size)
+    noise = rng.standard_normal((size, dim), dtype=np.float32) * spread
+    return centers[assignment] + noise
+
+
+def index_bytes(index):
+    size = len(index)
+    stored = index._matrix[:size].nbytes
+    if index._scales is not None:
+        stored += index._scales[:size].nbytes
+    return stored
+
+
+def run_queries(index, queries, k):
+    results, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = index.search(query, k)
+        timings.append(time.perf_counter() - start)
+        results.append({profile[1] for profile, _ in matches})
+    return results, np.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = clustered_vectors(rng, args.size, args.dim)
+    profiles = [(f"n{i}", f"{i}@example.com", "", "", 0, "") for i in range(args.size)]
+    picks = rng.integers(0, args.size, args.queries)
+    queries = embeddings[picks] + rng.standard_normal(
+        (args.queries, args.dim), dtype=np.float32
+    )
+    exact_by_email = {profile[1]: embeddings[i] for i, profile in enumerate(profiles)}
+
+    reference = VectorIndex.from_embeddings(profiles, embeddings, storage="float32")
+    expected, _ = run_queries(reference, queries, args.k)
+
+    print(
+        f"{'storage':>16} {'MB / 1M':>9} {'query ms':>9} "
+        f"{f'recall@{args.k}':>10}"
+    )
+    for storage in ("float32", "float16", "int8"):
+        index = VectorIndex.from_embeddings(profiles, embeddings, storage=storage)
+        mb_per_million = index_bytes(index) / len(index) * 1_000_000 / 2**20
+        variants = [(storage, None)]
+        if storage != "float32":
+            variants.append(
+                (
+                    f"{storage}+rerank",
+                    lambda emails: {e: exact_by_email[e] for e in emails},
+                )
+            )
+        for name, loader in variants:
+            index.rerank_loader = loader
+            actual, latency_ms = run_queries(index, queries, args.k)
+            recall = np.mean(
+                [len(a & e) / args.k for a, e in zip(actual, expected)]
+            )
+            print(
+                f"{name:>16} {mb_per_million:>9.0f} {latency_ms:>9.2f} "
+                f"{recall:>10.3f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
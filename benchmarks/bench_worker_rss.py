@@ -0,0 +1,109 @@
+"""
+Total memory of N worker processes that each hold the profile index, either
+as a private in-memory copy (the per-worker load) or by mapping one shared
+snapshot written with VectorIndex.save_snapshot.
+
+Memory is summed PSS (proportional set size), which charges each shared page
+to the processes mapping it in equal parts. With the shared snapshot the
+total should stay roughly flat as workers are added; private copies grow
+linearly.
+
+Usage:
+    python benchmarks/bench_worker_rss.py --profiles 500000 --workers 1 2 4 8
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import psutil
+
+REPO_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_DIR)
+
+from vector_index import VectorIndex  # noqa: E402
+
+WORKER = """
+import sys, time
+import numpy as np
+from vector_index import VectorIndex
+mode, prefix = sys.argv[1], sys.argv[2]
+index = VectorIndex.load_snapshot(prefix)
+if mode == "private":
+    # What each worker did before: its own copy of every vector
+    index._matrix = np.array(index._matrix)
+    index._years = np.array(index._years)
+    index._org_codes = np.array(index._org_codes)
+    if index._scales is not None:
+        index._scales = np.array(index._scales)
+# Score every row once so all pages are resident
+index.search(np.ones(index.dimension, dtype=np.float32), 10)
+print("ready", flush=True)
+time.sleep(3600)
+"""
+
+
+def total_pss(processes):
+    total = 0
+    for process in processes:
+        info = psutil.Process(process.pid).memory_full_info()
+        total += getattr(info, "pss", info.rss)
+    return total
+
+
+def measure(mode, prefix, workers):
+    processes = [
+        subprocess.Popen(
+            [sys.executable, "-c", WORKER, mode, prefix],
+            cwd=REPO_DIR,
+            stdout=subprocess.PIPE,
+            text=True,
+        )
+        for _ in range(workers)
+    ]
+    try:
+        for process in processes:
+            process.stdout.readline()
+        time.sleep(0.5)
+        return total_pss(processes)
+    finally:
+        for process in processes:
+            process.kill()
+            process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--profiles", type=int, default=500_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--storage", default="float32")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    embeddings = rng.standard_normal((args.profiles, args.dim), dtype=np.float32)
+    profiles = [
+        (f"n{i}", f"{i}@example.com", "", "", i % 30, "") for i in range(args.profiles)
+    ]
+    index = VectorIndex.from_embeddings(profiles, embeddings, storage=args.storage)
+    workdir = tempfile.mkdtemp(prefix="bench_worker_rss_")
+    prefix = os.path.join(workdir, "index")
+    index.save_snapshot(prefix)
+    del index, embeddings
+
+    print(f"{args.profiles} profiles, {args.dim}-dim {args.storage}")
+    print(f"{'workers':>8} {'private MB':>11} {'shared MB':>10}")
+    try:
+        for workers in args.workers:
+            private = measure("private", prefix, workers) / 2**20
+            shared = measure("shared", prefix, workers) / 2**20
+            print(f"{workers:>8} {private:>11.0f} {shared:>10.0f}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
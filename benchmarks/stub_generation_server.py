@@ -0,0 +1,145 @@
+"""
+Offline stand-in for the watsonx generation API.
+
+It serves POST /token (simulated IAM token fetch) and POST /generate, which
+answers in the watsonx response format with a synthetic resume JSON derived
+from the prompt. Batched prompts (one "### Resume (filename: ...)" section per
+resume) get a JSON array back. A fraction of /generate calls can be failed
+with 429 to exercise retry handling. Point the app at it with
+GENERATION_URL=http://host:port.
+
+Usage:
+    python benchmarks/stub_generation_server.py --port 8900 --latency 0.5 \
+        --auth-latency 0.8 --error-rate 0.1
+"""
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from faker import Faker
+
+
+def fake_resume(seed_text):
+    seed = int(hashlib.sha256(seed_text.encode("utf-8")).hexdigest()[:8], 16)
+    fake = Faker()
+    fake.seed_instance(seed)
+    return {
+        "name": fake.name(),
+        "email": fake.unique.email(),
+        "phone_number": fake.phone_number(),
+        "current_organization": fake.company(),
+        "years_experience": fake.random_int(0, 25),
+        "skills": ", ".join(fake.words(8, unique=True)),
+    }
+
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        def log_message(self, format, *args):
+            pass
+
+        def _send_json(self, status, body):
+            payload = json.dumps(body).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def _read_json(self):
+            length = int(self.headers.get("Content-Length", 0))
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_POST(self):
+            if self.path == "/token":
+                time.sleep(config["auth_latency"])
+                with config["lock"]:
+                    config["token_requests"] += 1
+                self._send_json(200, {"access_token": "stub-token", "expires_in": 3600})
+            elif self.path == "/generate":
+                request = self._read_json()
+                time.sleep(config["latency"])
+                with config["lock"]:
+                    config["generate_requests"] += 1
+                    throttled = random.random() < config["error_rate"]
+                    if throttled:
+                        config["throttled_requests"] += 1
+                if throttled:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0.1")
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                text = fake_generation(request.get("input", ""))
+                self._send_json(
+                    200,
+                    {
+                        "model_id": request.get("model_id"),
+                        "results": [{"generated_text": text, "stop_reason": "eos_token"}],
+                    },
+                )
+            else:
+                self._send_json(404, {"error": "not found"})
+
+    return StubHandler
+
+
+def fake_generation(prompt):
+    sections = re.split(r"### Resume \(filename: (.+?)\)", prompt)
+    if len(sections) == 1:
+        return json.dumps(fake_resume(prompt))
+    # sections = [preamble, filename, text, filename, text, ...]
+    return json.dumps(
+        [
+            dict(fake_resume(text), filename=filename)
+            for filename, text in zip(sections[1::2], sections[2::2])
+        ]
+    )
+
+
+def start_stub_server(port=0, latency=0.5, auth_latency=0.8, error_rate=0.0):
+    """
+    Start the stub server on a background thread.
+
+    Returns:
+        tuple: (server, config); server.server_address holds the bound port and
+               config counts token, generate and throttled requests.
+    """
+    config = {
+        "latency": latency,
+        "auth_latency": auth_latency,
+        "error_rate": error_rate,
+        "token_requests": 0,
+        "generate_requests": 0,
+        "throttled_requests": 0,
+        "lock": threading.Lock(),
+    }
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(config))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, config
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--auth-latency", type=float, default=0.8)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server, _ = start_stub_server(
+        args.port, args.latency, args.auth_latency, args.error_rate
+    )
+    print(f"stub generation server on http://127.0.0.1:{server.server_address[1]}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
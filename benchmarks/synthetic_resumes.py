@@ -0,0 +1,203 @@
+"""
+Synthetic resumes for the benchmarks.
+
+- write_resume_pdfs() writes Faker resumes as born-digital PDFs, which have a
+  text layer, or as scanned PDFs, which only hold a page image and go through
+  OCR.
+- seed_corpus() fills a database with synthetic profiles and stand-in
+  embeddings, so matching can be measured at corpus sizes that would take
+  hours to embed with the real model.
+"""
+import io
+import os
+import sys
+import fitz
+import numpy as np
+from faker import Faker
+from PIL import Image, ImageDraw, ImageFont
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from database import connection, write  # noqa: E402
+from embedding_store import (  # noqa: E402
+    build_profile_text,
+    profile_text_hash,
+    store_embeddings,
+)
+from utils import upsert_resume  # noqa: E402
+
+# Pools of Faker values combined at random, so millions of profiles can be
+# generated without calling Faker per row
+POOL_SIZE = 5000
+SKILLS = (
+    "python java javascript typescript go rust c++ sql postgresql mysql mongodb "
+    "redis kafka spark hadoop airflow docker kubernetes terraform aws azure gcp "
+    "linux react angular vue node django flask fastapi spring pandas numpy "
+    "pytorch tensorflow scikit-learn nlp llm mlops ci/cd git graphql rest "
+    "microservices security networking excel tableau powerbi scrum agile"
+).split()
+PAGE_SIZE = (612, 792)
+
+
+class ProfileFactory:
+    """
+    Generate (Name, Email, Phone_Number, Current_Organization,
+    Years_Experience, Skills) tuples, unique by email.
+    """
+
+    def __init__(self, seed=0):
+        fake = Faker()
+        fake.seed_instance(seed)
+        self.rng = np.random.default_rng(seed)
+        self.names = [fake.name() for _ in range(POOL_SIZE)]
+        self.phones = [fake.phone_number() for _ in range(POOL_SIZE)]
+        self.companies = [fake.company() for _ in range(POOL_SIZE // 5)]
+        self.titles = [fake.job() for _ in range(POOL_SIZE // 5)]
+        self.sentences = [fake.sentence(14) for _ in range(POOL_SIZE)]
+
+    def profile(self, i):
+        rng = self.rng
+        name = self.names[rng.integers(len(self.names))]
+        email = f"{name.lower().replace(' ', '.').replace(',', '')}.{i}@example.com"
+        skills = ", ".join(rng.choice(SKILLS, rng.integers(4, 12), replace=False))
+        return (
+            name,
+            email,
+            self.phones[rng.integers(len(self.phones))],
+            self.companies[rng.integers(len(self.companies))],
+            int(rng.integers(0, 30)),
+            skills,
+        )
+
+    def job_description(self):
+        rng = self.rng
+        title = self.titles[rng.integers(len(self.titles))]
+        skills = ", ".join(rng.choice(SKILLS, rng.integers(3, 8), replace=False))
+        years = int(rng.integers(1, 12))
+        return f"{title} with {years}+ years of experience in {skills}."
+
+    def resume_text(self, profile):
+        name, email, phone, company, years, skills = profile
+        lines = [
+            name,
+            f"Email: {email}",
+            f"Phone: {phone}",
+            "",
+            f"Current organization: {company}",
+            f"Experience: {years} years",
+            f"Skills: {skills}",
+            "",
+            "Summary",
+        ]
+        lines += [
+            self.sentences[j] for j in self.rng.integers(len(self.sentences), size=12)
+        ]
+        return "\n".join(lines)
+
+
+def born_digital_pdf(text):
+    document = fitz.open()
+    page = document.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+    page.insert_textbox(fitz.Rect(50, 50, 562, 742), text, fontsize=10)
+    return document.tobytes()
+
+
+def scanned_pdf(text, dpi=150):
+    # Draw the text on a page-sized image, like a scanner would produce
+    scale = dpi / 72
+    image = Image.new(
+        "L", (int(PAGE_SIZE[0] * scale), int(PAGE_SIZE[1] * scale)), color=255
+    )
+    draw = ImageDraw.Draw(image)
+    try:
+        font = ImageFont.load_default(size=int(10 * scale))
+    except TypeError:
+        font = ImageFont.load_default()
+    draw.multiline_text(
+        (int(50 * scale), int(50 * scale)), text, fill=0, font=font, spacing=6
+    )
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+
+    document = fitz.open()
+    page = document.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+    page.insert_image(page.rect, stream=buffer.getvalue())
+    return document.tobytes()
+
+
+def write_resume_pdfs(directory, count, scanned_fraction=0.0, seed=0, start=0):
+    """
+    Write `count` resume PDFs, roughly `scanned_fraction` of them scanned.
+
+    Profile numbers start at `start` so uploads do not collide with a seeded
+    corpus.
+
+    Returns:
+        list: (path, scanned) tuples.
+    """
+    factory = ProfileFactory(seed)
+    os.makedirs(directory, exist_ok=True)
+    files = []
+    for i in range(count):
+        text = factory.resume_text(factory.profile(start + i))
+        scanned = factory.rng.random() < scanned_fraction
+        path = os.path.join(directory, f"resume_{start + i}.pdf")
+        with open(path, "wb") as f:
+            f.write(scanned_pdf(text) if scanned else born_digital_pdf(text))
+        files.append((path, scanned))
+    return files
+
+
+def job_descriptions(count, seed=0):
+    """Return `count` distinct synthetic job descriptions."""
+    factory = ProfileFactory(seed + 1)
+    descriptions = []
+    seen = set()
+    while len(descriptions) < count:
+        description = factory.job_description()
+        if description not in seen:
+            seen.add(description)
+            descriptions.append(description)
+    return descriptions
+
+
+def count_profiles(db_path):
+    with connection(db_path) as conn:
+        return conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+
+
+def seed_corpus(db_path, size, dim, seed=0, chunk_size=10_000):
+    """
+    Top a database up to `size` synthetic profiles.
+
+    Each profile gets a random unit vector stored under the current embedding
+    model and text hash, so the server loads it as up to date instead of
+    re-embedding. Rankings are therefore meaningless, but the work per query
+    (filtering, scoring, top-k, BM25 over Skills) is the same as with real
+    vectors.
+
+    Returns:
+        int: The number of profiles in the database afterwards.
+    """
+    existing = count_profiles(db_path)
+    factory = ProfileFactory(seed + existing)
+    rng = np.random.default_rng(seed + existing)
+    for start in range(existing, size, chunk_size):
+        profiles = [
+            factory.profile(i) for i in range(start, min(start + chunk_size, size))
+        ]
+        vectors = rng.standard_normal((len(profiles), dim), dtype=np.float32)
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        embeddings = [
+            (profile[1], profile_text_hash(build_profile_text(*profile[3:])), vector)
+            for profile, vector in zip(profiles, vectors)
+        ]
+
+        def insert_chunk(conn):
+            # Triggers on resumes index the skills as the rows are inserted
+            for profile in profiles:
+                upsert_resume(conn, profile)
+            store_embeddings(conn, embeddings)
+
+        write(insert_chunk, db_path)
+    return count_profiles(db_path)
@@ -0,0 +1,281 @@
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from metrics import Gauge, observe_stage, timed
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+DB_PATH = os.getenv("DB_PATH")
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_SECONDS = float(os.getenv("DB_BUSY_TIMEOUT_SECONDS", "30"))
+# Maximum number of queued writes committed in one transaction
+DB_WRITE_BATCH_SIZE = int(os.getenv("DB_WRITE_BATCH_SIZE", "64"))
+# Compiled statements kept per connection, so pooled connections reuse them
+DB_STATEMENT_CACHE_SIZE = 256
+
+_pools = {}
+_writers = {}
+_registry_lock = threading.Lock()
+
+_schema_creators = []
+_schema_applied = {}
+_schema_lock = threading.Lock()
+
+WRITE_QUEUE_DEPTH = Gauge(
+    "resume_matcher_sqlite_write_queue_depth",
+    "Write tasks waiting for the writer thread.",
+)
+
+
+def register_schema(create_tables):
+    """
+    Register a `create_tables(conn)` function to run once per database.
+
+    Modules register their CREATE TABLE IF NOT EXISTS functions at import time
+    instead of running them on every read and write.
+    """
+    with _schema_lock:
+        if create_tables not in _schema_creators:
+            _schema_creators.append(create_tables)
+
+
+def open_connection(db_path):
+    """
+    Open a connection in WAL mode with a busy timeout and statement cache.
+
+    Connections are in autocommit mode; writes go through the writer thread,
+    which manages its own transactions.
+    """
+    conn = sqlite3.connect(
+        db_path,
+        timeout=DB_BUSY_TIMEOUT_SECONDS,
+        isolation_level=None,
+        check_same_thread=False,
+        cached_statements=DB_STATEMENT_CACHE_SIZE,
+    )
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
+
+
+def _ensure_schema(conn, db_path):
+    with _schema_lock:
+        applied = _schema_applied.setdefault(db_path, set())
+        for create_tables in _schema_creators:
+            if create_tables not in applied:
+                create_tables(conn)
+                applied.add(create_tables)
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of connections to one SQLite database.
+
+    Connections are opened lazily up to `size` and handed out one per thread
+    for the duration of a `with pool.connection()` block.
+    """
+
+    def __init__(self, db_path, size=DB_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(size, 1)
+        self._idle = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                try:
+                    return open_connection(self.db_path)
+                except sqlite3.Error:
+                    self._opened -= 1
+                    raise
+        return self._idle.get()
+
+    @contextmanager
+    def connection(self):
+        conn = self._acquire()
+        try:
+            _ensure_schema(conn, self.db_path)
+            yield conn
+        finally:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle.put(conn)
+
+    def close(self):
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+        with self._lock:
+            self._opened = 0
+
+
+class DatabaseWriter:
+    """
+    Single thread that performs every write to one database.
+
+    Callers queue `task(conn)` functions and get a Future back. The thread
+    drains up to DB_WRITE_BATCH_SIZE queued tasks, runs each in its own
+    savepoint inside one BEGIN IMMEDIATE transaction and commits once, so
+    concurrent uploads share commits instead of contending for the lock.
+    A failing task is rolled back on its own and its Future gets the error.
+    Tasks must not commit themselves.
+    """
+
+    def __init__(self, db_path, batch_size=DB_WRITE_BATCH_SIZE):
+        self.db_path = db_path
+        self.batch_size = max(batch_size, 1)
+        self._tasks = queue.Queue()
+        self._thread = threading.Thread(
+            target=self._run, name="sqlite-writer", daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, task):
+        future = Future()
+        self._tasks.put((task, future))
+        return future
+
+    def execute(self, task):
+        """Run a write task on the writer thread and wait for its result."""
+        return self.submit(task).result()
+
+    def stop(self):
+        self._tasks.put(None)
+        self._thread.join()
+
+    def _next_batch(self):
+        batch = [self._tasks.get()]
+        while batch[-1] is not None and len(batch) < self.batch_size:
+            try:
+                batch.append(self._tasks.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        conn = open_connection(self.db_path)
+        stopping = False
+        while not stopping:
+            batch = self._next_batch()
+            if batch[-1] is None:
+                stopping = True
+                batch.pop()
+            if not batch:
+                continue
+            self._run_batch(conn, batch)
+        conn.close()
+
+    def _run_batch(self, conn, batch):
+        outcomes = []
+        try:
+            # Also picks up schemas registered after the writer started
+            _ensure_schema(conn, self.db_path)
+            conn.execute("BEGIN IMMEDIATE")
+            for task, future in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                conn.execute("SAVEPOINT write_task")
+                try:
+                    result = task(conn)
+                except BaseException as e:
+                    conn.execute("ROLLBACK TO write_task")
+                    conn.execute("RELEASE write_task")
+                    outcomes.append((future, None, e))
+                else:
+                    conn.execute("RELEASE write_task")
+                    outcomes.append((future, result, None))
+            conn.execute("COMMIT")
+        except sqlite3.Error as e:
+            print(f"SQLite error while committing writes: {e}")
+            if conn.in_transaction:
+                conn.rollback()
+            for _, future in batch:
+                if not future.done():
+                    if not future.running():
+                        future.set_running_or_notify_cancel()
+                    future.set_exception(e)
+            return
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+def get_pool(db_path=None):
+    """Return the process-wide connection pool for a database."""
+    db_path = db_path or DB_PATH
+    with _registry_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path)
+            _pools[db_path] = pool
+        return pool
+
+
+def get_writer(db_path=None):
+    """Return the process-wide writer thread for a database."""
+    db_path = db_path or DB_PATH
+    with _registry_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = DatabaseWriter(db_path)
+            _writers[db_path] = writer
+        return writer
+
+
+@contextmanager
+def connection(db_path=None):
+    """Borrow a pooled connection for reads."""
+    start = time.perf_counter()
+    try:
+        with get_pool(db_path).connection() as conn:
+            yield conn
+    finally:
+        # Callers may raise from inside the block, so errors are not counted here
+        observe_stage("sqlite_read", time.perf_counter() - start)
+
+
+def write(task, db_path=None):
+    """Run `task(conn)` on the database's writer thread and return its result."""
+    with timed("sqlite_write"):
+        return get_writer(db_path).execute(task)
+
+
+def _write_queue_depth():
+    with _registry_lock:
+        writers = list(_writers.values())
+    return sum(writer._tasks.qsize() for writer in writers)
+
+
+WRITE_QUEUE_DEPTH.set_function(_write_queue_depth)
+
+
+def close_database():
+    """Stop the writer threads and close pooled connections."""
+    with _registry_lock:
+        writers = list(_writers.values())
+        pools = list(_pools.values())
+        _writers.clear()
+        _pools.clear()
+    for writer in writers:
+        writer.stop()
+    for pool in pools:
+        pool.close()
@@ -0,0 +1,265 @@
+import hashlib
+import os
+import sqlite3
+import numpy as np
+from dotenv import load_dotenv
+from database import connection, register_schema, write
+from model import EMBEDDING_MODEL_ID, embed_texts
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+DB_PATH = os.getenv("DB_PATH")
+EMBEDDING_DTYPE = np.float32
+# Columns of resume_embeddings, shared by the re-indexer's staging table
+EMBEDDINGS_COLUMNS = """(Email TEXT PRIMARY KEY, Model_Name TEXT, Text_Hash TEXT,
+                  Dimension INTEGER, Embedding BLOB)"""
+
+
+def build_profile_text(current_organization, years_experience, skills):
+    """
+    Build the text that is embedded for a profile.
+
+    Args:
+        current_organization (str): Current organization of the candidate.
+        years_experience (int): Years of experience of the candidate.
+        skills (str): Skills of the candidate.
+
+    Returns:
+        str: The profile text used for embedding.
+    """
+    return " ".join([current_organization or "", str(years_experience), skills or ""])
+
+
+def profile_text_hash(text):
+    """
+    Hash a profile text so stale embeddings can be detected.
+
+    Args:
+        text (str): The profile text.
+
+    Returns:
+        str: Hex SHA-256 digest of the text.
+    """
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+# Function to create resume_embeddings table if not exists
+def create_embeddings_table(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"CREATE TABLE IF NOT EXISTS resume_embeddings {EMBEDDINGS_COLUMNS}"
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error: {e}")
+
+
+register_schema(create_embeddings_table)
+
+
+def store_embeddings(conn, rows, table="resume_embeddings"):
+    """
+    Write embeddings computed by the current model. Runs as a write task, so
+    it does not commit.
+
+    Args:
+        conn (sqlite3.Connection): The writer connection.
+        rows (iterable): (email, text_hash, vector) tuples.
+        table (str): resume_embeddings, or a table with the same columns such
+            as the re-indexer's staging table.
+    """
+    cursor = conn.cursor()
+    cursor.executemany(
+        f"""INSERT INTO {table}
+                 (Email, Model_Name, Text_Hash, Dimension, Embedding)
+                 VALUES (?, ?, ?, ?, ?)
+                 ON CONFLICT(Email) DO UPDATE SET
+                     Model_Name = excluded.Model_Name,
+                     Text_Hash = excluded.Text_Hash,
+                     Dimension = excluded.Dimension,
+                     Embedding = excluded.Embedding""",
+        [
+            (
+                email,
+                EMBEDDING_MODEL_ID,
+                text_hash,
+                int(vector.shape[0]),
+                np.asarray(vector, dtype=EMBEDDING_DTYPE).tobytes(),
+            )
+            for email, text_hash, vector in rows
+        ],
+    )
+
+
+def read_profile_embedding(conn, email):
+    """
+    Read the stored profile for an email together with its embedding.
+
+    The profile fields are read back from the resumes table so the hash matches
+    what later queries will see.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+        email (str): Email of the profile.
+
+    Returns:
+        tuple: (profile, text_hash, embedding, text). embedding is None if it is
+               missing or stale; everything is None if the email is not in the
+               resumes table.
+    """
+    cursor = conn.cursor()
+    cursor.execute(
+        """SELECT r.Name, r.Email, r.Phone_Number, r.Current_Organization,
+                  r.Years_Experience, r.Skills,
+                  e.Model_Name, e.Text_Hash, e.Embedding
+             FROM resumes r
+             LEFT JOIN resume_embeddings e ON e.Email = r.Email
+            WHERE r.Email = ?""",
+        (email,),
+    )
+    row = cursor.fetchone()
+    if row is None:
+        return None, None, None, None
+
+    profile = row[:6]
+    text = build_profile_text(row[3], row[4], row[5])
+    text_hash = profile_text_hash(text)
+    if (
+        row[6] == EMBEDDING_MODEL_ID
+        and row[7] == text_hash
+        and row[8] is not None
+    ):
+        return profile, text_hash, np.frombuffer(row[8], dtype=EMBEDDING_DTYPE), text
+    return profile, text_hash, None, text
+
+
+def embed_profile_text(email, text):
+    """
+    Embed one profile text.
+
+    Returns:
+        numpy.ndarray: The float32 embedding.
+    """
+    embeddings = embed_texts([text])
+    if embeddings is None:
+        raise RuntimeError(f"Failed to embed profile for {email}")
+    return np.asarray(embeddings[0], dtype=EMBEDDING_DTYPE)
+
+
+def store_profile_embedding(conn, email, text_hash, vector):
+    """Write one profile embedding; runs on the database writer thread."""
+    store_embeddings(conn, [(email, text_hash, vector)])
+
+
+def upsert_profile_embedding(conn, email):
+    """
+    Embed the stored profile for an email unless an up-to-date vector exists.
+
+    Args:
+        conn (sqlite3.Connection): Open database connection.
+        email (str): Email of the profile to embed.
+
+    Returns:
+        tuple: (profile, embedding) for the stored row, or (None, None) if the
+               email is not in the resumes table.
+    """
+    profile, text_hash, vector, text = read_profile_embedding(conn, email)
+    if profile is None or vector is not None:
+        return profile, vector
+
+    vector = embed_profile_text(email, text)
+    store_profile_embedding(conn, email, text_hash, vector)
+    return profile, vector
+
+
+def load_profile_embeddings(db_path=None):
+    """
+    Load every profile together with its stored embedding.
+
+    Profiles whose embedding is missing, was computed by a different model, or
+    whose Skills/Current_Organization/Years_Experience changed since it was
+    computed are re-embedded in a single batch and written back.
+
+    Args:
+        db_path (str, optional): Path to the SQLite database. Defaults to DB_PATH.
+
+    Returns:
+        tuple: (profiles, embeddings) where profiles is a list of
+               (Name, Email, Phone_Number, Current_Organization, Years_Experience, Skills)
+               tuples and embeddings is a float32 numpy.ndarray of shape (n, dim).
+    """
+    db_path = db_path or DB_PATH
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT r.Name, r.Email, r.Phone_Number, r.Current_Organization,
+                      r.Years_Experience, r.Skills,
+                      e.Model_Name, e.Text_Hash, e.Embedding
+                 FROM resumes r
+                 LEFT JOIN resume_embeddings e ON e.Email = r.Email"""
+        )
+        rows = cursor.fetchall()
+
+    profiles = [row[:6] for row in rows]
+    vectors = [None] * len(rows)
+    stale = []
+    for i, row in enumerate(rows):
+        text = build_profile_text(row[3], row[4], row[5])
+        text_hash = profile_text_hash(text)
+        if (
+            row[6] == EMBEDDING_MODEL_ID
+            and row[7] == text_hash
+            and row[8] is not None
+        ):
+            vectors[i] = np.frombuffer(row[8], dtype=EMBEDDING_DTYPE)
+        else:
+            stale.append((i, text, text_hash))
+
+    if stale:
+        print(f"Re-embedding {len(stale)} stale profile(s)")
+        embeddings = embed_texts([text for _, text, _ in stale])
+        if embeddings is None:
+            raise RuntimeError("Failed to embed stale profiles")
+        for (i, _, _), vector in zip(stale, embeddings):
+            vectors[i] = np.asarray(vector, dtype=EMBEDDING_DTYPE)
+        stale_rows = [
+            (profiles[i][1], text_hash, vectors[i]) for i, _, text_hash in stale
+        ]
+        write(lambda conn: store_embeddings(conn, stale_rows), db_path)
+
+    if not vectors:
+        return profiles, np.empty((0, 0), dtype=EMBEDDING_DTYPE)
+    return profiles, np.vstack(vectors)
+
+
+def load_embeddings_by_email(emails, db_path=None):
+    """
+    Load the stored float32 embeddings for the given emails.
+
+    Used to rerank candidates scored on quantized vectors.
+
+    Args:
+        emails (list of str): Emails to look up.
+        db_path (str, optional): Path to the SQLite database. Defaults to DB_PATH.
+
+    Returns:
+        dict: email -> float32 numpy.ndarray for emails that have a vector
+              from the current embedding model.
+    """
+    emails = list(emails)
+    vectors = {}
+    with connection(db_path or DB_PATH) as conn:
+        for start in range(0, len(emails), 500):
+            chunk = emails[start : start + 500]
+            cursor = conn.execute(
+                f"""SELECT Email, Embedding FROM resume_embeddings
+                     WHERE Model_Name = ?
+                       AND Email IN ({", ".join("?" * len(chunk))})""",
+                [EMBEDDING_MODEL_ID, *chunk],
+            )
+            for email, blob in cursor.fetchall():
+                vectors[email] = np.frombuffer(blob, dtype=EMBEDDING_DTYPE)
+    return vectors
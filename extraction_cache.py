@@ -0,0 +1,153 @@
+import hashlib
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from database import connection, register_schema, write
+from metrics import record_cache
+
+_stats = {
+    "text": {"hits": 0, "misses": 0},
+    "llm": {"hits": 0, "misses": 0},
+}
+_stats_lock = threading.Lock()
+
+
+def sha256_hex(data):
+    """
+    Return the hex SHA-256 digest of bytes or text.
+    """
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return hashlib.sha256(data).hexdigest()
+
+
+def llm_cache_key(text, model_id, prompt):
+    """
+    Build the cache key for an LLM extraction.
+
+    Args:
+        text (str): Extracted resume text.
+        model_id (str): The watsonx model ID.
+        prompt (str): The unformatted extraction prompt template.
+
+    Returns:
+        str: Hex digest combining the text hash, model ID and prompt hash.
+    """
+    return sha256_hex("|".join([sha256_hex(text), model_id or "", sha256_hex(prompt)]))
+
+
+def _record(cache, hit):
+    with _stats_lock:
+        _stats[cache]["hits" if hit else "misses"] += 1
+    record_cache(f"extraction_{cache}", hit)
+
+
+def get_cache_stats():
+    """
+    Return hit/miss counters and hit ratios for the text and LLM caches.
+    """
+    with _stats_lock:
+        stats = {name: dict(counts) for name, counts in _stats.items()}
+    for counts in stats.values():
+        total = counts["hits"] + counts["misses"]
+        counts["hit_ratio"] = counts["hits"] / total if total else 0.0
+    return stats
+
+
+# Function to create the extraction cache tables if not exists
+def create_cache_tables(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS text_cache
+                 (Pdf_Hash TEXT PRIMARY KEY, Text TEXT, Stats TEXT, Created_At TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS llm_cache
+                 (Cache_Key TEXT PRIMARY KEY, Model_Id TEXT, Text_Hash TEXT,
+                  Prompt_Hash TEXT, Response_Json TEXT, Created_At TEXT)"""
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error: {e}")
+
+
+register_schema(create_cache_tables)
+
+
+def get_cached_text(db_path, pdf_hash):
+    """
+    Look up the extracted text for a PDF hash.
+
+    Returns:
+        tuple or None: (text, stats) if cached, otherwise None.
+    """
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT Text, Stats FROM text_cache WHERE Pdf_Hash = ?", (pdf_hash,)
+        )
+        row = cursor.fetchone()
+    _record("text", row is not None)
+    if row is None:
+        return None
+    return row[0], json.loads(row[1])
+
+
+def put_cached_text(db_path, pdf_hash, text, stats):
+    row = (pdf_hash, text, json.dumps(stats), datetime.utcnow().isoformat())
+    write(
+        lambda conn: conn.execute(
+            """INSERT INTO text_cache (Pdf_Hash, Text, Stats, Created_At)
+                 VALUES (?, ?, ?, ?)
+                 ON CONFLICT(Pdf_Hash) DO UPDATE SET
+                     Text = excluded.Text,
+                     Stats = excluded.Stats,
+                     Created_At = excluded.Created_At""",
+            row,
+        ),
+        db_path,
+    )
+
+
+def get_cached_extraction(db_path, cache_key):
+    """
+    Look up the parsed LLM JSON for a cache key.
+
+    Returns:
+        dict or None: The parsed JSON if cached, otherwise None.
+    """
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            "SELECT Response_Json FROM llm_cache WHERE Cache_Key = ?", (cache_key,)
+        )
+        row = cursor.fetchone()
+    _record("llm", row is not None)
+    if row is None:
+        return None
+    return json.loads(row[0])
+
+
+def put_cached_extraction(db_path, cache_key, model_id, text, prompt, resp_json):
+    row = (
+        cache_key,
+        model_id,
+        sha256_hex(text),
+        sha256_hex(prompt),
+        json.dumps(resp_json),
+        datetime.utcnow().isoformat(),
+    )
+    write(
+        lambda conn: conn.execute(
+            """INSERT INTO llm_cache
+                 (Cache_Key, Model_Id, Text_Hash, Prompt_Hash, Response_Json, Created_At)
+                 VALUES (?, ?, ?, ?, ?, ?)
+                 ON CONFLICT(Cache_Key) DO UPDATE SET
+                     Response_Json = excluded.Response_Json,
+                     Created_At = excluded.Created_At""",
+            row,
+        ),
+        db_path,
+    )
@@ -0,0 +1,155 @@
+import os
+import random
+import threading
+import time
+from dotenv import load_dotenv
+from metrics import Counter, Gauge, observe_stage, timed
+from model import generate_text, status_code_of
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+LLM_REQUESTS_PER_SECOND = float(os.getenv("LLM_REQUESTS_PER_SECOND", "2"))
+LLM_RATE_BURST = int(os.getenv("LLM_RATE_BURST", "4"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+LLM_BACKOFF_SECONDS = float(os.getenv("LLM_BACKOFF_SECONDS", "1.0"))
+LLM_BACKOFF_MAX_SECONDS = 30.0
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_schedulers = {}
+_schedulers_lock = threading.Lock()
+
+LLM_REQUESTS_IN_FLIGHT = Gauge(
+    "resume_matcher_llm_requests_in_flight",
+    "Generate calls running (state=running) or waiting for a slot (state=waiting).",
+    ("state",),
+)
+LLM_RETRIES = Counter(
+    "resume_matcher_llm_retries_total",
+    "Generate calls retried, by HTTP status code.",
+    ("status",),
+)
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket rate limiter.
+
+    Tokens refill continuously at `rate` per second up to `burst`; acquire()
+    blocks until a token is available.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.burst, self._tokens + (now - self._updated_at) * self.rate
+                )
+                self._updated_at = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+def _retry_after(error):
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+class ExtractionScheduler:
+    """
+    Gatekeeper for generate calls to one model.
+
+    At most max_concurrency calls run at once, calls start no faster than the
+    token bucket allows, and 429/5xx responses are retried with exponential
+    backoff and jitter (honouring Retry-After when the server sends it).
+    """
+
+    def __init__(
+        self,
+        model_id,
+        max_concurrency=LLM_MAX_CONCURRENCY,
+        requests_per_second=LLM_REQUESTS_PER_SECOND,
+        burst=LLM_RATE_BURST,
+        max_retries=LLM_MAX_RETRIES,
+    ):
+        self.model_id = model_id
+        self.max_retries = max_retries
+        self._semaphore = threading.BoundedSemaphore(max(max_concurrency, 1))
+        self._bucket = TokenBucket(requests_per_second, burst)
+
+    def generate(self, prompt):
+        """
+        Generate text for a prompt within the concurrency and rate limits.
+
+        Args:
+            prompt (str): The formatted prompt.
+
+        Returns:
+            str: The generated text.
+        """
+        attempt = 0
+        while True:
+            LLM_REQUESTS_IN_FLIGHT.inc(state="waiting")
+            start = time.perf_counter()
+            self._bucket.acquire()
+            try:
+                with self._semaphore:
+                    LLM_REQUESTS_IN_FLIGHT.dec(state="waiting")
+                    observe_stage("llm_wait", time.perf_counter() - start)
+                    LLM_REQUESTS_IN_FLIGHT.inc(state="running")
+                    try:
+                        with timed("llm_generate"):
+                            return generate_text(self.model_id, prompt)
+                    finally:
+                        LLM_REQUESTS_IN_FLIGHT.dec(state="running")
+            except Exception as e:
+                status_code = status_code_of(e)
+                if (
+                    status_code not in RETRYABLE_STATUS_CODES
+                    or attempt >= self.max_retries
+                ):
+                    raise
+                LLM_RETRIES.inc(status=status_code)
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = min(
+                        LLM_BACKOFF_MAX_SECONDS, LLM_BACKOFF_SECONDS * 2**attempt
+                    ) * random.uniform(0.5, 1.5)
+                print(
+                    f"Generation returned {status_code}, retrying in {delay:.1f}s "
+                    f"(attempt {attempt + 1}/{self.max_retries})"
+                )
+                time.sleep(delay)
+                attempt += 1
+
+
+def get_scheduler(model_id):
+    """
+    Return the process-wide scheduler for a model ID, so limits apply across
+    concurrent uploads.
+    """
+    with _schedulers_lock:
+        scheduler = _schedulers.get(model_id)
+        if scheduler is None:
+            scheduler = ExtractionScheduler(model_id)
+            _schedulers[model_id] = scheduler
+        return scheduler
@@ -0,0 +1,113 @@
+import fcntl
+import json
+import os
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+# Directory shared by every worker; unset keeps a private in-memory index per process
+VECTOR_INDEX_SNAPSHOT_DIR = os.getenv("VECTOR_INDEX_SNAPSHOT_DIR")
+# How often a worker checks for a newer snapshot
+VECTOR_INDEX_POLL_SECONDS = float(os.getenv("VECTOR_INDEX_POLL_SECONDS", "5"))
+# How often a worker checks whether its upserts still need publishing
+VECTOR_INDEX_PUBLISH_SECONDS = float(os.getenv("VECTOR_INDEX_PUBLISH_SECONDS", "60"))
+# Spare rows reserved in each snapshot so upserts do not force a private copy
+SNAPSHOT_HEADROOM = 0.25
+SNAPSHOT_MIN_HEADROOM_ROWS = 1024
+
+CURRENT_POINTER = "current.json"
+LOCK_FILE = ".publish.lock"
+
+
+def read_current(directory=None):
+    """
+    Read the pointer to the current snapshot.
+
+    Returns:
+        dict or None: {"version", "prefix", ...metadata} or None if nothing
+                      has been published yet.
+    """
+    directory = directory or VECTOR_INDEX_SNAPSHOT_DIR
+    try:
+        with open(os.path.join(directory, CURRENT_POINTER)) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+def new_snapshot(directory=None):
+    """
+    Reserve a version for a snapshot that is about to be written.
+
+    Returns:
+        tuple: (version, prefix) where prefix is the path files are written under.
+    """
+    directory = directory or VECTOR_INDEX_SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    version = f"{time.time_ns()}-{os.getpid()}"
+    return version, os.path.join(directory, f"index-{version}")
+
+
+def publish(version, prefix, metadata, directory=None):
+    """
+    Atomically make a fully written snapshot the current one.
+
+    The pointer is written to a temporary file and renamed over the old one,
+    so readers see either the previous snapshot or the new one, never a mix.
+    Files of snapshots older than the previous one are then removed; workers
+    that still map them keep their pages until they swap.
+    """
+    directory = directory or VECTOR_INDEX_SNAPSHOT_DIR
+    previous = read_current(directory)
+    pointer = dict(metadata, version=version, prefix=os.path.basename(prefix))
+    tmp_path = os.path.join(directory, f".{CURRENT_POINTER}.{os.getpid()}.tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(pointer, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, os.path.join(directory, CURRENT_POINTER))
+
+    keep = {pointer["prefix"]}
+    if previous:
+        keep.add(previous["prefix"])
+    for name in os.listdir(directory):
+        if name.startswith("index-") and name.split(".", 1)[0] not in keep:
+            try:
+                os.remove(os.path.join(directory, name))
+            except FileNotFoundError:
+                pass
+
+
+def snapshot_prefix(pointer, directory=None):
+    """Return the file prefix of the snapshot a pointer refers to."""
+    return os.path.join(directory or VECTOR_INDEX_SNAPSHOT_DIR, pointer["prefix"])
+
+
+@contextmanager
+def publisher_lock(directory=None, blocking=True):
+    """
+    Hold an exclusive lock across processes while building and publishing.
+
+    Only one worker rebuilds at a time. With blocking, the others wait and
+    then find the freshly published snapshot; without it, the context yields
+    False at once if another worker holds the lock.
+
+    Yields:
+        bool: True if the lock is held.
+    """
+    directory = directory or VECTOR_INDEX_SNAPSHOT_DIR
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_FILE), "w") as f:
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            yield False
+            return
+        try:
+            yield True
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
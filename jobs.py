@@ -0,0 +1,403 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import uuid
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from database import connection, register_schema, write
+from metrics import Gauge
+from utils import (
+    LLM_BATCH_SIZE,
+    RESUMES_PROCESSED,
+    extract_and_store_resume,
+    ingest_slot,
+    process_pdfs_in_batches,
+)
+from upload_spool import discard_spooled, read_spooled
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+UPLOAD_JOB_WORKERS = int(os.getenv("UPLOAD_JOB_WORKERS", "4"))
+JOB_POLL_SECONDS = 1.0
+JOB_SHUTDOWN_TIMEOUT_SECONDS = 30.0
+UPLOAD_JOB_LEASE_SECONDS = float(os.getenv("UPLOAD_JOB_LEASE_SECONDS", "120"))
+
+# Identifies this process's claims; the suffix keeps a reused pid from matching
+_owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+_workers = []
+_stop_event = threading.Event()
+_work_available = threading.Event()
+
+UPLOAD_QUEUE_FILES = Gauge(
+    "resume_matcher_upload_queue_files",
+    "Files in the persistent upload queue, by status (queued or processing).",
+    ("status",),
+)
+
+
+# Function to create the upload job queue tables if not exists
+def create_job_tables(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS upload_jobs
+                 (Job_Id TEXT PRIMARY KEY, Status TEXT, Total_Files INTEGER,
+                  Created_At TEXT, Updated_At TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS upload_job_files
+                 (Job_Id TEXT, File_Index INTEGER, Filename TEXT, Status TEXT,
+                  Pdf_Path TEXT, Pdf_Size INTEGER, Result_Json TEXT, Error TEXT,
+                  Updated_At TEXT, Claimed_By TEXT, Lease_Expires_At TEXT,
+                  PRIMARY KEY (Job_Id, File_Index))"""
+        )
+        # Queues created before claims were leased lack the lease columns
+        columns = {
+            row[1] for row in cursor.execute("PRAGMA table_info(upload_job_files)")
+        }
+        for column in ("Claimed_By", "Lease_Expires_At"):
+            if column not in columns:
+                cursor.execute(f"ALTER TABLE upload_job_files ADD COLUMN {column} TEXT")
+        cursor.execute(
+            """CREATE INDEX IF NOT EXISTS idx_upload_job_files_status
+                 ON upload_job_files (Status)"""
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error: {e}")
+
+
+register_schema(create_job_tables)
+
+
+def _now():
+    return datetime.utcnow().isoformat()
+
+
+def _lease_expiry():
+    return (datetime.utcnow() + timedelta(seconds=UPLOAD_JOB_LEASE_SECONDS)).isoformat()
+
+
+def enqueue_upload_job(db_path, files):
+    """
+    Persist an upload job and its spooled files in the queue.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        files (list): (filename, path, size) tuples from spool_uploads.
+
+    Returns:
+        str: The new job ID.
+    """
+    job_id = uuid.uuid4().hex
+    now = _now()
+
+    def insert_job(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            """INSERT INTO upload_jobs
+                 (Job_Id, Status, Total_Files, Created_At, Updated_At)
+                 VALUES (?, 'queued', ?, ?, ?)""",
+            (job_id, len(files), now, now),
+        )
+        cursor.executemany(
+            """INSERT INTO upload_job_files
+                 (Job_Id, File_Index, Filename, Status, Pdf_Path, Pdf_Size, Updated_At)
+                 VALUES (?, ?, ?, 'queued', ?, ?, ?)""",
+            [
+                (job_id, i, filename, path, size, now)
+                for i, (filename, path, size) in enumerate(files)
+            ],
+        )
+
+    write(insert_job, db_path)
+    _work_available.set()
+    return job_id
+
+
+def claim_files(db_path, limit=1):
+    """
+    Atomically move up to `limit` queued files to the processing state.
+
+    Each claim records this process as its owner and holds a lease of
+    UPLOAD_JOB_LEASE_SECONDS, which renew_leases extends while the file is worked on.
+
+    Returns:
+        list: (job_id, file_index, pdf_path, pdf_size) tuples.
+    """
+
+    def claim(conn):
+        rows = conn.execute(
+            """SELECT f.Job_Id, f.File_Index, f.Pdf_Path, f.Pdf_Size
+                 FROM upload_job_files f
+                 JOIN upload_jobs j ON j.Job_Id = f.Job_Id
+                WHERE f.Status = 'queued'
+                ORDER BY j.Created_At, f.File_Index
+                LIMIT ?""",
+            (limit,),
+        ).fetchall()
+        now = _now()
+        expires_at = _lease_expiry()
+        for job_id, file_index, *_ in rows:
+            conn.execute(
+                """UPDATE upload_job_files
+                      SET Status = 'processing', Claimed_By = ?,
+                          Lease_Expires_At = ?, Updated_At = ?
+                    WHERE Job_Id = ? AND File_Index = ?""",
+                (_owner, expires_at, now, job_id, file_index),
+            )
+            conn.execute(
+                """UPDATE upload_jobs SET Status = 'processing', Updated_At = ?
+                    WHERE Job_Id = ? AND Status = 'queued'""",
+                (now, job_id),
+            )
+        return rows
+
+    # The writer thread serializes claims, so no file is handed out twice
+    return write(claim, db_path)
+
+
+def finish_file(db_path, job_id, file_index, result=None, error=None):
+    """
+    Record the outcome of one file and complete its job once every file is done.
+    """
+    now = _now()
+
+    def record_outcome(conn):
+        cursor = conn.cursor()
+        cursor.execute(
+            """UPDATE upload_job_files
+                  SET Status = ?, Result_Json = ?, Error = ?, Updated_At = ?
+                WHERE Job_Id = ? AND File_Index = ?""",
+            (
+                "failed" if error else "completed",
+                json.dumps(result) if result else None,
+                error,
+                now,
+                job_id,
+                file_index,
+            ),
+        )
+        cursor.execute(
+            """UPDATE upload_jobs SET Status = 'completed', Updated_At = ?
+                WHERE Job_Id = ? AND NOT EXISTS (
+                    SELECT 1 FROM upload_job_files
+                     WHERE Job_Id = ? AND Status IN ('queued', 'processing'))""",
+            (now, job_id, job_id),
+        )
+
+    write(record_outcome, db_path)
+
+
+def renew_leases(db_path):
+    """
+    Extend the lease on every file this process is still processing.
+
+    Returns:
+        int: The number of leases renewed.
+    """
+    return write(
+        lambda conn: conn.execute(
+            """UPDATE upload_job_files SET Lease_Expires_At = ?
+                WHERE Status = 'processing' AND Claimed_By = ?""",
+            (_lease_expiry(), _owner),
+        ).rowcount,
+        db_path,
+    )
+
+
+def requeue_interrupted_files(db_path):
+    """
+    Put processing files whose lease has expired back in the queue.
+
+    A live lease means another process is still working on the file, so only
+    claims left behind by a stopped or crashed process are requeued.
+
+    Returns:
+        int: The number of files requeued.
+    """
+    now = _now()
+    return write(
+        lambda conn: conn.execute(
+            """UPDATE upload_job_files
+                  SET Status = 'queued', Claimed_By = NULL,
+                      Lease_Expires_At = NULL, Updated_At = ?
+                WHERE Status = 'processing'
+                  AND (Lease_Expires_At IS NULL OR Lease_Expires_At < ?)""",
+            (now, now),
+        ).rowcount,
+        db_path,
+    )
+
+
+def count_files(db_path, status):
+    """Return the number of queued files in a given status."""
+    with connection(db_path) as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM upload_job_files WHERE Status = ?", (status,)
+        ).fetchone()[0]
+
+
+def get_job(db_path, job_id):
+    """
+    Return a job with per-file progress and results, or None if it does not exist.
+    """
+    with connection(db_path) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            """SELECT Job_Id, Status, Total_Files, Created_At, Updated_At
+                 FROM upload_jobs WHERE Job_Id = ?""",
+            (job_id,),
+        )
+        job = cursor.fetchone()
+        if job is None:
+            return None
+        cursor.execute(
+            """SELECT File_Index, Filename, Status, Result_Json, Error
+                 FROM upload_job_files WHERE Job_Id = ? ORDER BY File_Index""",
+            (job_id,),
+        )
+        files = [
+            {
+                "index": row[0],
+                "filename": row[1],
+                "status": row[2],
+                "result": json.loads(row[3]) if row[3] else None,
+                "error": row[4],
+            }
+            for row in cursor.fetchall()
+        ]
+
+    return {
+        "job_id": job[0],
+        "status": job[1],
+        "total_files": job[2],
+        "completed_files": sum(1 for f in files if f["status"] == "completed"),
+        "failed_files": sum(1 for f in files if f["status"] == "failed"),
+        "created_at": job[3],
+        "updated_at": job[4],
+        "files": files,
+    }
+
+
+def _load_claimed(claimed_file):
+    return read_spooled(claimed_file[2])
+
+
+def _finish_claimed(db_path, claimed_file, result=None, error=None):
+    job_id, file_index, pdf_path, _ = claimed_file
+    finish_file(db_path, job_id, file_index, result=result, error=error)
+    RESUMES_PROCESSED.inc(status="failed" if error else "completed")
+    discard_spooled(pdf_path)
+
+
+def _process_claimed(claimed, model_id, prompt, db_path):
+    if LLM_BATCH_SIZE > 1:
+        with ingest_slot(len(claimed)):
+            results = process_pdfs_in_batches(
+                [_load_claimed(claimed_file) for claimed_file in claimed],
+                model_id,
+                db_path,
+            )
+        for claimed_file, result in zip(claimed, results):
+            if result:
+                _finish_claimed(db_path, claimed_file, result=result)
+            else:
+                _finish_claimed(db_path, claimed_file, error="Failed to process resume")
+        return
+
+    for claimed_file in claimed:
+        try:
+            with ingest_slot():
+                result = extract_and_store_resume(
+                    _load_claimed(claimed_file), model_id, prompt, db_path
+                )
+        except Exception as e:
+            print(f"Error processing resume: {e}")
+            _finish_claimed(db_path, claimed_file, error=str(e))
+        else:
+            _finish_claimed(db_path, claimed_file, result=result)
+
+
+def _worker_loop(db_path, model_id, prompt):
+    while not _stop_event.is_set():
+        try:
+            claimed = claim_files(db_path, limit=max(LLM_BATCH_SIZE, 1))
+        except sqlite3.Error as e:
+            print(f"SQLite error while claiming upload files: {e}")
+            claimed = []
+        if not claimed:
+            _work_available.wait(JOB_POLL_SECONDS)
+            _work_available.clear()
+            continue
+        try:
+            _process_claimed(claimed, model_id, prompt, db_path)
+        except Exception as e:
+            print(f"Error processing upload job files: {e}")
+            for claimed_file in claimed:
+                _finish_claimed(db_path, claimed_file, error=str(e))
+
+
+def _requeue_expired(db_path):
+    requeued = requeue_interrupted_files(db_path)
+    if requeued:
+        print(f"Requeued {requeued} interrupted upload file(s)")
+        _work_available.set()
+
+
+def _lease_loop(db_path):
+    # Renew well inside the lease so a slow write never lets a live claim lapse
+    while not _stop_event.wait(UPLOAD_JOB_LEASE_SECONDS / 3):
+        try:
+            renew_leases(db_path)
+            _requeue_expired(db_path)
+        except sqlite3.Error as e:
+            print(f"SQLite error while renewing upload file leases: {e}")
+
+
+def start_job_workers(db_path, model_id, prompt, workers=UPLOAD_JOB_WORKERS):
+    """
+    Start background threads that drain the upload queue.
+
+    Files whose lease expired (their process stopped) are queued again first. A
+    heartbeat thread keeps this process's leases alive and keeps requeueing claims
+    that other processes abandon, so several server processes can share the queue.
+    """
+    _requeue_expired(db_path)
+    _stop_event.clear()
+    for status in ("queued", "processing"):
+        UPLOAD_QUEUE_FILES.set_function(
+            lambda status=status: count_files(db_path, status), status=status
+        )
+    for i in range(workers):
+        worker = threading.Thread(
+            target=_worker_loop,
+            args=(db_path, model_id, prompt),
+            name=f"upload-job-worker-{i}",
+            daemon=True,
+        )
+        worker.start()
+        _workers.append(worker)
+    heartbeat = threading.Thread(
+        target=_lease_loop, args=(db_path,), name="upload-job-lease", daemon=True
+    )
+    heartbeat.start()
+    _workers.append(heartbeat)
+
+
+def stop_job_workers():
+    """
+    Ask the background workers to stop and wait briefly for them.
+
+    Files still being processed afterwards are requeued once their lease expires.
+    """
+    _stop_event.set()
+    _work_available.set()
+    for worker in _workers:
+        worker.join(JOB_SHUTDOWN_TIMEOUT_SECONDS)
+    _workers.clear()
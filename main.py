@@ -1,13 +1,39 @@
-from fastapi import FastAPI, HTTPException, UploadFile, File, Query
+from fastapi import FastAPI, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from pydantic import ValidationError
 import os
+import threading
+import time
 from dotenv import load_dotenv
 from typing import List
 from datetime import datetime
-from matcher import match_profiles_with_job_description
+from matcher import (
+    CROSS_ENCODER_RERANK,
+    match_profiles_with_job_description,
+    match_profiles_with_job_descriptions,
+)
+from model import get_cross_encoder, get_embedding_model
+from vector_index import get_index, save_index
+from pdf_extraction import shutdown_ocr_pool
+from database import close_database
+from extraction_cache import get_cache_stats
+from query_cache import get_query_cache_stats
+from metrics import (
+    CONTENT_TYPE,
+    HTTP_REQUEST_SECONDS,
+    SERVER_TIMING_ENABLED,
+    render_metrics,
+    server_timing_header,
+    start_request_timings,
+    timed,
+)
+from jobs import enqueue_upload_job, get_job, start_job_workers, stop_job_workers
+from upload_spool import check_upload_size, discard_spooled, spool_uploads
 from utils import (
     get_available_profiles,
-    process_multiple_pdfs,
+    iter_process_spooled_pdfs,
     save_profiles_to_db,
     update_profile_availability,
 )
@@ -15,12 +41,17 @@ from prompt import RESUME_EXTRACTION_PROMPT_INPUT, EMAIL_TEMPLATE
 from response_models import (
     AvailabilityRequest,
     AvailabilityResponse,
+    BatchJobDescriptionRequest,
+    BatchListOfProfile,
+    CacheStatsResponse,
     JobDescriptionRequest,
     ListOfInterestedProfiles,
     ListOfProfile,
     ProfileResponse,
-    ResumeExtractionResponse,
-    UploadFilesResponse,
+    ReadinessResponse,
+    UploadFileResult,
+    UploadJobResponse,
+    UploadJobStatusResponse,
 )
 from typing import List, Optional
 
@@ -39,22 +70,143 @@ app.add_middleware(
 
 DB_PATH = os.getenv("DB_PATH")
 MODEL_ID = os.getenv("MODEL_ID")
+# Job descriptions accepted by one /top-matches/batch request
+TOP_MATCHES_BATCH_MAX = int(os.getenv("TOP_MATCHES_BATCH_MAX", "100"))
+
+
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    timings = start_request_timings() if SERVER_TIMING_ENABLED else None
+    start = time.perf_counter()
+    response = await call_next(request)
+    elapsed = time.perf_counter() - start
+    # Label by route template so path parameters do not create new series
+    route = request.scope.get("route")
+    HTTP_REQUEST_SECONDS.observe(
+        elapsed,
+        method=request.method,
+        route=route.path if route is not None else "unmatched",
+        status=response.status_code,
+    )
+    if timings is not None:
+        response.headers["Server-Timing"] = server_timing_header(timings, elapsed)
+    return response
+
+_readiness = {"embedding_model": False, "matching_index": False}
+if CROSS_ENCODER_RERANK:
+    _readiness["cross_encoder"] = False
+_warm_up_error = None
+
+
+def _warm_up():
+    # Load the embedding model, then the matching index (and the persisted ANN
+    # graph, if enabled), so the first /top-matches does not pay for either
+    global _warm_up_error
+    try:
+        get_embedding_model().encode(["warm-up"])
+        _readiness["embedding_model"] = True
+        get_index()
+        _readiness["matching_index"] = True
+        if CROSS_ENCODER_RERANK:
+            # Loading it inside a request would always miss the rerank deadline
+            get_cross_encoder().predict([("warm-up", "warm-up")])
+            _readiness["cross_encoder"] = True
+    except Exception as e:
+        print(f"Error warming up: {e}")
+        _warm_up_error = str(e)
+
+
+@app.on_event("startup")
+def start_warm_up():
+    # Runs in the background so the worker accepts requests straight away;
+    # requests that arrive first load what they need on demand
+    threading.Thread(target=_warm_up, name="warm-up", daemon=True).start()
+
+
+@app.on_event("startup")
+def start_upload_workers():
+    # Background workers drain the persistent upload queue
+    start_job_workers(DB_PATH, MODEL_ID, RESUME_EXTRACTION_PROMPT_INPUT)
+
+
+@app.on_event("shutdown")
+def persist_index():
+    stop_job_workers()
+    try:
+        save_index()
+    except Exception as e:
+        print(f"Error saving matching index: {e}")
+    shutdown_ocr_pool()
+    close_database()
 
 
 # Endpoints
 
 
-@app.post("/upload", response_model=UploadFilesResponse)
-async def upload_files(files: List[UploadFile] = File(...)):
-    pdf_bytes_list = [await file.read() for file in files]
-    model_id = MODEL_ID
-    results = process_multiple_pdfs(
-        pdf_bytes_list, model_id, RESUME_EXTRACTION_PROMPT_INPUT, DB_PATH
+@app.post("/upload", response_model=UploadJobResponse)
+async def upload_files(request: Request, files: List[UploadFile] = File(...)):
+    check_upload_size(request.headers.get("content-length"))
+    # Spool the files to disk, queue them for the background workers and return
+    spooled_files = await spool_uploads(files)
+    try:
+        job_id = await run_in_threadpool(enqueue_upload_job, DB_PATH, spooled_files)
+    except Exception:
+        for _, path, _ in spooled_files:
+            discard_spooled(path)
+        raise
+    return UploadJobResponse(job_id=job_id, status="queued", total_files=len(files))
+
+
+def _stream_upload_records(spooled_files, stream_format):
+    for record in iter_process_spooled_pdfs(
+        spooled_files, MODEL_ID, RESUME_EXTRACTION_PROMPT_INPUT, DB_PATH
+    ):
+        try:
+            payload = UploadFileResult(**record).json()
+        except ValidationError as e:
+            payload = UploadFileResult(
+                index=record["index"],
+                filename=record["filename"],
+                status="failed",
+                error=f"Invalid extraction result: {e}",
+            ).json()
+        if stream_format == "sse":
+            yield f"event: result\ndata: {payload}\n\n"
+        else:
+            yield payload + "\n"
+
+
+@app.post("/upload/stream")
+async def upload_files_stream(
+    request: Request,
+    files: List[UploadFile] = File(...),
+    format: str = Query("ndjson", regex="^(ndjson|sse)$"),
+):
+    check_upload_size(request.headers.get("content-length"))
+    spooled_files = await spool_uploads(files)
+    # Each file's record is sent as soon as it is processed
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_upload_records(spooled_files, format), media_type=media_type
     )
-    response = UploadFilesResponse(
-        results=[ResumeExtractionResponse(**result) for result in results]
+
+
+@app.get("/ready", response_model=ReadinessResponse)
+async def ready(response: Response):
+    is_ready = all(_readiness.values())
+    if not is_ready:
+        response.status_code = 503
+    return ReadinessResponse(
+        ready=is_ready, components=dict(_readiness), error=_warm_up_error
     )
-    return response
+
+
+@app.get("/jobs/{job_id}", response_model=UploadJobStatusResponse)
+async def get_upload_job(job_id: str):
+    job = await run_in_threadpool(get_job, DB_PATH, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return UploadJobStatusResponse(**job)
 
 
 @app.post("/top-matches", response_model=ListOfProfile)
@@ -65,11 +217,23 @@ async def find_top_matches(job_description_request: JobDescriptionRequest):
         raise HTTPException(status_code=400, detail="Job description cannot be empty")
 
     try:
-        top_profiles = match_profiles_with_job_description(job_description)
+        top_profiles = match_profiles_with_job_description(
+            job_description,
+            min_years_experience=job_description_request.min_years_experience,
+            max_years_experience=job_description_request.max_years_experience,
+            exclude_organizations=job_description_request.exclude_organizations,
+            retrieval_mode=job_description_request.retrieval_mode,
+            rerank=job_description_request.rerank,
+        )
     except Exception as e:
         print(f"Error in match_profiles_with_job_description: {e}")
         raise HTTPException(status_code=500, detail="Internal Server Error")
     
+    return _save_shortlist(job_description, top_profiles)
+
+
+def _save_shortlist(job_description, top_profiles):
+    # Store the ranked profiles as a new search and build its response
     formatted_profiles = [
         {
             "rank": i + 1,
@@ -86,16 +250,58 @@ async def find_top_matches(job_description_request: JobDescriptionRequest):
         for i, (profile, relevance_score) in enumerate(top_profiles)
     ]
 
-    save_profiles_to_db(formatted_profiles)
+    with timed("save_shortlist"):
+        search_id = save_profiles_to_db(formatted_profiles, job_description)
+    if search_id is None:
+        raise HTTPException(status_code=500, detail="Failed to save shortlist")
 
     return ListOfProfile(
+        search_id=search_id,
         top_matches=[ProfileResponse(**profile) for profile in formatted_profiles]
     )
 
 
+@app.post("/top-matches/batch", response_model=BatchListOfProfile)
+async def find_top_matches_batch(batch_request: BatchJobDescriptionRequest):
+    job_descriptions = batch_request.job_descriptions
+
+    if not job_descriptions or not all(job_descriptions):
+        raise HTTPException(status_code=400, detail="Job descriptions cannot be empty")
+    if len(job_descriptions) > TOP_MATCHES_BATCH_MAX:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {TOP_MATCHES_BATCH_MAX} job descriptions per request",
+        )
+
+    # Scoring and the shortlist writes block, so they run off the event loop
+    try:
+        rankings = await run_in_threadpool(
+            match_profiles_with_job_descriptions,
+            job_descriptions,
+            min_years_experience=batch_request.min_years_experience,
+            max_years_experience=batch_request.max_years_experience,
+            exclude_organizations=batch_request.exclude_organizations,
+            retrieval_mode=batch_request.retrieval_mode,
+            deduplicate=batch_request.deduplicate,
+        )
+    except Exception as e:
+        print(f"Error in match_profiles_with_job_descriptions: {e}")
+        raise HTTPException(status_code=500, detail="Internal Server Error")
+
+    # Each job description gets its own search_id, as with /top-matches
+    results = await run_in_threadpool(
+        lambda: [
+            _save_shortlist(job_description, top_profiles)
+            for job_description, top_profiles in zip(job_descriptions, rankings)
+        ]
+    )
+    return BatchListOfProfile(results=results)
+
+
 @app.post("/update-availability")
 async def update_availability(availability_request: AvailabilityRequest):
     update_profile_availability(
+        availability_request.search_id,
         availability_request.email,
         availability_request.interested,
         availability_request.interview_time,
@@ -104,10 +310,20 @@ async def update_availability(availability_request: AvailabilityRequest):
 
 
 @app.get("/available-candidates", response_model=ListOfInterestedProfiles)
-async def get_available_candidates():
-    available_profiles = get_available_profiles()
+async def get_available_candidates(search_id: str):
+    available_profiles = get_available_profiles(search_id)
     return ListOfInterestedProfiles(interested_profiles=available_profiles)
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # Prometheus text format; each uvicorn worker reports its own process
+    return PlainTextResponse(render_metrics(), media_type=CONTENT_TYPE)
+
+
+@app.get("/cache-stats", response_model=CacheStatsResponse)
+async def cache_stats():
+    return CacheStatsResponse(**get_cache_stats(), **get_query_cache_stats())
+
 from pydantic import BaseModel
 class sendMail(BaseModel):
     to_email_c :str
@@ -130,9 +346,9 @@ def send_email(to_email_c, email_subject, body, to_email_r="recruiter@example.co
 
 
 @app.get("/send-interview-invitations",response_model=ListOfEmails)
-async def send_interview_invitations():
+async def send_interview_invitations(search_id: str):
     subject = "Technical Interview"
-    available_profiles = get_available_profiles()
+    available_profiles = get_available_profiles(search_id)
     email_responses = []
 
     for profile in available_profiles:
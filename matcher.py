@@ -1,45 +1,506 @@
-from utils import get_profiles
-from model import embed_texts, calculate_similarity
+import os
+import sqlite3
+import time
 import numpy as np
+from dotenv import load_dotenv
+from embedding_store import build_profile_text
+from metrics import Counter, timed
+from model import EMBEDDING_MODEL_ID, embed_texts, get_cross_encoder
+from query_cache import normalize_query, query_embedding_cache, top_matches_cache
+from skill_index import search_skills
+from vector_index import get_index, index_version
 
+# Load environment variables
+load_dotenv()
 
-def match_profiles_with_job_description(job_description):
+# Global variables
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+HYBRID_SHORTLIST_SIZE = int(os.getenv("HYBRID_SHORTLIST_SIZE", "200"))
+RRF_K = 60
+TOP_K = 10
+# Rescore the first-stage results with a cross-encoder
+CROSS_ENCODER_RERANK = os.getenv("CROSS_ENCODER_RERANK", "false").lower() == "true"
+# Profiles retrieved by the first stage for the cross-encoder to rescore
+CROSS_ENCODER_CANDIDATES = int(os.getenv("CROSS_ENCODER_CANDIDATES", "50"))
+CROSS_ENCODER_BATCH_SIZE = int(os.getenv("CROSS_ENCODER_BATCH_SIZE", "16"))
+# Budget for a whole match, first stage included; past it the first-stage order is kept
+CROSS_ENCODER_DEADLINE_MS = float(os.getenv("CROSS_ENCODER_DEADLINE_MS", "250"))
+
+RERANK_OUTCOMES = Counter(
+    "resume_matcher_rerank_total",
+    "Cross-encoder reranks by outcome (completed, deadline_exceeded or error).",
+    ("outcome",),
+)
+
+
+def reciprocal_rank_fusion(rankings, k=RRF_K):
+    """
+    Fuse several rankings with reciprocal rank fusion.
+
+    Args:
+        rankings (list of list): Each ranking is a list of keys, best first.
+        k (int): RRF damping constant.
+
+    Returns:
+        dict: key -> fused score (higher is better).
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, key in enumerate(ranking):
+            scores[key] = scores.get(key, 0.0) + 1.0 / (k + rank + 1)
+    return scores
+
+
+def embed_job_description(job_description):
+    """
+    Embed a job description, reusing the cached vector for the same normalized text.
+    """
+    key = (EMBEDDING_MODEL_ID, normalize_query(job_description))
+    embedding = query_embedding_cache.get(key)
+    if embedding is None:
+        embedding = embed_texts([job_description])[0]
+        query_embedding_cache.put(key, embedding)
+    return embedding
+
+
+def embed_job_descriptions(job_descriptions):
+    """
+    Embed several job descriptions, encoding every uncached one in a single batch.
+
+    Returns:
+        list: One embedding per job description.
+    """
+    keys = [(EMBEDDING_MODEL_ID, normalize_query(jd)) for jd in job_descriptions]
+    embeddings = [query_embedding_cache.get(key) for key in keys]
+    missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+    if missing:
+        encoded = embed_texts([job_descriptions[i] for i in missing])
+        if encoded is None:
+            raise RuntimeError("Failed to embed job descriptions")
+        for i, embedding in zip(missing, encoded):
+            embeddings[i] = embedding
+            query_embedding_cache.put(keys[i], embedding)
+    return embeddings
+
+
+def _lexical_shortlist(index, job_description, rows, filters):
+    """
+    Return the BM25 shortlist over Skills as (email, row) pairs, restricted to
+    the filtered rows, or None if the skill index is unavailable.
+    """
+    try:
+        with timed("lexical_search"):
+            lexical_emails = search_skills(
+                job_description, limit=HYBRID_SHORTLIST_SIZE, **filters
+            )
+    except sqlite3.Error as e:
+        print(f"Skill index unavailable, using semantic search: {e}")
+        return None
+
+    allowed = None if rows is None else set(rows.tolist())
+    shortlist = []
+    for email in lexical_emails:
+        row = index.row_of(email)
+        if row is not None and (allowed is None or row in allowed):
+            shortlist.append((email, row))
+    return shortlist
+
+
+def _fuse(shortlist, semantic, k):
+    """
+    Fuse the BM25 shortlist with its semantic ranking (plus any top-up) using
+    reciprocal rank fusion, scaled so ranking first in both scores 1.0.
+    """
+    profiles = {profile[1]: profile for profile, _ in semantic}
+    fused = reciprocal_rank_fusion(
+        [
+            [email for email, _ in shortlist],
+            [profile[1] for profile, _ in semantic],
+        ]
+    )
+    ranked = sorted(profiles, key=lambda email: fused[email], reverse=True)
+    best = 2.0 / (RRF_K + 1)
+    return [(profiles[email], fused[email] / best) for email in ranked[:k]]
+
+
+def _top_up(semantic, shortlist, search_results):
+    # Semantic results outside the shortlist fill it up to k profiles
+    shortlisted = {email for email, _ in shortlist}
+    return semantic + [
+        result for result in search_results if result[0][1] not in shortlisted
+    ]
+
+
+def _hybrid_search(
+    index, job_description, job_description_embedding, rows, filters, k=TOP_K
+):
+    """
+    BM25 over Skills picks a shortlist, which is scored semantically and fused
+    with the lexical ranking. Only the shortlist is scored unless it has fewer
+    than k profiles, in which case a full semantic search tops it up.
+
+    The structured filters are applied inside the BM25 query, so the
+    shortlist is filled with profiles that pass them. Scores are the fused
+    RRF scores, scaled so a profile ranked first by both BM25 and the
+    embeddings scores 1.0; they follow the returned order, unlike the cosine
+    similarities they are fused from.
+    """
+    shortlist = _lexical_shortlist(index, job_description, rows, filters)
+    if shortlist is None:
+        with timed("similarity"):
+            return index.search(job_description_embedding, k=k, rows=rows)
+
+    with timed("similarity"):
+        semantic = index.search(
+            job_description_embedding,
+            k=len(shortlist),
+            rows=np.asarray([row for _, row in shortlist], dtype=np.int64),
+        )
+        if len(shortlist) < k:
+            semantic = _top_up(
+                semantic,
+                shortlist,
+                index.search(job_description_embedding, k=k, rows=rows),
+            )
+    return _fuse(shortlist, semantic, k)
+
+
+def _hybrid_search_batch(index, job_descriptions, embeddings, rows, filters, k):
+    """
+    Hybrid search for several job descriptions with blocked matrix products.
+
+    Every job description's BM25 shortlist is looked up as in _hybrid_search.
+    One search_batch over the union of the shortlists then scores every
+    shortlisted profile for every job description, and one more over the
+    filtered profiles tops up the job descriptions with short shortlists, so
+    the rankings are the ones _hybrid_search returns and can share its cache.
+    """
+    shortlists = [
+        _lexical_shortlist(index, job_description, rows, filters)
+        for job_description in job_descriptions
+    ]
+    candidate_rows = np.unique(
+        np.asarray(
+            [row for shortlist in shortlists if shortlist for _, row in shortlist],
+            dtype=np.int64,
+        )
+    )
+    with timed("similarity"):
+        semantic = [[] for _ in job_descriptions]
+        if len(candidate_rows):
+            scored = index.search_batch(
+                embeddings, k=len(candidate_rows), rows=candidate_rows
+            )
+            for i, (shortlist, ranking) in enumerate(zip(shortlists, scored)):
+                if shortlist:
+                    shortlisted = {email for email, _ in shortlist}
+                    semantic[i] = [
+                        result for result in ranking if result[0][1] in shortlisted
+                    ]
+        short = [
+            i
+            for i, shortlist in enumerate(shortlists)
+            if shortlist is None or len(shortlist) < k
+        ]
+        if short:
+            searched = index.search_batch(embeddings[short], k=k, rows=rows)
+            for i, results in zip(short, searched):
+                if shortlists[i] is None:
+                    semantic[i] = results
+                else:
+                    semantic[i] = _top_up(semantic[i], shortlists[i], results)
+    return [
+        semantic[i] if shortlist is None else _fuse(shortlist, semantic[i], k)
+        for i, shortlist in enumerate(shortlists)
+    ]
+
+
+def rerank_with_cross_encoder(job_description, results, deadline, k=TOP_K):
+    """
+    Rescore first-stage results with the cross-encoder and keep the k best.
+
+    Pairs are scored CROSS_ENCODER_BATCH_SIZE at a time. A batch is only
+    started if the slowest batch so far would still finish before the
+    deadline; otherwise reranking stops and the first-stage order is kept.
+
+    Args:
+        job_description (str): The job description text.
+        results (list): (profile, score) tuples from the first stage, best first.
+        deadline (float): time.perf_counter() value reranking must finish by.
+        k (int): Number of results to return.
+
+    Returns:
+        tuple: (results, outcome) where outcome is "completed",
+               "deadline_exceeded" or "error".
+    """
+    try:
+        cross_encoder = get_cross_encoder()
+        pairs = [
+            (job_description, build_profile_text(*profile[3:]))
+            for profile, _ in results
+        ]
+        scores = []
+        slowest = 0.0
+        with timed("rerank"):
+            for start in range(0, len(pairs), CROSS_ENCODER_BATCH_SIZE):
+                batch_start = time.perf_counter()
+                if batch_start + slowest > deadline:
+                    return results[:k], "deadline_exceeded"
+                batch = pairs[start : start + CROSS_ENCODER_BATCH_SIZE]
+                scores.extend(
+                    cross_encoder.predict(batch, batch_size=CROSS_ENCODER_BATCH_SIZE)
+                )
+                slowest = max(slowest, time.perf_counter() - batch_start)
+    except Exception as e:
+        print(f"Error reranking with cross-encoder: {e}")
+        return results[:k], "error"
+
+    order = sorted(range(len(results)), key=lambda i: scores[i], reverse=True)
+    return [(results[i][0], float(scores[i])) for i in order[:k]], "completed"
+
+
+def match_profiles_with_job_description(
+    job_description,
+    min_years_experience=None,
+    max_years_experience=None,
+    exclude_organizations=None,
+    retrieval_mode=None,
+    rerank=None,
+):
     """
     Match job description with profiles based on cosine similarity of embeddings.
 
+    Structured filters are applied before scoring, so only the surviving
+    profiles are compared with the job description. In "hybrid" mode a BM25
+    shortlist over Skills is fused with the embedding scores using reciprocal
+    rank fusion and the fused score is returned; "semantic" mode scores every
+    surviving profile by cosine similarity.
+
+    With reranking, the first stage retrieves CROSS_ENCODER_CANDIDATES
+    profiles and a cross-encoder rescores them, unless that would take the
+    match past CROSS_ENCODER_DEADLINE_MS, in which case the first-stage top
+    results are returned.
+
+    Rankings are cached per normalized job description, filters and mode
+    until the index changes.
+
     Args:
         job_description (str): The job description text.
+        min_years_experience (int, optional): Minimum years of experience.
+        max_years_experience (int, optional): Maximum years of experience.
+        exclude_organizations (list of str, optional): Current organizations to exclude.
+        retrieval_mode (str, optional): "hybrid" or "semantic". Defaults to RETRIEVAL_MODE.
+        rerank (bool, optional): Rerank with the cross-encoder. Defaults to
+            CROSS_ENCODER_RERANK.
 
     Returns:
         list: A list of tuples containing top profiles and their similarity scores.
               Each tuple contains (profile, similarity_score).
     """
+    deadline = time.perf_counter() + CROSS_ENCODER_DEADLINE_MS / 1000
     try:
-        # Retrieve profiles
-        profiles = get_profiles()
+        # Process-resident matrix of normalized profile embeddings
+        with timed("index_load"):
+            index = get_index()
+        if len(index) == 0:
+            return []
 
-        # Combine profile fields into a single string for each profile
-        profile_texts = [
-            " ".join([profile[3], str(profile[4]), profile[5]]) for profile in profiles
-        ]
+        retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+        rerank = CROSS_ENCODER_RERANK if rerank is None else rerank
+        # Read the version first so a concurrent upsert cannot be cached as current
+        cache_key = (
+            index_version(),
+            normalize_query(job_description),
+            min_years_experience,
+            max_years_experience,
+            tuple(sorted(exclude_organizations or [])),
+            retrieval_mode,
+            rerank,
+        )
+        cached = top_matches_cache.get(cache_key)
+        if cached is not None:
+            return list(cached)
 
-        # Embed the job description and profiles
-        job_description_embedding = embed_texts([job_description])[0]
-        profile_embeddings = embed_texts(profile_texts)
+        # Evaluate structured filters first so only surviving rows are scored
+        filters = {
+            "min_years_experience": min_years_experience,
+            "max_years_experience": max_years_experience,
+            "exclude_organizations": exclude_organizations,
+        }
+        with timed("filter"):
+            rows = index.filter_rows(**filters)
+        if rows is not None and len(rows) == 0:
+            return []
 
-        # Calculate cosine similarity between job description and profiles
-        similarities = calculate_similarity(
-            job_description_embedding, profile_embeddings
-        )
+        # Only the job description is embedded at query time
+        job_description_embedding = embed_job_description(job_description)
 
-        # Get the top 10 profiles with the highest similarity scores
-        top_indices = np.argsort(similarities)[-10:][::-1]
-        top_profiles = [
-            (profiles[i], float(similarities[i])) for i in top_indices
-        ]  # Convert numpy.float32 to Python float
+        depth = max(CROSS_ENCODER_CANDIDATES, TOP_K) if rerank else TOP_K
+        if retrieval_mode == "hybrid":
+            results = _hybrid_search(
+                index,
+                job_description,
+                job_description_embedding,
+                rows,
+                filters,
+                k=depth,
+            )
+        else:
+            # One matrix-vector product plus argpartition for the top profiles
+            with timed("similarity"):
+                results = index.search(job_description_embedding, k=depth, rows=rows)
 
-        return top_profiles
+        if rerank:
+            results, outcome = rerank_with_cross_encoder(
+                job_description, results, deadline
+            )
+            RERANK_OUTCOMES.inc(outcome=outcome)
+            if outcome != "completed":
+                # A fallback ranking is not cached, so the next request retries
+                return results
+
+        top_matches_cache.put(cache_key, tuple(results))
+        return results
 
     except Exception as e:
         print(f"Error matching profiles with job description: {e}")
         return []
+
+
+def deduplicate_across_job_descriptions(rankings, k=TOP_K):
+    """
+    Shortlist each candidate for at most one job description.
+
+    Candidates are assigned greedily from the highest score down, each to the
+    job description it scores best for that still has room, so a strong
+    candidate lands on their best-fitting requisition instead of on all of
+    them. Every shortlist keeps the order of its own ranking.
+
+    Args:
+        rankings (list of list): (profile, score) tuples per job description,
+            best first. Each should hold at least k * len(rankings) candidates
+            so every job description can still fill k places.
+        k (int): Shortlist size per job description.
+
+    Returns:
+        list of list: At most k (profile, score) tuples per job description.
+    """
+    candidates = sorted(
+        (
+            (-score, i, rank, profile)
+            for i, ranking in enumerate(rankings)
+            for rank, (profile, score) in enumerate(ranking)
+        ),
+        key=lambda candidate: candidate[:3],
+    )
+    assigned = set()
+    shortlists = [[] for _ in rankings]
+    for negative_score, i, rank, profile in candidates:
+        if profile[1] in assigned or len(shortlists[i]) >= k:
+            continue
+        assigned.add(profile[1])
+        shortlists[i].append((rank, profile, -negative_score))
+    # Restore each job description's own ranking order
+    return [
+        [(profile, score) for _, profile, score in sorted(shortlist)]
+        for shortlist in shortlists
+    ]
+
+
+def match_profiles_with_job_descriptions(
+    job_descriptions,
+    min_years_experience=None,
+    max_years_experience=None,
+    exclude_organizations=None,
+    retrieval_mode=None,
+    deduplicate=False,
+):
+    """
+    Match several job descriptions with profiles in one pass.
+
+    The structured filters are evaluated once, every uncached job description
+    is embedded in one batch and scored against the profiles with blocked
+    matrix products. "hybrid" mode fuses each job description's BM25 shortlist
+    with those scores as match_profiles_with_job_description does.
+    Rankings share the top-k cache with single searches.
+
+    Args:
+        job_descriptions (list of str): The job description texts.
+        min_years_experience (int, optional): Minimum years of experience.
+        max_years_experience (int, optional): Maximum years of experience.
+        exclude_organizations (list of str, optional): Current organizations to exclude.
+        retrieval_mode (str, optional): "hybrid" or "semantic". Defaults to RETRIEVAL_MODE.
+        deduplicate (bool): Shortlist each candidate for at most one job description.
+
+    Returns:
+        list: One list of (profile, similarity_score) tuples per job description.
+    """
+    try:
+        with timed("index_load"):
+            index = get_index()
+        if len(index) == 0:
+            return [[] for _ in job_descriptions]
+
+        retrieval_mode = retrieval_mode or RETRIEVAL_MODE
+        version = index_version()
+        cache_keys = [
+            (
+                version,
+                normalize_query(job_description),
+                min_years_experience,
+                max_years_experience,
+                tuple(sorted(exclude_organizations or [])),
+                retrieval_mode,
+                # Batch rankings are not reranked by the cross-encoder
+                False,
+            )
+            for job_description in job_descriptions
+        ]
+        results = [None] * len(job_descriptions)
+        if not deduplicate:
+            for i, cache_key in enumerate(cache_keys):
+                cached = top_matches_cache.get(cache_key)
+                if cached is not None:
+                    results[i] = list(cached)
+
+        pending = [i for i, result in enumerate(results) if result is None]
+        if pending:
+            filters = {
+                "min_years_experience": min_years_experience,
+                "max_years_experience": max_years_experience,
+                "exclude_organizations": exclude_organizations,
+            }
+            with timed("filter"):
+                rows = index.filter_rows(**filters)
+            # Deduplication needs enough candidates left for every job description
+            depth = TOP_K * len(job_descriptions) if deduplicate else TOP_K
+            if rows is not None and len(rows) == 0:
+                rankings = [[] for _ in pending]
+            else:
+                embeddings = np.vstack(
+                    embed_job_descriptions([job_descriptions[i] for i in pending])
+                )
+                if retrieval_mode == "hybrid":
+                    rankings = _hybrid_search_batch(
+                        index,
+                        [job_descriptions[i] for i in pending],
+                        embeddings,
+                        rows,
+                        filters,
+                        k=depth,
+                    )
+                else:
+                    with timed("similarity"):
+                        rankings = index.search_batch(embeddings, k=depth, rows=rows)
+            for i, ranking in zip(pending, rankings):
+                results[i] = ranking
+                if not deduplicate:
+                    top_matches_cache.put(cache_keys[i], tuple(ranking))
+
+        if deduplicate:
+            results = deduplicate_across_job_descriptions(results, TOP_K)
+        return results
+
+    except Exception as e:
+        print(f"Error matching profiles with job descriptions: {e}")
+        return [[] for _ in job_descriptions]
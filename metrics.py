@@ -0,0 +1,267 @@
+import bisect
+import contextvars
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+# Add a Server-Timing header with the stage durations of each request
+SERVER_TIMING_ENABLED = os.getenv("SERVER_TIMING_ENABLED", "false").lower() == "true"
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0,
+)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+_metrics = []
+_request_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric(ABC):
+    """
+    Base for metrics kept in this process and rendered by render_metrics().
+
+    Each metric holds one value per combination of label values, passed as
+    keyword arguments matching `labelnames`.
+    """
+
+    type_name = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        # Metrics without labels are reported as 0 before their first update
+        self._values = {} if self.labelnames else {(): self._initial_value()}
+        self._lock = threading.Lock()
+        _metrics.append(self)
+
+    def _initial_value(self):
+        return 0
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def _samples(self):
+        """Return (name suffix, label values, extra labels, value) tuples."""
+
+    def render(self):
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        for suffix, values, extra, value in self._samples():
+            labels = _format_labels(self.labelnames, values, extra)
+            lines.append(f"{self.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. errors or cache hits."""
+
+    type_name = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            return [("", key, (), value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """
+    Value that goes up and down, e.g. a queue depth.
+
+    set_function() registers a callable evaluated at scrape time instead.
+    """
+
+    type_name = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._functions = {}
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values.pop(key, None)
+            self._functions[key] = function
+
+    def _samples(self):
+        with self._lock:
+            samples = [("", key, (), value) for key, value in self._values.items()]
+            functions = list(self._functions.items())
+        for key, function in functions:
+            try:
+                samples.append(("", key, (), function()))
+            except Exception as e:
+                print(f"Error collecting metric {self.name}: {e}")
+        return samples
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (seconds by default) in fixed buckets."""
+
+    type_name = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.buckets = tuple(buckets) + (float("inf"),)
+        super().__init__(name, documentation, labelnames)
+
+    def _initial_value(self):
+        # One count per bucket followed by the running sum
+        return [0] * len(self.buckets) + [0.0]
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        position = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = self._initial_value()
+            counts[position] += 1
+            counts[-1] += value
+
+    def _samples(self):
+        with self._lock:
+            values = {key: list(counts) for key, counts in self._values.items()}
+        samples = []
+        for key, counts in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = (("le", _format_value(bound)),)
+                samples.append(("_bucket", key, le, cumulative))
+            samples.append(("_sum", key, (), counts[-1]))
+            samples.append(("_count", key, (), cumulative))
+        return samples
+
+
+STAGE_SECONDS = Histogram(
+    "resume_matcher_stage_seconds",
+    "Time spent in each ingestion and matching stage.",
+    ("stage",),
+)
+STAGE_ERRORS = Counter(
+    "resume_matcher_stage_errors_total",
+    "Stages that raised an error.",
+    ("stage",),
+)
+CACHE_REQUESTS = Counter(
+    "resume_matcher_cache_requests_total",
+    "Cache lookups by cache and result (hit or miss).",
+    ("cache", "result"),
+)
+HTTP_REQUEST_SECONDS = Histogram(
+    "resume_matcher_http_request_seconds",
+    "HTTP request latency by route.",
+    ("method", "route", "status"),
+)
+
+
+def observe_stage(stage, seconds):
+    """
+    Record the duration of a stage, and add it to the current request's
+    Server-Timing header when one is being collected.
+    """
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    timings = _request_timings.get()
+    if timings is not None:
+        timings.append((stage, seconds))
+
+
+@contextmanager
+def timed(stage):
+    """
+    Time the enclosed block as `stage`, counting it as an error if it raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        observe_stage(stage, time.perf_counter() - start)
+
+
+def record_cache(cache, hit):
+    """Count a cache lookup."""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def start_request_timings():
+    """
+    Start collecting stage timings for the current request.
+
+    Threadpool work started afterwards copies the context, so stages timed
+    there are collected too.
+
+    Returns:
+        list: The (stage, seconds) list filled in by observe_stage().
+    """
+    timings = []
+    _request_timings.set(timings)
+    return timings
+
+
+def server_timing_header(timings, total_seconds):
+    """
+    Format collected stage timings as a Server-Timing header value.
+
+    Repeated stages are summed and durations are in milliseconds.
+    """
+    totals = {}
+    for stage, seconds in timings:
+        totals[stage] = totals.get(stage, 0.0) + seconds
+    totals["total"] = total_seconds
+    return ", ".join(
+        f"{stage};dur={seconds * 1000:.1f}" for stage, seconds in totals.items()
+    )
+
+
+def render_metrics():
+    """
+    Render every metric of this process in the Prometheus text format.
+    """
+    return "\n".join(metric.render() for metric in list(_metrics)) + "\n"
@@ -1,36 +1,166 @@
 import os
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
-from ibm_watson_machine_learning.metanames import GenTextParamsMetaNames as GenParams
-from ibm_watson_machine_learning.foundation_models import Model
-from ibm_watson_machine_learning.foundation_models.utils.enums import DecodingMethods
+import re
+import sys
+import threading
+import time
+import requests
 from dotenv import load_dotenv
+from metrics import timed
 
 # Load environment variables
 load_dotenv()
 
-# Initialize SentenceTransformer model
+# SentenceTransformer model, loaded on first use (or by the startup warm-up)
 MODEL_NAME = "all-MiniLM-L6-v2"
-model = SentenceTransformer(MODEL_NAME)
+# Local directory holding the model files; loads without network access when set
+EMBEDDING_MODEL_PATH = os.getenv("EMBEDDING_MODEL_PATH")
+# Hugging Face cache directory the model is downloaded to / read from
+EMBEDDING_MODEL_CACHE_DIR = os.getenv("EMBEDDING_MODEL_CACHE_DIR")
+EMBEDDING_MODEL_OFFLINE = os.getenv("EMBEDDING_MODEL_OFFLINE", "false").lower() == "true"
+# "torch" (float32) or "torch-int8" (dynamically quantized Linear layers).
+# Switching re-embeds every profile; check the new backend's agreement with
+# float32 first with benchmarks/bench_embedding_backends.py
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "torch")
+EMBEDDING_BACKENDS = ("torch", "torch-int8")
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
+# Intra-op threads for embedding inference (0 keeps the torch default)
+EMBEDDING_THREADS = int(os.getenv("EMBEDDING_THREADS", "0"))
 
+# Cross-encoder that rescores the first-stage shortlist when reranking is on
+CROSS_ENCODER_MODEL = os.getenv(
+    "CROSS_ENCODER_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+)
+# Local directory holding the cross-encoder files
+CROSS_ENCODER_MODEL_PATH = os.getenv("CROSS_ENCODER_MODEL_PATH")
 
-def embed_texts(texts):
+_embedding_models = {}
+_embedding_model_lock = threading.Lock()
+_cross_encoder = None
+# Separate from the embedding lock so a slow cross-encoder load cannot hold up
+# embedding, and the other way round
+_cross_encoder_lock = threading.Lock()
+
+# Generation clients are rebuilt before the IAM token (60 minutes) expires
+WATSONX_CLIENT_TTL = int(os.getenv("WATSONX_CLIENT_TTL", "3000"))
+# Optional local server speaking the watsonx generation response format
+GENERATION_URL = os.getenv("GENERATION_URL")
+# Plain names of the watsonx GenTextParamsMetaNames, understood by both clients
+GENERATION_PARAMS = {"decoding_method": "greedy", "max_new_tokens": 1024}
+SDK_STATUS_CODE_PATTERN = re.compile(r"\bStatus code: (\d{3})\b")
+
+_client_pool = {}
+_client_pool_lock = threading.Lock()
+
+
+def embedding_model_id(backend=None):
+    """
+    Identify the vectors a backend produces.
+
+    Stored embeddings record this ID, so switching backend re-embeds profiles
+    instead of mixing float32 and int8 vectors in one index.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    return MODEL_NAME if backend == "torch" else f"{MODEL_NAME}:{backend}"
+
+
+# Model_Name recorded with stored embeddings for the configured backend
+EMBEDDING_MODEL_ID = embedding_model_id()
+
+
+def _load_embedding_model(backend):
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown EMBEDDING_BACKEND {backend!r}, expected one of {EMBEDDING_BACKENDS}"
+        )
+    if EMBEDDING_MODEL_OFFLINE or EMBEDDING_MODEL_PATH:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    from sentence_transformers import SentenceTransformer
+
+    if EMBEDDING_THREADS > 0:
+        import torch
+
+        torch.set_num_threads(EMBEDDING_THREADS)
+    model = SentenceTransformer(
+        EMBEDDING_MODEL_PATH or MODEL_NAME,
+        device="cpu" if backend == "torch-int8" else None,
+        cache_folder=EMBEDDING_MODEL_CACHE_DIR,
+    )
+    if backend == "torch-int8":
+        import torch
+
+        # Linear layers hold nearly all of MiniLM's weights and FLOPs
+        model = torch.quantization.quantize_dynamic(
+            model, {torch.nn.Linear}, dtype=torch.qint8
+        )
+    return model
+
+
+def get_embedding_model(backend=None):
+    """
+    Return the SentenceTransformer model for a backend, loading it on first use.
+
+    sentence_transformers (and torch) are only imported here, so importing
+    this module stays cheap. With EMBEDDING_MODEL_PATH the model is read from
+    that directory; with EMBEDDING_MODEL_OFFLINE the Hugging Face hub is not
+    contacted and the model must already be in EMBEDDING_MODEL_CACHE_DIR.
+
+    Args:
+        backend (str, optional): "torch" or "torch-int8". Defaults to EMBEDDING_BACKEND.
+    """
+    backend = backend or EMBEDDING_BACKEND
+    model = _embedding_models.get(backend)
+    if model is None:
+        with _embedding_model_lock:
+            model = _embedding_models.get(backend)
+            if model is None:
+                model = _load_embedding_model(backend)
+                _embedding_models[backend] = model
+    return model
+
+
+def embed_texts(texts, backend=None):
     """
     Embed a list of texts into vectors using the SentenceTransformer model.
 
     Args:
         texts (list of str): List of text strings to be embedded.
+        backend (str, optional): "torch" or "torch-int8". Defaults to EMBEDDING_BACKEND.
 
     Returns:
         numpy.ndarray: Array of embedded vectors.
     """
     try:
-        return model.encode(texts)
+        model = get_embedding_model(backend)
+        with timed("embed"):
+            return model.encode(texts, batch_size=EMBEDDING_BATCH_SIZE)
     except Exception as e:
         print(f"Error embedding texts: {e}")
         return None
 
 
+def get_cross_encoder():
+    """
+    Return the CrossEncoder used for reranking, loading it on first use.
+
+    With CROSS_ENCODER_MODEL_PATH the model is read from that directory;
+    otherwise CROSS_ENCODER_MODEL is loaded from the Hugging Face cache.
+    """
+    global _cross_encoder
+    if _cross_encoder is None:
+        with _cross_encoder_lock:
+            if _cross_encoder is None:
+                if EMBEDDING_MODEL_OFFLINE or CROSS_ENCODER_MODEL_PATH:
+                    os.environ.setdefault("HF_HUB_OFFLINE", "1")
+                    os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+                from sentence_transformers import CrossEncoder
+
+                _cross_encoder = CrossEncoder(
+                    CROSS_ENCODER_MODEL_PATH or CROSS_ENCODER_MODEL
+                )
+    return _cross_encoder
+
+
 def calculate_similarity(job_description_embedding, profile_embeddings):
     """
     Calculate cosine similarity between a job description embedding and a list of profile embeddings.
@@ -42,6 +172,8 @@ def calculate_similarity(job_description_embedding, profile_embeddings):
     Returns:
         numpy.ndarray: Array of cosine similarity scores.
     """
+    from sklearn.metrics.pairwise import cosine_similarity
+
     try:
         return cosine_similarity([job_description_embedding], profile_embeddings)[0]
     except Exception as e:
@@ -49,10 +181,77 @@ def calculate_similarity(job_description_embedding, profile_embeddings):
         return None
 
 
+class HttpGenerationClient:
+    """
+    Client for a generation server that mirrors the watsonx response format.
+
+    It fetches a bearer token from {url}/token when constructed and again
+    when the token expires, then posts prompts to {url}/generate.
+    """
+
+    def __init__(self, url, model_id, params):
+        self.url = url.rstrip("/")
+        self.model_id = model_id
+        self.params = dict(params)
+        self.session = requests.Session()
+        self._token = None
+        self._token_expires_at = 0.0
+        self._token_lock = threading.Lock()
+        self._refresh_token()
+
+    def _refresh_token(self):
+        response = self.session.post(f"{self.url}/token", timeout=30)
+        response.raise_for_status()
+        token = response.json()
+        self._token = token["access_token"]
+        self._token_expires_at = time.monotonic() + token.get("expires_in", 3600) - 60
+
+    def generate(self, prompt):
+        with self._token_lock:
+            if time.monotonic() >= self._token_expires_at:
+                self._refresh_token()
+            token = self._token
+        response = self.session.post(
+            f"{self.url}/generate",
+            json={
+                "model_id": self.model_id,
+                "input": prompt,
+                "parameters": self.params,
+            },
+            headers={"Authorization": f"Bearer {token}"},
+            timeout=300,
+        )
+        response.raise_for_status()
+        return response.json()
+
+
+def status_code_of(error):
+    """
+    Best-effort HTTP status code of an exception raised by a generation client.
+
+    Returns:
+        int or None: The status code, if one can be found.
+    """
+    response = getattr(error, "response", None)
+    status_code = getattr(response, "status_code", None)
+    if status_code is not None:
+        return status_code
+    # The watsonx SDK only reports the status in the message of its own error
+    sdk_errors = sys.modules.get("ibm_watson_machine_learning.wml_client_error")
+    if sdk_errors is not None and isinstance(error, sdk_errors.WMLClientError):
+        match = SDK_STATUS_CODE_PATTERN.search(str(error))
+        if match:
+            return int(match.group(1))
+    return None
+
+
 def initialize_model(model_id):
     """
     Initialize the IBM Watson Foundation Model with the specified model ID.
 
+    If GENERATION_URL is set, an HttpGenerationClient for that server is
+    returned instead and the watsonx SDK is never imported.
+
     Args:
         model_id (str): The ID of the IBM Watson model.
 
@@ -60,13 +259,14 @@ def initialize_model(model_id):
         Model: Initialized IBM Watson Model instance.
     """
     try:
-        generate_params = {
-            GenParams.DECODING_METHOD: DecodingMethods.GREEDY,
-            GenParams.MAX_NEW_TOKENS: 1024,
-        }
+        if GENERATION_URL:
+            return HttpGenerationClient(GENERATION_URL, model_id, GENERATION_PARAMS)
+        # The watsonx SDK is slow to import, so it is only loaded with the first client
+        from ibm_watson_machine_learning.foundation_models import Model
+
         model = Model(
             model_id=model_id,
-            params=generate_params,
+            params=GENERATION_PARAMS,
             credentials={"apikey": os.getenv("GA_API_KEY"), "url": os.getenv("GA_URL")},
             project_id=os.getenv("GA_PROJECT_ID"),
         )
@@ -74,3 +274,56 @@ def initialize_model(model_id):
     except Exception as e:
         print(f"Error initializing model: {e}")
         return None
+
+
+def get_model_client(model_id):
+    """
+    Return the pooled generation client for a model ID.
+
+    Clients are shared by every thread in the process and rebuilt after
+    WATSONX_CLIENT_TTL seconds, so the IAM token fetch happens once per
+    model instead of once per resume.
+
+    Args:
+        model_id (str): The ID of the IBM Watson model.
+
+    Returns:
+        Model: The pooled client.
+    """
+    with _client_pool_lock:
+        entry = _client_pool.get(model_id)
+        if entry is None or time.monotonic() - entry[1] > WATSONX_CLIENT_TTL:
+            client = initialize_model(model_id)
+            if client is None:
+                raise RuntimeError(f"Failed to initialize model {model_id}")
+            entry = (client, time.monotonic())
+            _client_pool[model_id] = entry
+        return entry[0]
+
+
+def invalidate_model_client(model_id):
+    """Drop the pooled client for a model ID so the next call rebuilds it."""
+    with _client_pool_lock:
+        _client_pool.pop(model_id, None)
+
+
+def generate_text(model_id, prompt):
+    """
+    Generate text with the pooled client, rebuilding it once on auth errors.
+
+    Args:
+        model_id (str): The ID of the IBM Watson model.
+        prompt (str): The prompt to send.
+
+    Returns:
+        str: The generated text.
+    """
+    try:
+        response = get_model_client(model_id).generate(prompt=prompt)
+    except Exception as e:
+        if status_code_of(e) not in (401, 403):
+            raise
+        print(f"Generation auth error, refreshing client: {e}")
+        invalidate_model_client(model_id)
+        response = get_model_client(model_id).generate(prompt=prompt)
+    return response["results"][0]["generated_text"]
@@ -14,8 +14,9 @@ def post_job_description(job_description):
     return response.json()
 
 
-def update_availability(email, interested, interview_datetime=None):
+def update_availability(search_id, email, interested, interview_datetime=None):
     payload = {
+        "search_id": search_id,
         "email": email,
         "interested": interested,
         "interview_time": (
@@ -27,8 +28,10 @@ def update_availability(email, interested, interview_datetime=None):
     return response.json()
 
 
-def get_available_candidates():
-    response = requests.get(f"{FASTAPI_URL}/available-candidates")
+def get_available_candidates(search_id):
+    response = requests.get(
+        f"{FASTAPI_URL}/available-candidates", params={"search_id": search_id}
+    )
     response.raise_for_status()
     return response.json()
 
@@ -41,6 +44,7 @@ job_description = st.text_area("Job Description", "")
 if st.button("Find Top Matches"):
     with st.spinner("Finding top matches..."):
         top_matches = post_job_description(job_description)
+        st.session_state["search_id"] = top_matches["search_id"]
         st.session_state["top_matches"] = top_matches["top_matches"]
         st.success("Top matches found!")
 
@@ -88,14 +92,18 @@ if "top_matches" in st.session_state:
     if st.button("Update Availability"):
         with st.spinner("Updating availability..."):
             for email, interested, interview_datetime in availability_updates:
-                update_availability(email, interested, interview_datetime)
+                update_availability(
+                    st.session_state["search_id"], email, interested, interview_datetime
+                )
             st.success("Availability updated!")
 
     # Step 3: Display Available Candidates
     st.header("Step 3: Display Available Candidates")
     if st.button("Show Available Candidates"):
         with st.spinner("Retrieving available candidates..."):
-            available_candidates = get_available_candidates()
+            available_candidates = get_available_candidates(
+                st.session_state["search_id"]
+            )
             available_profiles_df = [
                 {
                     "Name": profile["name"],
@@ -0,0 +1,218 @@
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+import fitz
+import pytesseract
+from dotenv import load_dotenv
+from pdf2image import convert_from_bytes, pdfinfo_from_bytes
+from metrics import Gauge, observe_stage
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+TEXT_LAYER_MIN_CHARS = int(os.getenv("TEXT_LAYER_MIN_CHARS", "50"))
+TEXT_LAYER_MIN_QUALITY = float(os.getenv("TEXT_LAYER_MIN_QUALITY", "0.8"))
+OCR_DPI = int(os.getenv("OCR_DPI", "200"))
+OCR_GRAYSCALE = os.getenv("OCR_GRAYSCALE", "true").lower() == "true"
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(os.cpu_count() or 1)))
+
+CONVERT_FAILED_TEXT = "Failed to convert PDF to image"
+EXTRACT_FAILED_TEXT = "Failed to extract text"
+
+_ocr_pool = None
+_ocr_pool_lock = threading.Lock()
+
+OCR_PAGES_PENDING = Gauge(
+    "resume_matcher_ocr_pages_pending", "Pages queued or running in the OCR pool."
+)
+
+
+# Function to extract text from PDF
+def parse_pdf_with_tesseract(
+    pdf_bytes, page_number=0, dpi=OCR_DPI, grayscale=OCR_GRAYSCALE, timings=None
+) -> str:
+    # Seconds spent rendering and recognizing are stored in `timings` if given
+    timings = {} if timings is None else timings
+    try:
+        start = time.perf_counter()
+        # Render only the requested page so a single image is held at a time
+        images = convert_from_bytes(
+            pdf_bytes,
+            dpi=dpi,
+            grayscale=grayscale,
+            first_page=page_number + 1,
+            last_page=page_number + 1,
+        )
+        timings["pdf_render"] = time.perf_counter() - start
+        if not images:
+            return CONVERT_FAILED_TEXT
+        page_image = images[0]
+        start = time.perf_counter()
+        extracted_text = pytesseract.image_to_string(page_image)
+        timings["tesseract"] = time.perf_counter() - start
+        page_image.close()
+        return extracted_text
+    except Exception as e:
+        print(f"Error parsing PDF: {e}")
+        return EXTRACT_FAILED_TEXT
+
+
+def _ocr_page(pdf_bytes, page_number, dpi, grayscale):
+    # Runs in an OCR worker process; the timings are recorded by the caller
+    timings = {}
+    text = parse_pdf_with_tesseract(pdf_bytes, page_number, dpi, grayscale, timings)
+    return text, timings
+
+
+def _record_ocr_timings(stats, timings):
+    for stage, seconds in timings.items():
+        observe_stage(stage, seconds)
+        stats["ocr_seconds"] += seconds
+
+
+def _submit_ocr_page(pdf_bytes, page_number):
+    future = get_ocr_pool().submit(
+        _ocr_page, pdf_bytes, page_number, OCR_DPI, OCR_GRAYSCALE
+    )
+    OCR_PAGES_PENDING.inc()
+    future.add_done_callback(lambda _: OCR_PAGES_PENDING.dec())
+    return future
+
+
+def get_ocr_pool():
+    """
+    Return the process-wide OCR pool, creating it on first use.
+
+    Tesseract and PIL work is CPU-bound, so it runs in a dedicated pool of
+    OCR_MAX_WORKERS processes instead of the upload threads.
+    """
+    global _ocr_pool
+    if _ocr_pool is None:
+        with _ocr_pool_lock:
+            if _ocr_pool is None:
+                _ocr_pool = ProcessPoolExecutor(
+                    max_workers=OCR_MAX_WORKERS,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+    return _ocr_pool
+
+
+def shutdown_ocr_pool():
+    """Shut down the OCR pool if it was started."""
+    global _ocr_pool
+    with _ocr_pool_lock:
+        if _ocr_pool is not None:
+            _ocr_pool.shutdown(wait=True)
+            _ocr_pool = None
+
+
+def is_usable_text(text):
+    """
+    Decide whether an embedded text layer is worth using instead of OCR.
+
+    The layer is rejected if it is too short or if too few of its characters
+    are letters, digits, whitespace or common punctuation, which is what
+    broken font encodings and scanned PDFs with junk layers look like.
+
+    Args:
+        text (str): Text extracted from the PDF text layer.
+
+    Returns:
+        bool: True if the text should be used as-is.
+    """
+    stripped = text.strip()
+    if len(stripped) < TEXT_LAYER_MIN_CHARS:
+        return False
+    readable = sum(
+        1
+        for char in stripped
+        if char.isalnum() or char.isspace() or char in ".,;:()-+/@&'\"#%"
+    )
+    return readable / len(stripped) >= TEXT_LAYER_MIN_QUALITY
+
+
+def extract_text_from_pdf(pdf_bytes, max_pages=None):
+    """
+    Extract text from every page of a PDF, using the embedded text layer where possible.
+
+    Each page is read from its text layer first. Pages whose layer is empty or
+    garbage are sent to the OCR pool one page per task; the pages are rendered
+    at OCR_DPI inside the workers, so no page images are held in this process.
+    If PyMuPDF cannot open the file, every page is OCR'd.
+
+    Pages that fail to OCR are left out of the text and counted in
+    stats["failed_pages"], so callers can avoid caching an incomplete result.
+
+    Args:
+        pdf_bytes (bytes): The PDF file contents.
+        max_pages (int, optional): Maximum number of pages to read. Defaults to all.
+
+    Returns:
+        tuple: (text, stats) where stats records the page counts and seconds
+               spent on each path.
+
+    Raises:
+        ValueError: If the file cannot be read as a PDF or no page yields text.
+    """
+    stats = {
+        "pages": 0,
+        "text_layer_pages": 0,
+        "ocr_pages": 0,
+        "failed_pages": 0,
+        "text_layer_seconds": 0.0,
+        "ocr_seconds": 0.0,
+    }
+    page_texts = []
+
+    try:
+        document = fitz.open(stream=pdf_bytes, filetype="pdf")
+    except Exception as e:
+        print(f"Error opening PDF text layer, falling back to OCR: {e}")
+        document = None
+
+    if document is None:
+        try:
+            page_count = pdfinfo_from_bytes(pdf_bytes)["Pages"]
+        except Exception as e:
+            raise ValueError("File could not be read as a PDF") from e
+        page_count = min(page_count, max_pages or page_count)
+        stats["pages"] = stats["ocr_pages"] = page_count
+        page_texts = [
+            _submit_ocr_page(pdf_bytes, page_number)
+            for page_number in range(page_count)
+        ]
+    else:
+        with document:
+            page_count = min(document.page_count, max_pages or document.page_count)
+            stats["pages"] = page_count
+            for page_number in range(page_count):
+                start = time.perf_counter()
+                text = document.load_page(page_number).get_text("text")
+                seconds = time.perf_counter() - start
+                stats["text_layer_seconds"] += seconds
+                observe_stage("pdf_text_layer", seconds)
+
+                if is_usable_text(text):
+                    stats["text_layer_pages"] += 1
+                    page_texts.append(text)
+                else:
+                    stats["ocr_pages"] += 1
+                    page_texts.append(_submit_ocr_page(pdf_bytes, page_number))
+
+    # Collect OCR results in page order, leaving out pages that failed
+    texts = []
+    for page_text in page_texts:
+        if not isinstance(page_text, str):
+            page_text, timings = page_text.result()
+            _record_ocr_timings(stats, timings)
+            if page_text in (CONVERT_FAILED_TEXT, EXTRACT_FAILED_TEXT):
+                stats["failed_pages"] += 1
+                continue
+        texts.append(page_text)
+
+    if stats["pages"] and stats["failed_pages"] == stats["pages"]:
+        raise ValueError("No page of the PDF could be read")
+    return "\n".join(texts), stats
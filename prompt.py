@@ -25,6 +25,41 @@ Input: {text}
 Output:"""
 
 
+RESUME_BATCH_EXTRACTION_PROMPT_INPUT = """[INST] You are an information extraction assistant. For each resume below, extract the following information in JSON format:
+- Name: "name"
+- Email: "email"
+- Phone Number: "phone_number"
+- Current Organization: "current_organization"
+- Years of Experience: "years_experience" (round to nearest integer, 0 if not mentioned)
+- Skills: "skills"
+
+Ensure the "years_experience" field is an integer. If the resume mentions 2.5+ years of experience, round it up to 3. If the experience is not mentioned, set it to 0.
+
+Return a JSON array with one object per resume, in the same order as the resumes, and copy each resume's filename into its object. Use this syntax for your response:
+[
+    {{
+        "filename": "...",
+        "name": "...",
+        "email": "...",
+        "phone_number": "...",
+        "current_organization": "...",
+        "years_experience": ...,
+        "skills": "..."
+    }}
+]
+
+
+Input:
+{resumes}
+
+Output:"""
+
+
+RESUME_BATCH_ITEM = """### Resume (filename: {filename})
+{text}
+"""
+
+
 # Email Template
 EMAIL_TEMPLATE = """
 Hi {name},
@@ -0,0 +1,95 @@
+import os
+import re
+import threading
+import unicodedata
+from cachetools import TTLCache
+from dotenv import load_dotenv
+from metrics import record_cache
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+QUERY_CACHE_SIZE = int(os.getenv("QUERY_CACHE_SIZE", "1024"))
+QUERY_CACHE_TTL_SECONDS = float(os.getenv("QUERY_CACHE_TTL_SECONDS", "3600"))
+
+
+def normalize_query(text):
+    """
+    Normalize a job description for use as a cache key.
+
+    Unicode forms, case and runs of whitespace are folded, so re-pasted or
+    re-typed descriptions that only differ in these share an entry. Both the
+    embedding model and the skill index are case-insensitive, so this does not
+    change the results.
+
+    Args:
+        text (str): Job description text.
+
+    Returns:
+        str: The normalized text.
+    """
+    text = unicodedata.normalize("NFKC", text or "").casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class QueryCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a TTL, with hit and
+    miss counters.
+    """
+
+    def __init__(self, name, maxsize=QUERY_CACHE_SIZE, ttl=QUERY_CACHE_TTL_SECONDS):
+        self.name = name
+        self._cache = TTLCache(maxsize=max(maxsize, 1), ttl=ttl)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self._lock:
+            value = self._cache.get(key)
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        record_cache(self.name, value is not None)
+        return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._cache[key] = value
+
+    def clear(self):
+        with self._lock:
+            self._cache.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
+
+
+# Query embeddings only depend on the text and the embedding model
+query_embedding_cache = QueryCache("query_embedding")
+# Ranked top-k results are only valid for the index version they were computed on
+top_matches_cache = QueryCache("top_matches")
+
+
+def invalidate_top_matches():
+    """Drop every cached ranking; called whenever the resume index changes."""
+    top_matches_cache.clear()
+
+
+def get_query_cache_stats():
+    """
+    Return hit/miss counters and hit ratios for the query caches.
+    """
+    return {
+        "query_embedding": query_embedding_cache.stats(),
+        "top_matches": top_matches_cache.stats(),
+    }
@@ -0,0 +1,279 @@
+"""
+Re-embed every profile in the resumes table, e.g. after changing
+model.MODEL_NAME, EMBEDDING_BACKEND or embedding_store.build_profile_text.
+
+Usage:
+    python reindex.py [--workers 4] [--chunk-size 2048] [--stage-only] [--restart]
+
+New vectors go to a staging table, resume_embeddings_reindex, which the API
+never reads, so running servers keep answering from the old index. Profiles
+are read in Email order, --chunk-size rows at a time, embedded by a pool of
+worker processes and committed chunk by chunk. Staged vectors whose model and
+profile text are still current are skipped, so an interrupted run resumes
+where it stopped, and a second pass picks up profiles uploaded or edited
+during the first.
+
+Once a pass finds nothing left to embed, the staging table replaces
+resume_embeddings in one transaction and, with VECTOR_INDEX_SNAPSHOT_DIR set,
+a snapshot for the new model is published. If profiles are still changing
+after REINDEX_MAX_PASSES passes, the run exits non-zero without cutting over
+and keeps the staged vectors for the next run. Run the re-indexer with the
+configuration the new servers will use. Servers still on the old model would
+re-embed the swapped vectors with it when they next rebuild, so stage with
+--stage-only ahead of time and run the (then quick) cutover as part of the
+deploy.
+"""
+import argparse
+import multiprocessing
+import os
+import signal
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import numpy as np
+from dotenv import load_dotenv
+import model
+from database import close_database, connection, write
+from embedding_store import (
+    EMBEDDING_DTYPE,
+    EMBEDDINGS_COLUMNS,
+    build_profile_text,
+    profile_text_hash,
+    store_embeddings,
+)
+from index_snapshot import VECTOR_INDEX_SNAPSHOT_DIR
+from model import EMBEDDING_MODEL_ID, embed_texts
+from vector_index import publish_snapshot
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+DB_PATH = os.getenv("DB_PATH")
+# Profiles read from the database and embedded by one worker at a time
+REINDEX_CHUNK_SIZE = int(os.getenv("REINDEX_CHUNK_SIZE", "2048"))
+# Embedding processes; the CPU threads are split evenly between them
+REINDEX_WORKERS = int(
+    os.getenv("REINDEX_WORKERS", str(max((os.cpu_count() or 1) // 2, 1)))
+)
+# Passes over the table before giving up while profiles keep changing
+REINDEX_MAX_PASSES = 3
+
+STAGING_TABLE = "resume_embeddings_reindex"
+
+
+def create_staging_table(conn):
+    # Runs as a write task, so it must not commit
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {STAGING_TABLE} {EMBEDDINGS_COLUMNS}")
+    # Vectors staged for a different model cannot be reused
+    conn.execute(
+        f"DELETE FROM {STAGING_TABLE} WHERE Model_Name != ?", (EMBEDDING_MODEL_ID,)
+    )
+
+
+def drop_staging_table(conn):
+    conn.execute(f"DROP TABLE IF EXISTS {STAGING_TABLE}")
+
+
+def stale_chunks(db_path, chunk_size):
+    """
+    Stream the profiles that have no current staged vector.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        chunk_size (int): resumes rows read per query.
+
+    Yields:
+        list: (email, text_hash, text) tuples, at most chunk_size per list.
+    """
+    last_email = ""
+    while True:
+        with connection(db_path) as conn:
+            rows = conn.execute(
+                f"""SELECT r.Email, r.Current_Organization, r.Years_Experience,
+                          r.Skills, s.Model_Name, s.Text_Hash
+                     FROM resumes r
+                     LEFT JOIN {STAGING_TABLE} s ON s.Email = r.Email
+                    WHERE r.Email > ?
+                    ORDER BY r.Email
+                    LIMIT ?""",
+                (last_email, chunk_size),
+            ).fetchall()
+        if not rows:
+            return
+        last_email = rows[-1][0]
+        stale = []
+        for email, organization, years, skills, model_name, staged_hash in rows:
+            text = build_profile_text(organization, years, skills)
+            text_hash = profile_text_hash(text)
+            if model_name != EMBEDDING_MODEL_ID or staged_hash != text_hash:
+                stale.append((email, text_hash, text))
+        if stale:
+            yield stale
+
+
+def _init_worker(threads):
+    # Each worker gets its share of the cores instead of all of them
+    model.EMBEDDING_THREADS = threads
+
+
+def _embed_chunk(texts):
+    # Runs in a worker process
+    embeddings = embed_texts(texts)
+    if embeddings is None:
+        raise RuntimeError("Failed to embed profiles")
+    return np.asarray(embeddings, dtype=EMBEDDING_DTYPE)
+
+
+def embed_pass(db_path, pool, workers, chunk_size, total):
+    """
+    Embed and stage every profile without a current staged vector.
+
+    Returns:
+        int: The number of profiles embedded.
+    """
+    chunks = stale_chunks(db_path, chunk_size)
+    in_flight = {}
+    embedded = 0
+    start = time.perf_counter()
+    while True:
+        # Keep one chunk queued behind each busy worker
+        while len(in_flight) < 2 * workers:
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            texts = [text for _, _, text in chunk]
+            in_flight[pool.submit(_embed_chunk, texts)] = chunk
+        if not in_flight:
+            return embedded
+
+        done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+        for future in done:
+            chunk = in_flight.pop(future)
+            rows = [
+                (email, text_hash, vector)
+                for (email, text_hash, _), vector in zip(chunk, future.result())
+            ]
+            # Committed per chunk, so an interrupted run keeps its progress
+            write(
+                lambda conn, rows=rows: store_embeddings(conn, rows, STAGING_TABLE),
+                db_path,
+            )
+            embedded += len(rows)
+        elapsed = time.perf_counter() - start
+        print(
+            f"Embedded {embedded}/{total} profile(s), "
+            f"{embedded / elapsed:.0f} per second"
+        )
+
+
+def cut_over(db_path):
+    """
+    Replace resume_embeddings with the staging table in one transaction.
+
+    Readers see either the old vectors or the new ones; the old table is
+    dropped in the same transaction.
+    """
+
+    def swap(conn):
+        conn.execute("ALTER TABLE resume_embeddings RENAME TO resume_embeddings_old")
+        conn.execute(f"ALTER TABLE {STAGING_TABLE} RENAME TO resume_embeddings")
+        conn.execute("DROP TABLE resume_embeddings_old")
+
+    write(swap, db_path)
+
+
+def reindex(db_path, workers, chunk_size, stage_only=False, restart=False):
+    """
+    Stage new vectors for every profile and, unless stage_only, cut over to them.
+
+    Args:
+        db_path (str): Path to the SQLite database.
+        workers (int): Embedding processes.
+        chunk_size (int): Profiles per database read and per worker task.
+        stage_only (bool): Leave the staged vectors for a later run to cut over.
+        restart (bool): Discard vectors staged by an earlier run.
+
+    Raises:
+        RuntimeError: If profiles were still being embedded in the last pass;
+            nothing is cut over then.
+    """
+    if restart:
+        write(drop_staging_table, db_path)
+    write(create_staging_table, db_path)
+    with connection(db_path) as conn:
+        total = conn.execute("SELECT COUNT(*) FROM resumes").fetchone()[0]
+    print(f"Re-indexing {total} profile(s) with {EMBEDDING_MODEL_ID}")
+
+    threads = max((os.cpu_count() or 1) // workers, 1)
+    pool = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(threads,),
+    )
+    try:
+        # Only a pass that embeds nothing shows every staged vector is current
+        settled = False
+        for _ in range(REINDEX_MAX_PASSES):
+            if embed_pass(db_path, pool, workers, chunk_size, total) == 0:
+                settled = True
+                break
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    if not settled:
+        raise RuntimeError(
+            f"Profiles were still changing after {REINDEX_MAX_PASSES} passes, "
+            "not cutting over"
+        )
+    if stage_only:
+        print("Vectors staged; run again without --stage-only to cut over")
+        return
+    cut_over(db_path)
+    print("Cut over to the new vectors")
+    if VECTOR_INDEX_SNAPSHOT_DIR:
+        publish_snapshot(db_path)
+        print(f"Published an index snapshot to {VECTOR_INDEX_SNAPSHOT_DIR}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--db-path", default=DB_PATH)
+    parser.add_argument("--workers", type=int, default=REINDEX_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=REINDEX_CHUNK_SIZE)
+    parser.add_argument(
+        "--stage-only", action="store_true", help="Embed without cutting over"
+    )
+    parser.add_argument(
+        "--restart", action="store_true", help="Discard previously staged vectors"
+    )
+    args = parser.parse_args()
+    if not args.db_path:
+        parser.error("Set DB_PATH or pass --db-path")
+    # Stop on SIGTERM as on Ctrl-C, so the worker processes are shut down too
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+
+    try:
+        reindex(
+            args.db_path,
+            max(args.workers, 1),
+            args.chunk_size,
+            stage_only=args.stage_only,
+            restart=args.restart,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; staged vectors are kept, run again to resume")
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error re-indexing profiles: {e}")
+        print("Staged vectors are kept, run again to resume")
+        sys.exit(1)
+    finally:
+        close_database()
+
+
+if __name__ == "__main__":
+    main()
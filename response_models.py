@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from datetime import datetime
 from fastapi import UploadFile
 
@@ -9,6 +9,15 @@ class UploadFilesRequest(BaseModel):
     files: List[UploadFile]
 
 
+class ExtractionStats(BaseModel):
+    pages: int
+    text_layer_pages: int
+    ocr_pages: int
+    text_layer_seconds: float
+    ocr_seconds: float
+    cached: bool = False
+
+
 class ResumeExtractionResponse(BaseModel):
     name: str
     email: str
@@ -16,14 +25,57 @@ class ResumeExtractionResponse(BaseModel):
     current_organization: str
     years_experience: int
     skills: str
+    extraction_stats: Optional[ExtractionStats] = None
 
 
 class UploadFilesResponse(BaseModel):
     results: List[ResumeExtractionResponse]
 
 
+class UploadJobResponse(BaseModel):
+    job_id: str
+    status: str
+    total_files: int
+
+
+# One file's outcome, both as a streamed upload record and in a job's status
+class UploadFileResult(BaseModel):
+    index: int
+    filename: Optional[str]
+    status: str
+    result: Optional[ResumeExtractionResponse]
+    error: Optional[str]
+
+
+class UploadJobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    total_files: int
+    completed_files: int
+    failed_files: int
+    created_at: datetime
+    updated_at: datetime
+    files: List[UploadFileResult]
+
+
 class JobDescriptionRequest(BaseModel):
     job_description: str
+    min_years_experience: Optional[int] = None
+    max_years_experience: Optional[int] = None
+    exclude_organizations: Optional[List[str]] = None
+    retrieval_mode: Optional[Literal["hybrid", "semantic"]] = None
+    # Rerank with the cross-encoder; None uses CROSS_ENCODER_RERANK
+    rerank: Optional[bool] = None
+
+
+class BatchJobDescriptionRequest(BaseModel):
+    job_descriptions: List[str]
+    min_years_experience: Optional[int] = None
+    max_years_experience: Optional[int] = None
+    exclude_organizations: Optional[List[str]] = None
+    retrieval_mode: Optional[Literal["hybrid", "semantic"]] = None
+    # Shortlist each candidate for at most one of the job descriptions
+    deduplicate: bool = False
 
 
 class ProfileResponse(BaseModel):
@@ -38,14 +90,20 @@ class ProfileResponse(BaseModel):
 
 
 class ListOfProfile(BaseModel):
+    search_id: str
     top_matches: List[ProfileResponse]
 
 
+class BatchListOfProfile(BaseModel):
+    results: List[ListOfProfile]
+
+
 class AvailabilityResponse(BaseModel):
     message: str
 
 
 class AvailabilityRequest(BaseModel):
+    search_id: str
     email: str
     interested: bool
     interview_time: Optional[datetime]
@@ -64,3 +122,22 @@ class InterestedProfileResponse(BaseModel):
 
 class ListOfInterestedProfiles(BaseModel):
     interested_profiles: List[InterestedProfileResponse]
+
+
+class CacheCounters(BaseModel):
+    hits: int
+    misses: int
+    hit_ratio: float
+
+
+class CacheStatsResponse(BaseModel):
+    text: CacheCounters
+    llm: CacheCounters
+    query_embedding: CacheCounters
+    top_matches: CacheCounters
+
+
+class ReadinessResponse(BaseModel):
+    ready: bool
+    components: Dict[str, bool]
+    error: Optional[str] = None
@@ -0,0 +1,167 @@
+import os
+import re
+import sqlite3
+from dotenv import load_dotenv
+from database import connection
+from vector_index import normalize_organization
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+DB_PATH = os.getenv("DB_PATH")
+MAX_QUERY_TERMS = 64
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is",
+    "of", "on", "or", "our", "the", "to", "we", "will", "with", "you", "your",
+}
+
+
+# Function to create the FTS5 skill index if not exists
+def create_skill_index(conn):
+    """
+    Create the skill index over resumes.Skills.
+
+    The index is an external-content FTS5 table keyed by the resumes rowid,
+    so it keeps no copy of the skills, and triggers on resumes keep it in step
+    with every insert, update and delete. Called by create_resumes_table once
+    the resumes table exists. An index from before it was keyed by rowid is
+    dropped and rebuilt.
+
+    VACUUM may renumber the rowids of resumes; run
+    INSERT INTO resume_skills_fts(resume_skills_fts) VALUES('rebuild') after one.
+    """
+    cursor = conn.cursor()
+    # One savepoint, so an interrupted migration is redone on the next start
+    cursor.execute("SAVEPOINT create_skill_index")
+    try:
+        columns = [
+            row[1] for row in cursor.execute("PRAGMA table_info(resume_skills_fts)")
+        ]
+        if "Email" in columns:
+            cursor.execute("DROP TABLE resume_skills_fts")
+        cursor.execute(
+            """CREATE VIRTUAL TABLE IF NOT EXISTS resume_skills_fts
+                 USING fts5(Skills, content='resumes', content_rowid='rowid')"""
+        )
+        cursor.execute(
+            """CREATE TRIGGER IF NOT EXISTS resumes_skills_insert
+                 AFTER INSERT ON resumes BEGIN
+                     INSERT INTO resume_skills_fts (rowid, Skills)
+                     VALUES (new.rowid, new.Skills);
+                 END"""
+        )
+        cursor.execute(
+            """CREATE TRIGGER IF NOT EXISTS resumes_skills_delete
+                 AFTER DELETE ON resumes BEGIN
+                     INSERT INTO resume_skills_fts (resume_skills_fts, rowid, Skills)
+                     VALUES ('delete', old.rowid, old.Skills);
+                 END"""
+        )
+        cursor.execute(
+            """CREATE TRIGGER IF NOT EXISTS resumes_skills_update
+                 AFTER UPDATE OF Skills ON resumes BEGIN
+                     INSERT INTO resume_skills_fts (resume_skills_fts, rowid, Skills)
+                     VALUES ('delete', old.rowid, old.Skills);
+                     INSERT INTO resume_skills_fts (rowid, Skills)
+                     VALUES (new.rowid, new.Skills);
+                 END"""
+        )
+        if not columns or "Email" in columns:
+            # Index the resumes stored before the table existed
+            cursor.execute(
+                "INSERT INTO resume_skills_fts (resume_skills_fts) VALUES ('rebuild')"
+            )
+        cursor.execute("RELEASE create_skill_index")
+    except sqlite3.Error as e:
+        cursor.execute("ROLLBACK TO create_skill_index")
+        cursor.execute("RELEASE create_skill_index")
+        print(f"SQLite error: {e}")
+
+
+def build_match_query(text):
+    """
+    Turn free text into an FTS5 OR-query of quoted terms.
+
+    Args:
+        text (str): Job description text.
+
+    Returns:
+        str: FTS5 MATCH expression, or "" if no usable terms were found.
+    """
+    terms = []
+    seen = set()
+    for term in re.findall(r"\w+", text.lower()):
+        if len(term) < 2 or term in STOPWORDS or term in seen:
+            continue
+        seen.add(term)
+        terms.append(f'"{term}"')
+        if len(terms) == MAX_QUERY_TERMS:
+            break
+    return " OR ".join(terms)
+
+
+def search_skills(
+    text,
+    limit=200,
+    db_path=None,
+    min_years_experience=None,
+    max_years_experience=None,
+    exclude_organizations=None,
+):
+    """
+    Rank profiles by BM25 of their Skills against the given text.
+
+    The structured filters are applied in the same query, so the limit counts
+    only profiles that pass them. They follow VectorIndex.filter_rows: unknown
+    years never pass a years filter and organizations are compared trimmed
+    and lower-cased (SQLite lower-cases ASCII only, so callers still check
+    the rows they get back).
+
+    Args:
+        text (str): Job description text.
+        limit (int): Maximum number of profiles to return.
+        db_path (str, optional): Path to the SQLite database. Defaults to DB_PATH.
+        min_years_experience (int, optional): Minimum years of experience.
+        max_years_experience (int, optional): Maximum years of experience.
+        exclude_organizations (list of str, optional): Current organizations
+            to exclude (case-insensitive).
+
+    Returns:
+        list: Emails, best BM25 match first.
+    """
+    query = build_match_query(text)
+    if not query:
+        return []
+
+    conditions = ["resume_skills_fts MATCH ?"]
+    params = [query]
+    if min_years_experience is not None or max_years_experience is not None:
+        conditions.append("typeof(r.Years_Experience) IN ('integer', 'real')")
+    if min_years_experience is not None:
+        conditions.append("r.Years_Experience >= ?")
+        params.append(min_years_experience)
+    if max_years_experience is not None:
+        conditions.append("r.Years_Experience <= ?")
+        params.append(max_years_experience)
+    if exclude_organizations:
+        excluded = sorted(set(map(normalize_organization, exclude_organizations)))
+        conditions.append(
+            "lower(trim(COALESCE(r.Current_Organization, ''))) "
+            f"NOT IN ({', '.join('?' * len(excluded))})"
+        )
+        params.extend(excluded)
+    params.append(limit)
+    where = " AND ".join(conditions)
+
+    with connection(db_path or DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"""SELECT r.Email FROM resume_skills_fts
+                  JOIN resumes r ON r.rowid = resume_skills_fts.rowid
+                 WHERE {where}
+                 ORDER BY bm25(resume_skills_fts)
+                 LIMIT ?""",
+            params,
+        )
+        return [row[0] for row in cursor.fetchall()]
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import tempfile
+
+# Modules read their settings when imported, so point them at scratch
+# locations before anything from the application is imported
+_SCRATCH_DIR = tempfile.mkdtemp(prefix="resume-matcher-tests-")
+os.environ["DB_PATH"] = os.path.join(_SCRATCH_DIR, "resume_data.db")
+os.environ["UPLOAD_SPOOL_DIR"] = os.path.join(_SCRATCH_DIR, "spool")
+os.environ["ANN_INDEX_PATH"] = os.path.join(_SCRATCH_DIR, "ann_index.bin")
+for name in ("VECTOR_INDEX_SNAPSHOT_DIR", "GENERATION_URL", "CROSS_ENCODER_RERANK"):
+    os.environ.pop(name, None)
+
+import fitz  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+import model  # noqa: E402
+import query_cache  # noqa: E402
+import utils  # noqa: E402
+import vector_index  # noqa: E402
+from database import write  # noqa: E402
+
+DB_PATH = os.environ["DB_PATH"]
+
+
+class HashingEncoder:
+    """
+    Deterministic stand-in for the SentenceTransformer: a bag of hashed words,
+    so texts that share words are similar and nothing is downloaded.
+    """
+
+    dimension = 64
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dimension), dtype=np.float32)
+        for i, text in enumerate(texts):
+            for word in re.findall(r"\w+", str(text).lower()):
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vectors[i, digest[0] % self.dimension] += 1.0
+        return vectors
+
+    @property
+    def encoded(self):
+        return sum(len(texts) for texts in self.calls)
+
+
+class FakeLLM:
+    """
+    Stand-in for the generation scheduler: parses the first email and the
+    "Skills:" line out of the prompt and answers with resume JSON.
+    """
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate(self, prompt):
+        self.prompts.append(prompt)
+        email = re.search(r"[\w.+-]+@[\w-]+\.\w+", prompt)
+        skills = re.search(r"Skills: ([^\n.]*)", prompt)
+        return "Extracted resume: " + json.dumps(
+            {
+                "name": "Candidate",
+                "email": email.group(0) if email else "unknown@example.com",
+                "phone_number": "555-0100",
+                "current_organization": "Acme",
+                "years_experience": 5,
+                "skills": skills.group(1) if skills else "",
+            }
+        )
+
+
+def _clear_tables(conn):
+    tables = conn.execute(
+        """SELECT name, sql FROM sqlite_master
+            WHERE type = 'table' AND name NOT LIKE 'sqlite_%'"""
+    ).fetchall()
+    virtual = [name for name, sql in tables if sql.startswith("CREATE VIRTUAL")]
+    shadow = {
+        f"{name}_{suffix}"
+        for name in virtual
+        for suffix in ("data", "idx", "content", "docsize", "config")
+    }
+    for name, sql in tables:
+        if name not in shadow and name not in virtual:
+            conn.execute(f"DELETE FROM {name}")
+    for name in virtual:
+        try:
+            conn.execute(f"INSERT INTO {name}({name}) VALUES('delete-all')")
+        except sqlite3.Error:
+            conn.execute(f"DELETE FROM {name}")
+
+
+@pytest.fixture
+def db_path():
+    return DB_PATH
+
+
+@pytest.fixture(autouse=True)
+def encoder(monkeypatch):
+    """Replace the embedding model with a HashingEncoder for every test."""
+    fake = HashingEncoder()
+    monkeypatch.setattr(model, "get_embedding_model", lambda backend=None: fake)
+    return fake
+
+
+@pytest.fixture(autouse=True)
+def clean_state():
+    """Start every test from empty tables, no loaded index and empty caches."""
+    write(_clear_tables, DB_PATH)
+    vector_index._index = None
+    vector_index._snapshot_version = None
+    vector_index._last_upsert_at = None
+    vector_index._pending_upserts.clear()
+    query_cache.query_embedding_cache.clear()
+    query_cache.top_matches_cache.clear()
+    yield
+    vector_index._index = None
+
+
+@pytest.fixture
+def make_pdf():
+    """Build a PDF whose pages carry the given text layers ("" for none)."""
+
+    def make(pages):
+        document = fitz.open()
+        for text in pages:
+            page = document.new_page()
+            if text:
+                page.insert_textbox(fitz.Rect(36, 36, 560, 800), text, fontsize=10)
+        data = document.tobytes()
+        document.close()
+        return data
+
+    return make
+
+
+@pytest.fixture
+def spool_files():
+    """Write PDFs to the spool directory as an upload would."""
+    spool_dir = os.environ["UPLOAD_SPOOL_DIR"]
+
+    def spool(pdfs):
+        os.makedirs(spool_dir, exist_ok=True)
+        spooled = []
+        for i, pdf_bytes in enumerate(pdfs):
+            handle = tempfile.NamedTemporaryFile(
+                dir=spool_dir, suffix=".pdf", delete=False
+            )
+            with handle:
+                handle.write(pdf_bytes)
+            spooled.append((f"resume{i}.pdf", handle.name, len(pdf_bytes)))
+        return spooled
+
+    return spool
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """Answer every generate call with FakeLLM instead of watsonx."""
+    llm = FakeLLM()
+    monkeypatch.setattr(utils, "get_scheduler", lambda model_id: llm)
+    return llm
+
+
+@pytest.fixture
+def add_resume(db_path):
+    """Store a parsed resume the way an upload does and return its profile dict."""
+
+    def add(email, skills, organization="Acme", years=5, name=None):
+        resume = {
+            "name": name or email.split("@")[0],
+            "email": email,
+            "phone_number": "555-0100",
+            "current_organization": organization,
+            "years_experience": years,
+            "skills": skills,
+        }
+        return utils.store_resume(resume, {}, db_path)
+
+    return add
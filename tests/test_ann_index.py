@@ -0,0 +1,190 @@
+import os
+import numpy as np
+import pytest
+import ann_index
+from ann_index import HnswIndex
+from vector_index import VectorIndex
+
+pytest.importorskip("hnswlib")
+
+
+def _profile(i):
+    return (f"Name {i}", f"p{i}@example.com", "555-0100", "Acme", i % 20, "")
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(1).normal(size=(300, 16)).astype(np.float32)
+
+
+@pytest.fixture
+def graph_path(tmp_path):
+    return str(tmp_path / "ann_index.bin")
+
+
+@pytest.fixture(autouse=True)
+def ann_for_every_pool(monkeypatch):
+    # Use the graph however small the test pool is
+    monkeypatch.setattr(ann_index, "ANN_MIN_PROFILES", 0)
+
+
+def _exact_index(vectors):
+    return VectorIndex.from_embeddings(
+        [_profile(i) for i in range(len(vectors))], vectors
+    )
+
+
+def _emails(results):
+    return [profile[1] for profile, _ in results]
+
+
+def test_graph_search_agrees_with_exact(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path, ef_search=200)
+    index.build()
+    for query in vectors[:10]:
+        assert _emails(index.search(query, k=10)) == _emails(
+            index.search(query, k=10, exact=True)
+        )
+
+
+def test_small_pools_use_the_exact_fallback(vectors, graph_path, monkeypatch):
+    monkeypatch.setattr(ann_index, "ANN_MIN_PROFILES", 1000)
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    index.build()
+    index._graph = object()  # fails if the graph is queried
+    assert _emails(index.search(vectors[3], k=1)) == ["p3@example.com"]
+
+
+def test_filtered_rows_are_respected(vectors, graph_path):
+    exact = _exact_index(vectors)
+    index = HnswIndex(exact, path=graph_path, ef_search=200)
+    index.build()
+    rows = exact.filter_rows(min_years_experience=10)
+
+    results = index.search(vectors[3], k=10, rows=rows)
+    assert len(results) == 10
+    assert all(profile[4] >= 10 for profile, _ in results)
+
+
+def test_filtered_k_is_clamped_to_the_allowed_rows(vectors, graph_path):
+    exact = _exact_index(vectors)
+    index = HnswIndex(exact, path=graph_path, ef_search=200)
+    index.build()
+    rows = np.array([4, 40, 140])
+
+    assert sorted(_emails(index.search(vectors[3], k=10, rows=rows))) == [
+        "p140@example.com",
+        "p40@example.com",
+        "p4@example.com",
+    ]
+
+
+def test_failed_filtered_search_falls_back_to_exact(vectors, graph_path):
+    exact = _exact_index(vectors)
+    index = HnswIndex(exact, path=graph_path)
+    index.build()
+
+    class SparseGraph:
+        def set_ef(self, ef):
+            pass
+
+        def knn_query(self, query, k, filter=None):
+            raise RuntimeError("Cannot return the results in a contiguous 2D array")
+
+    index._graph = SparseGraph()
+    rows = exact.filter_rows(min_years_experience=10)
+    assert _emails(index.search(vectors[3], k=5, rows=rows)) == _emails(
+        exact.search(vectors[3], 5, rows=rows)
+    )
+
+
+def test_load_reconciles_vectors_changed_since_save(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path, ef_search=200)
+    index.build()
+    index.save()
+
+    # The saved graph goes stale: one profile moves, one is added
+    exact = _exact_index(vectors)
+    exact.upsert(_profile(5), vectors[200])
+    exact.upsert(_profile(300), -vectors[0])
+    reloaded = HnswIndex(exact, path=graph_path, ef_search=200)
+    assert reloaded.load()
+
+    assert _emails(reloaded.search(-vectors[0], k=1)) == ["p300@example.com"]
+    top = _emails(reloaded.search(vectors[200], k=2))
+    assert set(top) == {"p5@example.com", "p200@example.com"}
+
+
+def test_load_rejects_a_graph_of_another_dimension(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    index.build()
+    index.save()
+
+    other = _exact_index(np.hstack([vectors, vectors]))
+    assert not HnswIndex(other, path=graph_path).load()
+
+
+def test_upsert_reaches_the_graph(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors[:100]), path=graph_path, ef_search=200)
+    index.build()
+    index.upsert(_profile(100), -vectors[1])
+    assert _emails(index.search(-vectors[1], k=1)) == ["p100@example.com"]
+
+
+def test_save_leaves_no_temporary_files(vectors, graph_path, tmp_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    index.build()
+    index.save()
+    assert sorted(os.listdir(tmp_path)) == ["ann_index.bin", "ann_index.bin.json"]
+
+
+def test_failed_save_removes_its_temporary_files(vectors, graph_path, tmp_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    index.build()
+
+    class BrokenGraph:
+        def save_index(self, path):
+            with open(path, "wb") as f:
+                f.write(b"partial")
+            raise OSError("disk full")
+
+    index._graph = BrokenGraph()
+    with pytest.raises(OSError):
+        index.save()
+    assert os.listdir(tmp_path) == []
+
+
+def test_concurrent_savers_use_their_own_temporary_files(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    assert index._temp_path(graph_path) != index._temp_path(graph_path)
+
+
+def test_rebind_adds_only_the_changed_rows(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path, ef_search=200)
+    index.build()
+
+    newer = _exact_index(vectors)
+    newer.upsert(_profile(7), -vectors[2])
+    assert index.rebind(newer, np.array([7]))
+    assert index.exact is newer
+    assert _emails(index.search(-vectors[2], k=1)) == ["p7@example.com"]
+
+
+def test_rebind_without_a_graph_is_refused(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path)
+    assert not index.rebind(_exact_index(vectors), np.array([0]))
+
+
+def test_rebind_remaps_renumbered_rows(vectors, graph_path):
+    index = HnswIndex(_exact_index(vectors), path=graph_path, ef_search=200)
+    index.build()
+
+    # A rebuilt snapshot may hold the same profiles in another row order
+    order = np.arange(len(vectors))[::-1]
+    newer = VectorIndex.from_embeddings([_profile(i) for i in order], vectors[order])
+    assert index.rebind(newer, np.array([], dtype=np.int64))
+    rows = np.array([newer.row_of("p3@example.com"), newer.row_of("p9@example.com")])
+    assert sorted(_emails(index.search(vectors[3], k=2, rows=rows))) == [
+        "p3@example.com",
+        "p9@example.com",
+    ]
@@ -0,0 +1,202 @@
+import asyncio
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+import main
+import matcher
+import query_cache
+import vector_index
+from matcher import (
+    deduplicate_across_job_descriptions,
+    match_profiles_with_job_description,
+    match_profiles_with_job_descriptions,
+)
+from vector_index import VectorIndex
+
+SKILLS = [
+    "python sql spark",
+    "python django flask",
+    "java spring kotlin",
+    "react css typescript",
+    "go kubernetes docker",
+    "rust systems embedded",
+    "sql tableau excel",
+    "python pandas numpy",
+]
+JOB_DESCRIPTIONS = [
+    "python data engineer with sql and spark",
+    "backend java spring developer",
+    "frontend react typescript engineer",
+]
+
+
+def _profile(email):
+    return ("Name", email, "555-0100", "Acme", 5, "")
+
+
+def _emails(ranking):
+    return [profile[1] for profile, _ in ranking]
+
+
+@pytest.fixture
+def candidates(add_resume):
+    for i, skills in enumerate(SKILLS):
+        add_resume(f"c{i}@example.com", skills, years=i + 1)
+
+
+def test_candidates_go_to_their_best_job_description():
+    shared, second = _profile("shared@example.com"), _profile("second@example.com")
+    rankings = [
+        [(shared, 0.7), (second, 0.6)],
+        [(shared, 0.9), (second, 0.5)],
+    ]
+
+    shortlists = deduplicate_across_job_descriptions(rankings, k=1)
+    assert _emails(shortlists[0]) == ["second@example.com"]
+    assert _emails(shortlists[1]) == ["shared@example.com"]
+
+
+def test_shortlists_keep_their_own_order_and_size():
+    profiles = [_profile(f"p{i}@example.com") for i in range(6)]
+    rankings = [
+        [(profiles[i], 1.0 - i / 10) for i in range(6)],
+        [(profiles[i], 0.95 - i / 10) for i in (1, 3, 5, 0)],
+    ]
+
+    shortlists = deduplicate_across_job_descriptions(rankings, k=2)
+    assert _emails(shortlists[0]) == ["p0@example.com", "p1@example.com"]
+    assert _emails(shortlists[1]) == ["p3@example.com", "p5@example.com"]
+    assert [score for _, score in shortlists[0]] == [1.0, 0.9]
+
+
+def test_ties_go_to_the_earlier_job_description():
+    profile = _profile("tie@example.com")
+    shortlists = deduplicate_across_job_descriptions(
+        [[(profile, 0.5)], [(profile, 0.5)]], k=1
+    )
+    assert shortlists == [[(profile, 0.5)], []]
+
+
+def test_search_batch_matches_search_across_blocks(monkeypatch):
+    monkeypatch.setattr(vector_index, "SCORE_BLOCK_ROWS", 7)
+    vectors = np.random.default_rng(4).normal(size=(60, 16)).astype(np.float32)
+    index = VectorIndex.from_embeddings(
+        [_profile(f"p{i}@example.com") for i in range(60)], vectors
+    )
+    queries = vectors[:5] + 0.1
+    rows = np.arange(0, 60, 3)
+
+    for batch, query in zip(index.search_batch(queries, k=8), queries):
+        assert _emails(batch) == _emails(index.search(query, k=8))
+    for batch, query in zip(index.search_batch(queries, k=8, rows=rows), queries):
+        assert _emails(batch) == _emails(index.search(query, k=8, rows=rows))
+
+
+def test_batch_matches_single_searches(candidates, encoder):
+    calls = len(encoder.calls)
+    batch = match_profiles_with_job_descriptions(
+        JOB_DESCRIPTIONS, retrieval_mode="semantic", min_years_experience=2
+    )
+    # Every job description is embedded in one call
+    assert encoder.calls[calls:] == [JOB_DESCRIPTIONS]
+
+    for job_description, ranking in zip(JOB_DESCRIPTIONS, batch):
+        single = match_profiles_with_job_description(
+            job_description, retrieval_mode="semantic", min_years_experience=2
+        )
+        assert ranking == single
+        assert "c0@example.com" not in _emails(ranking)
+
+
+def test_batch_rankings_fill_the_single_search_cache(candidates, encoder):
+    match_profiles_with_job_descriptions(JOB_DESCRIPTIONS, retrieval_mode="hybrid")
+    calls = len(encoder.calls)
+    match_profiles_with_job_description(JOB_DESCRIPTIONS[0], retrieval_mode="hybrid")
+    assert len(encoder.calls) == calls
+
+
+def test_deduplicated_batch_shortlists_each_candidate_once(candidates, monkeypatch):
+    monkeypatch.setattr(matcher, "TOP_K", 2)
+    rankings = match_profiles_with_job_descriptions(
+        JOB_DESCRIPTIONS, retrieval_mode="semantic", deduplicate=True
+    )
+
+    emails = [email for ranking in rankings for email in _emails(ranking)]
+    assert len(emails) == len(set(emails))
+    # 8 candidates are enough to give all three job descriptions 2 places
+    assert [len(ranking) for ranking in rankings] == [2, 2, 2]
+
+
+def test_batch_endpoint_saves_one_shortlist_per_job_description(candidates):
+    client = TestClient(main.app)
+    response = client.post(
+        "/top-matches/batch",
+        json={"job_descriptions": JOB_DESCRIPTIONS, "deduplicate": True},
+    )
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == len(JOB_DESCRIPTIONS)
+    assert len({result["search_id"] for result in results}) == len(results)
+    assert all(result["top_matches"][0]["rank"] == 1 for result in results)
+
+
+@pytest.mark.parametrize("job_descriptions", [[], ["python", ""], ["a", "b", "c"]])
+def test_batch_endpoint_rejects_bad_batches(job_descriptions, monkeypatch):
+    monkeypatch.setattr(main, "TOP_MATCHES_BATCH_MAX", 2)
+    response = TestClient(main.app).post(
+        "/top-matches/batch", json={"job_descriptions": job_descriptions}
+    )
+    assert response.status_code == 400
+
+
+def test_batch_endpoint_matches_and_saves_off_the_event_loop(candidates, monkeypatch):
+    def on_event_loop():
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return False
+        return True
+
+    calls = []
+    match = main.match_profiles_with_job_descriptions
+    save = main.save_profiles_to_db
+
+    def recording_match(*args, **kwargs):
+        calls.append(("match", on_event_loop()))
+        return match(*args, **kwargs)
+
+    def recording_save(*args, **kwargs):
+        calls.append(("save", on_event_loop()))
+        return save(*args, **kwargs)
+
+    monkeypatch.setattr(main, "match_profiles_with_job_descriptions", recording_match)
+    monkeypatch.setattr(main, "save_profiles_to_db", recording_save)
+    response = TestClient(main.app).post(
+        "/top-matches/batch", json={"job_descriptions": JOB_DESCRIPTIONS[:2]}
+    )
+
+    assert response.status_code == 200
+    assert calls == [("match", False), ("save", False), ("save", False)]
+
+
+@pytest.mark.parametrize("filters", [{}, {"min_years_experience": 3}])
+def test_hybrid_batch_scores_with_search_batch(candidates, monkeypatch, filters):
+    # The last job description matches no skills, so it is topped up
+    job_descriptions = JOB_DESCRIPTIONS + ["underwater basket weaving"]
+
+    def no_single_search(*args, **kwargs):
+        raise AssertionError("batch matching should not score one query at a time")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(VectorIndex, "search", no_single_search)
+        batch = match_profiles_with_job_descriptions(
+            job_descriptions, retrieval_mode="hybrid", **filters
+        )
+
+    query_cache.top_matches_cache.clear()
+    for job_description, ranking in zip(job_descriptions, batch):
+        assert ranking
+        assert ranking == match_profiles_with_job_description(
+            job_description, retrieval_mode="hybrid", **filters
+        )
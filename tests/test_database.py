@@ -0,0 +1,91 @@
+import sqlite3
+import threading
+import pytest
+import database
+from database import DatabaseWriter, connection, register_schema, write
+
+
+@pytest.fixture
+def writer(tmp_path):
+    writer = DatabaseWriter(str(tmp_path / "writer.db"))
+    writer.execute(lambda conn: conn.execute("CREATE TABLE items (Name TEXT UNIQUE)"))
+    yield writer
+    writer.stop()
+
+
+def _insert(name):
+    return lambda conn: conn.execute("INSERT INTO items VALUES (?)", (name,)).rowcount
+
+
+def _names(writer):
+    conn = sqlite3.connect(writer.db_path)
+    try:
+        return sorted(row[0] for row in conn.execute("SELECT Name FROM items"))
+    finally:
+        conn.close()
+
+
+def test_failing_task_is_rolled_back_alone(writer):
+    started, release = threading.Event(), threading.Event()
+
+    def block(conn):
+        started.set()
+        release.wait(5)
+
+    writer.submit(block)
+    started.wait(5)
+    # Queued behind the blocked task, so they commit as one batch
+    futures = [
+        writer.submit(_insert("a")),
+        writer.submit(_insert("a")),
+        writer.submit(_insert("b")),
+    ]
+    release.set()
+
+    assert futures[0].result(5) == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        futures[1].result(5)
+    assert futures[2].result(5) == 1
+    assert _names(writer) == ["a", "b"]
+
+
+def test_task_errors_reach_the_caller(writer):
+    def fail(conn):
+        conn.execute("INSERT INTO items VALUES ('x')")
+        raise ValueError("bad row")
+
+    with pytest.raises(ValueError):
+        writer.execute(fail)
+    assert _names(writer) == []
+
+
+def test_concurrent_writes_all_commit(writer):
+    threads = [
+        threading.Thread(target=writer.execute, args=(_insert(f"n{i}"),))
+        for i in range(50)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(_names(writer)) == 50
+
+
+def test_connections_use_wal(db_path):
+    with connection(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_schemas_registered_later_are_applied(db_path, monkeypatch):
+    monkeypatch.setattr(database, "_schema_creators", list(database._schema_creators))
+
+    def create_late_table(conn):
+        conn.execute("CREATE TABLE IF NOT EXISTS late_table (Id INTEGER)")
+
+    register_schema(create_late_table)
+    # The writer for this database started long before the registration
+    assert write(
+        lambda conn: conn.execute("INSERT INTO late_table VALUES (1)").rowcount,
+        db_path,
+    ) == 1
+    write(lambda conn: conn.execute("DROP TABLE late_table"), db_path)
@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+import model
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("sentence_transformers")
+
+TEXTS = [
+    "Organization: Acme. Years of experience: 5. Skills: python, sql, docker",
+    "Organization: Globex. Years of experience: 12. Skills: java, kubernetes",
+    "Organization: Initech. Years of experience: 2. Skills: react, css, figma",
+]
+
+
+@pytest.fixture(scope="module")
+def model_path(tmp_path_factory):
+    """A small randomly initialised BERT saved as a local SentenceTransformer."""
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizer
+
+    path = str(tmp_path_factory.mktemp("embedding-model"))
+    words = sorted({word for text in TEXTS for word in text.lower().split()})
+    with open(f"{path}/vocab.txt", "w") as f:
+        f.write("\n".join(["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]"] + words))
+    torch.manual_seed(0)
+    config = BertConfig(
+        vocab_size=5 + len(words),
+        hidden_size=64,
+        num_hidden_layers=2,
+        num_attention_heads=4,
+        intermediate_size=128,
+    )
+    BertModel(config).save_pretrained(path)
+    BertTokenizer(f"{path}/vocab.txt").save_pretrained(path)
+    transformer = models.Transformer(path)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension())
+    SentenceTransformer(modules=[transformer, pooling]).save(path)
+    return path
+
+
+@pytest.fixture
+def local_model(monkeypatch, model_path):
+    monkeypatch.setattr(model, "EMBEDDING_MODEL_PATH", model_path)
+    monkeypatch.setattr(model, "EMBEDDING_THREADS", 0)
+
+
+def test_model_id_records_the_backend():
+    assert model.embedding_model_id("torch") == model.MODEL_NAME
+    assert model.embedding_model_id("torch-int8") == f"{model.MODEL_NAME}:torch-int8"
+
+
+def test_unknown_backend_is_rejected():
+    with pytest.raises(ValueError, match="Unknown EMBEDDING_BACKEND"):
+        model._load_embedding_model("onnx")
+
+
+def test_int8_backend_quantizes_linear_layers(local_model):
+    quantized = model._load_embedding_model("torch-int8")
+    float32 = model._load_embedding_model("torch")
+
+    dynamic_linear = torch.ao.nn.quantized.dynamic.Linear
+    assert any(isinstance(m, dynamic_linear) for m in quantized.modules())
+    assert not any(isinstance(m, dynamic_linear) for m in float32.modules())
+    assert not any(type(m) is torch.nn.Linear for m in quantized.modules())
+
+
+def test_int8_vectors_agree_with_float32(local_model):
+    quantized = model._load_embedding_model("torch-int8").encode(TEXTS)
+    reference = model._load_embedding_model("torch").encode(TEXTS)
+
+    assert quantized.shape == reference.shape
+    cosines = np.sum(quantized * reference, axis=1) / (
+        np.linalg.norm(quantized, axis=1) * np.linalg.norm(reference, axis=1)
+    )
+    assert cosines.min() > 0.99
@@ -0,0 +1,80 @@
+import numpy as np
+from database import connection, write
+from embedding_store import (
+    build_profile_text,
+    load_profile_embeddings,
+    profile_text_hash,
+    read_profile_embedding,
+)
+from utils import upsert_resume
+
+
+def _insert_resume(db_path, email, skills, organization="Acme", years=5):
+    write(
+        lambda conn: upsert_resume(
+            conn, ("Name", email, "555-0100", organization, years, skills)
+        ),
+        db_path,
+    )
+
+
+def test_load_embeds_missing_profiles_once(db_path, encoder):
+    _insert_resume(db_path, "a@example.com", "python sql")
+    _insert_resume(db_path, "b@example.com", "java spring")
+
+    profiles, embeddings = load_profile_embeddings(db_path)
+    assert sorted(profile[1] for profile in profiles) == [
+        "a@example.com",
+        "b@example.com",
+    ]
+    assert embeddings.shape == (2, encoder.dimension)
+    assert encoder.encoded == 2
+
+    # Stored vectors are reused on the next load
+    again, again_embeddings = load_profile_embeddings(db_path)
+    assert encoder.encoded == 2
+    np.testing.assert_array_equal(again_embeddings, embeddings)
+
+
+def test_changed_profile_is_re_embedded(db_path, encoder):
+    _insert_resume(db_path, "a@example.com", "python sql")
+    _insert_resume(db_path, "b@example.com", "java spring")
+    load_profile_embeddings(db_path)
+
+    _insert_resume(db_path, "a@example.com", "rust go")
+    load_profile_embeddings(db_path)
+    assert encoder.calls[-1] == [build_profile_text("Acme", 5, "rust go")]
+
+
+def test_vectors_from_another_model_are_stale(db_path, encoder):
+    _insert_resume(db_path, "a@example.com", "python sql")
+    load_profile_embeddings(db_path)
+    write(
+        lambda conn: conn.execute("UPDATE resume_embeddings SET Model_Name = 'old'"),
+        db_path,
+    )
+
+    load_profile_embeddings(db_path)
+    assert encoder.encoded == 2
+
+
+def test_read_profile_embedding_checks_text_hash(db_path):
+    _insert_resume(db_path, "a@example.com", "python sql")
+    load_profile_embeddings(db_path)
+
+    with connection(db_path) as conn:
+        profile, text_hash, vector, text = read_profile_embedding(
+            conn, "a@example.com"
+        )
+        assert vector is not None
+        assert text_hash == profile_text_hash(text)
+
+        conn.execute("UPDATE resumes SET Skills = 'cobol'")
+        _, _, vector, _ = read_profile_embedding(conn, "a@example.com")
+        assert vector is None
+        assert read_profile_embedding(conn, "missing@example.com") == (
+            None,
+            None,
+            None,
+            None,
+        )
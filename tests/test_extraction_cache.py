@@ -0,0 +1,54 @@
+import utils
+from extraction_cache import get_cache_stats, llm_cache_key
+from utils import extract_and_store_resume, extract_resume_text
+
+PROMPT = "Extract the resume as JSON. {text}"
+
+
+def resume_text(email, skills="Python, SQL"):
+    return (
+        f"Jane Doe, {email}. Senior data engineer at Acme with eight years of "
+        f"experience.\nSkills: {skills}"
+    )
+
+
+def test_llm_cache_key_depends_on_text_model_and_prompt():
+    key = llm_cache_key("text", "model-a", PROMPT)
+    assert key == llm_cache_key("text", "model-a", PROMPT)
+    assert key != llm_cache_key("other text", "model-a", PROMPT)
+    assert key != llm_cache_key("text", "model-b", PROMPT)
+    assert key != llm_cache_key("text", "model-a", PROMPT + " ")
+
+
+def test_identical_pdfs_reuse_the_extracted_text(db_path, make_pdf, monkeypatch):
+    calls = []
+    extract = utils.extract_text_from_pdf
+    monkeypatch.setattr(
+        utils,
+        "extract_text_from_pdf",
+        lambda pdf_bytes: calls.append(pdf_bytes) or extract(pdf_bytes),
+    )
+    pdf_bytes = make_pdf([resume_text("jane@example.com")])
+
+    text, stats = extract_resume_text(pdf_bytes, db_path)
+    cached_text, cached_stats = extract_resume_text(pdf_bytes, db_path)
+    assert len(calls) == 1
+    assert cached_text == text
+    assert cached_stats["cached"] is True
+    assert "cached" not in stats
+
+
+def test_identical_text_reuses_the_llm_extraction(db_path, make_pdf, fake_llm):
+    hits = get_cache_stats()["llm"]["hits"]
+    pdf_bytes = make_pdf([resume_text("jane@example.com")])
+
+    first = extract_and_store_resume(pdf_bytes, "model-a", PROMPT, db_path)
+    second = extract_and_store_resume(pdf_bytes, "model-a", PROMPT, db_path)
+    assert len(fake_llm.prompts) == 1
+    assert second["email"] == first["email"] == "jane@example.com"
+    assert get_cache_stats()["llm"]["hits"] == hits + 1
+
+    # Another model or prompt is a different extraction
+    extract_and_store_resume(pdf_bytes, "model-b", PROMPT, db_path)
+    extract_and_store_resume(pdf_bytes, "model-a", PROMPT + "\n", db_path)
+    assert len(fake_llm.prompts) == 3
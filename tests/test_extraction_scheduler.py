@@ -0,0 +1,174 @@
+import sys
+import types
+import pytest
+import extraction_scheduler
+import model
+from extraction_scheduler import ExtractionScheduler, TokenBucket
+from model import status_code_of
+
+
+class FakeClock:
+    """Replaces the time module: sleep() advances monotonic() instantly."""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def perf_counter(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = FakeClock()
+    monkeypatch.setattr(extraction_scheduler, "time", fake)
+    return fake
+
+
+class HttpError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        headers = {} if retry_after is None else {"Retry-After": retry_after}
+        self.response = types.SimpleNamespace(status_code=status_code, headers=headers)
+
+
+@pytest.fixture
+def sdk_error(monkeypatch):
+    """Register a stand-in for the watsonx SDK's error module."""
+
+    class WMLClientError(Exception):
+        pass
+
+    module = types.ModuleType("ibm_watson_machine_learning.wml_client_error")
+    module.WMLClientError = WMLClientError
+    monkeypatch.setitem(sys.modules, module.__name__, module)
+    return WMLClientError
+
+
+def test_status_code_from_the_response():
+    assert status_code_of(HttpError(503)) == 503
+
+
+def test_status_code_from_the_sdk_error_message(sdk_error):
+    error = sdk_error(
+        "Failure during generate. (POST https://us-south.ml.cloud.ibm.com)\n"
+        "Status code: 429, body: {}"
+    )
+    assert status_code_of(error) == 429
+    assert status_code_of(sdk_error("Status code: 4290")) is None
+
+
+def test_numbers_in_other_errors_are_not_status_codes(sdk_error):
+    assert status_code_of(ValueError("Status code: 500")) is None
+    assert status_code_of(RuntimeError("resume 1500 of 5000 failed")) is None
+    assert status_code_of(sdk_error("timed out after 500 ms")) is None
+
+
+def test_bucket_allows_a_burst_then_the_rate(clock):
+    bucket = TokenBucket(rate=2, burst=3)
+    for _ in range(3):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(0.5)]
+    start = clock.now
+    for _ in range(4):
+        bucket.acquire()
+    assert clock.now - start == pytest.approx(2.0)
+
+
+def test_bucket_refills_up_to_the_burst(clock):
+    bucket = TokenBucket(rate=1, burst=2)
+    bucket.acquire()
+    bucket.acquire()
+    clock.now += 60
+    for _ in range(2):
+        bucket.acquire()
+    assert clock.sleeps == []
+    bucket.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_zero_rate_never_waits(clock):
+    bucket = TokenBucket(rate=0, burst=1)
+    for _ in range(10):
+        bucket.acquire()
+    assert clock.sleeps == []
+
+
+def _scheduler(monkeypatch, outcomes, max_retries=3):
+    calls = []
+
+    def generate_text(model_id, prompt):
+        calls.append(prompt)
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setattr(extraction_scheduler, "generate_text", generate_text)
+    scheduler = ExtractionScheduler(
+        "model-a", requests_per_second=0, max_retries=max_retries
+    )
+    return scheduler, calls
+
+
+def test_retry_after_is_honoured(clock, monkeypatch):
+    scheduler, calls = _scheduler(monkeypatch, [HttpError(429, "7"), "done"])
+
+    assert scheduler.generate("prompt") == "done"
+    assert len(calls) == 2
+    assert clock.sleeps == [7.0]
+
+
+def test_backoff_without_retry_after(clock, monkeypatch):
+    monkeypatch.setattr(extraction_scheduler, "LLM_BACKOFF_SECONDS", 1.0)
+    scheduler, _ = _scheduler(
+        monkeypatch, [HttpError(503), HttpError(503, "soon"), "done"]
+    )
+
+    assert scheduler.generate("prompt") == "done"
+    first, second = clock.sleeps
+    assert 0.5 <= first <= 1.5
+    assert 1.0 <= second <= 3.0
+
+
+def test_non_retryable_errors_raise_at_once(clock, monkeypatch):
+    scheduler, calls = _scheduler(monkeypatch, [HttpError(400)])
+    with pytest.raises(HttpError):
+        scheduler.generate("prompt")
+    assert len(calls) == 1
+    assert clock.sleeps == []
+
+
+def test_retries_are_bounded(clock, monkeypatch):
+    scheduler, calls = _scheduler(
+        monkeypatch, [HttpError(429, "1")] * 3, max_retries=2
+    )
+    with pytest.raises(HttpError):
+        scheduler.generate("prompt")
+    assert len(calls) == 3
+    assert clock.sleeps == [1.0, 1.0]
+
+
+def test_generate_text_does_not_treat_other_numbers_as_auth_errors(monkeypatch):
+    clients = []
+
+    class Client:
+        def generate(self, prompt):
+            raise RuntimeError("upstream returned 401 bytes")
+
+    monkeypatch.setattr(
+        model, "get_model_client", lambda model_id: clients.append(1) or Client()
+    )
+    with pytest.raises(RuntimeError):
+        model.generate_text("model-a", "prompt")
+    assert len(clients) == 1
@@ -0,0 +1,66 @@
+import numpy as np
+from matcher import match_profiles_with_job_description
+from vector_index import VectorIndex
+
+
+def _index(profiles):
+    vectors = np.random.default_rng(2).normal(size=(len(profiles), 8))
+    return VectorIndex.from_embeddings(profiles, vectors.astype(np.float32))
+
+
+PROFILES = [
+    ("A", "a@example.com", "", "Acme", 2, ""),
+    ("B", "b@example.com", "", " acme ", 8, ""),
+    ("C", "c@example.com", "", "Globex", 12, ""),
+    ("D", "d@example.com", "", "Initech", "unknown", ""),
+    ("E", "e@example.com", "", None, 5, ""),
+]
+
+
+def test_no_filters_returns_none():
+    assert _index(PROFILES).filter_rows() is None
+
+
+def test_years_bounds_are_inclusive():
+    index = _index(PROFILES)
+    assert index.filter_rows(min_years_experience=5).tolist() == [1, 2, 4]
+    assert index.filter_rows(max_years_experience=8).tolist() == [0, 1, 4]
+    assert index.filter_rows(
+        min_years_experience=5, max_years_experience=8
+    ).tolist() == [1, 4]
+
+
+def test_unknown_years_never_pass_a_years_filter():
+    index = _index(PROFILES)
+    assert 3 not in index.filter_rows(min_years_experience=0).tolist()
+    assert 3 in index.filter_rows(exclude_organizations=["Globex"]).tolist()
+
+
+def test_excluded_organizations_are_normalized():
+    index = _index(PROFILES)
+    assert index.filter_rows(exclude_organizations=["ACME", "Nobody"]).tolist() == [
+        2,
+        3,
+        4,
+    ]
+
+
+def test_matching_only_returns_profiles_that_pass(add_resume):
+    add_resume("junior@example.com", "python sql", organization="Acme", years=1)
+    add_resume("senior@example.com", "python sql", organization="Acme", years=9)
+    add_resume("other@example.com", "python sql", organization="Globex", years=9)
+
+    results = match_profiles_with_job_description(
+        "python sql",
+        min_years_experience=3,
+        exclude_organizations=["globex"],
+        retrieval_mode="semantic",
+    )
+    assert [profile[1] for profile, _ in results] == ["senior@example.com"]
+
+    assert (
+        match_profiles_with_job_description(
+            "python sql", min_years_experience=50, retrieval_mode="semantic"
+        )
+        == []
+    )
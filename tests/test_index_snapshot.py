@@ -0,0 +1,247 @@
+import os
+import numpy as np
+import pytest
+import ann_index
+import index_snapshot
+import vector_index
+from index_snapshot import publisher_lock, read_current, snapshot_prefix
+from vector_index import VectorIndex, get_index, publish_snapshot
+
+# Kept before the fixtures below replace it
+PUBLISHER_LOOP = vector_index._publisher_loop
+
+
+def _profile(i, organization="Acme", years=5):
+    return (f"Name {i}", f"p{i}@example.com", "555-0100", organization, years, "x")
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(2).normal(size=(40, 16)).astype(np.float32)
+
+
+@pytest.fixture
+def snapshot_dir(tmp_path, monkeypatch):
+    directory = str(tmp_path / "snapshots")
+    monkeypatch.setattr(index_snapshot, "VECTOR_INDEX_SNAPSHOT_DIR", directory)
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_SNAPSHOT_DIR", directory)
+    # The background publisher is driven by hand in these tests
+    monkeypatch.setattr(vector_index, "_publisher_loop", lambda: None)
+    return directory
+
+
+def _saved(tmp_path, profiles, vectors):
+    prefix = str(tmp_path / "index-1")
+    VectorIndex.from_embeddings(profiles, vectors).save_snapshot(prefix)
+    return prefix
+
+
+def test_snapshot_round_trip_maps_profiles(tmp_path, vectors):
+    profiles = [_profile(i, years=None if i == 3 else i) for i in range(len(vectors))]
+    prefix = _saved(tmp_path, profiles, vectors)
+
+    index = VectorIndex.load_snapshot(prefix)
+    assert len(index) == len(profiles)
+    assert [index.profile_at(row) for row in range(len(index))] == profiles
+    assert isinstance(index._profiles._records._data, np.memmap)
+    for row in (0, 17, 39):
+        assert index.row_of(f"p{row}@example.com") == row
+    assert index.row_of("missing@example.com") is None
+    assert index.search(vectors[5], k=1)[0][0] == profiles[5]
+
+
+def test_upserts_after_loading_stay_private(tmp_path, vectors):
+    prefix = _saved(tmp_path, [_profile(i) for i in range(3)], vectors[:3])
+    index = VectorIndex.load_snapshot(prefix)
+
+    assert index.upsert(_profile(1, organization="Globex"), vectors[10]) == 1
+    assert index.upsert(_profile(3), vectors[11]) == 3
+    assert index.profile_at(1)[3] == "Globex"
+    assert index.row_of("p3@example.com") == 3
+    assert index.search(vectors[11], k=1)[0][0] == _profile(3)
+
+    reloaded = VectorIndex.load_snapshot(prefix)
+    assert len(reloaded) == 3
+    assert reloaded.profile_at(1)[3] == "Acme"
+    assert reloaded.row_of("p3@example.com") is None
+
+
+def test_empty_snapshot_round_trip(tmp_path):
+    prefix = _saved(tmp_path, [], np.empty((0, 0), dtype=np.float32))
+    index = VectorIndex.load_snapshot(prefix)
+    assert len(index) == 0
+    assert index.row_of("p0@example.com") is None
+
+
+def test_non_blocking_lock_is_refused_while_held(snapshot_dir):
+    with publisher_lock() as held:
+        assert held
+        with publisher_lock(blocking=False) as acquired:
+            assert not acquired
+    with publisher_lock(blocking=False) as acquired:
+        assert acquired
+
+
+def test_publish_records_the_rows_changed_since_the_previous_snapshot(
+    snapshot_dir, add_resume
+):
+    for i in range(3):
+        add_resume(f"p{i}@example.com", f"skill{i}")
+    publish_snapshot()
+    first = read_current()
+    assert "previous" not in first
+
+    add_resume("p1@example.com", "rust")
+    add_resume("p3@example.com", "go")
+    publish_snapshot()
+    second = read_current()
+    assert second["previous"] == first["version"]
+    assert second["built_at"] > first["built_at"]
+
+    index = VectorIndex.load_snapshot(snapshot_prefix(second))
+    changed = np.load(f"{snapshot_prefix(second)}.changed.npy")
+    assert sorted(index.profile_at(row)[1] for row in changed) == [
+        "p1@example.com",
+        "p3@example.com",
+    ]
+
+
+class _StopLoop(Exception):
+    pass
+
+
+@pytest.fixture
+def run_publisher(snapshot_dir, monkeypatch):
+    """Run one round of the publisher loop, recording the rebuilds it does."""
+    rebuilds = []
+    monkeypatch.setattr(
+        vector_index, "_rebuild_and_publish", lambda: rebuilds.append(True)
+    )
+
+    def run():
+        slept = []
+
+        def sleep(seconds):
+            if slept:
+                raise _StopLoop
+            slept.append(seconds)
+
+        monkeypatch.setattr(vector_index.time, "sleep", sleep)
+        with pytest.raises(_StopLoop):
+            PUBLISHER_LOOP()
+        return len(rebuilds)
+
+    return run
+
+
+def _write_pointer(snapshot_dir, built_at):
+    index_snapshot.publish(
+        "1-1",
+        os.path.join(snapshot_dir, "index-1-1"),
+        {
+            "storage": vector_index.VECTOR_STORAGE_DTYPE,
+            "model": vector_index.EMBEDDING_MODEL_ID,
+            "size": 0,
+            "built_at": built_at,
+        },
+        directory=snapshot_dir,
+    )
+
+
+def test_publisher_idles_without_upserts(run_publisher):
+    assert run_publisher() == 0
+
+
+def test_publisher_skips_upserts_already_in_the_snapshot(
+    run_publisher, snapshot_dir, monkeypatch
+):
+    os.makedirs(snapshot_dir)
+    _write_pointer(snapshot_dir, built_at=200)
+    monkeypatch.setattr(vector_index, "_last_upsert_at", 100)
+    assert run_publisher() == 0
+
+
+def test_publisher_rebuilds_for_newer_upserts(run_publisher, snapshot_dir, monkeypatch):
+    os.makedirs(snapshot_dir)
+    _write_pointer(snapshot_dir, built_at=100)
+    monkeypatch.setattr(vector_index, "_last_upsert_at", 200)
+    assert run_publisher() == 1
+
+
+def test_publisher_leaves_the_rebuild_to_the_lock_holder(
+    run_publisher, snapshot_dir, monkeypatch
+):
+    monkeypatch.setattr(vector_index, "_last_upsert_at", 200)
+    with publisher_lock():
+        assert run_publisher() == 0
+
+
+def test_swap_patches_the_graph_with_changed_rows_only(
+    snapshot_dir, add_resume, encoder, monkeypatch, tmp_path
+):
+    pytest.importorskip("hnswlib")
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_BACKEND", "hnsw")
+    monkeypatch.setattr(ann_index, "ANN_MIN_PROFILES", 0)
+    # Keep the graph file out of the shared scratch directory
+    monkeypatch.setattr(
+        ann_index.HnswIndex.__init__, "__defaults__", (str(tmp_path / "ann.bin"), 64)
+    )
+    for i in range(3):
+        add_resume(f"p{i}@example.com", f"skill{i} python")
+    index = get_index()
+    assert isinstance(index, ann_index.HnswIndex)
+
+    # Uploaded through another worker: only the shared snapshot has it
+    vector_index._index = None
+    add_resume("p3@example.com", "haskell compilers")
+    vector_index._index = index
+    publish_snapshot()
+
+    rebound = []
+    original_rebind = ann_index.HnswIndex.rebind
+
+    def rebind(self, exact_index, changed_rows):
+        rebound.append([exact_index.profile_at(row)[1] for row in changed_rows])
+        return original_rebind(self, exact_index, changed_rows)
+
+    def load(self):
+        raise AssertionError("the graph should not be reloaded")
+
+    monkeypatch.setattr(ann_index.HnswIndex, "rebind", rebind)
+    monkeypatch.setattr(ann_index.HnswIndex, "load", load)
+    monkeypatch.setattr(vector_index, "_snapshot_checked_at", 0.0)
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_POLL_SECONDS", 0.0)
+
+    assert get_index() is index
+    assert rebound == [["p3@example.com"]]
+    assert index.row_of("p3@example.com") == 3
+    query = encoder.encode(["haskell compilers"])[0]
+    assert index.search(query, k=1)[0][0][1] == "p3@example.com"
+
+
+def _swap(monkeypatch):
+    monkeypatch.setattr(vector_index, "_snapshot_checked_at", 0.0)
+    monkeypatch.setattr(vector_index, "VECTOR_INDEX_POLL_SECONDS", 0.0)
+    return get_index()
+
+
+def test_swap_keeps_upserts_the_snapshot_predates(
+    snapshot_dir, add_resume, monkeypatch
+):
+    add_resume("a@example.com", "python")
+    get_index()
+    # Built before the next upload reaches SQLite, published after it
+    publish_snapshot()
+    add_resume("b@example.com", "haskell")
+    assert "b@example.com" in vector_index._pending_upserts
+
+    index = _swap(monkeypatch)
+    assert vector_index._snapshot_version == read_current()["version"]
+    assert index.row_of("b@example.com") is not None
+    assert index.profile_at(index.row_of("b@example.com"))[5] == "haskell"
+
+    # A snapshot built after the upsert includes it, so it is no longer pending
+    publish_snapshot()
+    index = _swap(monkeypatch)
+    assert vector_index._pending_upserts == {}
+    assert index.row_of("b@example.com") is not None
@@ -0,0 +1,136 @@
+import os
+import sqlite3
+import jobs
+from database import connection
+from jobs import (
+    claim_files,
+    enqueue_upload_job,
+    finish_file,
+    get_job,
+    renew_leases,
+    requeue_interrupted_files,
+)
+
+PROMPT = "Extract the resume as JSON. {text}"
+
+
+def resume_text(email):
+    return (
+        f"Jane Doe, {email}. Senior data engineer at Acme with eight years of "
+        "experience.\nSkills: Python, SQL"
+    )
+
+
+def _file_statuses(db_path, job_id):
+    return [f["status"] for f in get_job(db_path, job_id)["files"]]
+
+
+def test_job_moves_from_queued_to_completed(db_path, spool_files):
+    job_id = enqueue_upload_job(db_path, spool_files([b"a", b"b"]))
+    job = get_job(db_path, job_id)
+    assert job["status"] == "queued"
+    assert job["total_files"] == 2
+    assert _file_statuses(db_path, job_id) == ["queued", "queued"]
+
+    first = claim_files(db_path)
+    assert [claimed[:2] for claimed in first] == [(job_id, 0)]
+    assert get_job(db_path, job_id)["status"] == "processing"
+    second = claim_files(db_path, limit=5)
+    assert [claimed[:2] for claimed in second] == [(job_id, 1)]
+    assert claim_files(db_path) == []
+
+    finish_file(db_path, job_id, 0, result={"email": "a@example.com"})
+    assert get_job(db_path, job_id)["status"] == "processing"
+    finish_file(db_path, job_id, 1, error="Failed to process resume")
+
+    job = get_job(db_path, job_id)
+    assert job["status"] == "completed"
+    assert (job["completed_files"], job["failed_files"]) == (1, 1)
+    assert job["files"][0]["result"] == {"email": "a@example.com"}
+    assert job["files"][1]["error"] == "Failed to process resume"
+
+
+def test_jobs_are_claimed_oldest_first(db_path, spool_files):
+    older = enqueue_upload_job(db_path, spool_files([b"a"]))
+    newer = enqueue_upload_job(db_path, spool_files([b"b"]))
+    assert [claimed[0] for claimed in claim_files(db_path, limit=2)] == [
+        older,
+        newer,
+    ]
+
+
+def test_interrupted_files_are_requeued(db_path, spool_files, monkeypatch):
+    job_id = enqueue_upload_job(db_path, spool_files([b"a", b"b"]))
+    monkeypatch.setattr(jobs, "UPLOAD_JOB_LEASE_SECONDS", -1)
+    claim_files(db_path)
+
+    assert requeue_interrupted_files(db_path) == 1
+    assert _file_statuses(db_path, job_id) == ["queued", "queued"]
+    assert len(claim_files(db_path, limit=5)) == 2
+
+
+def test_live_claims_are_not_requeued(db_path, spool_files, monkeypatch):
+    job_id = enqueue_upload_job(db_path, spool_files([b"a"]))
+    claim_files(db_path)
+
+    # Another process starting up must leave this process's claim alone
+    monkeypatch.setattr(jobs, "_owner", "other-host:1:abcd1234")
+    assert requeue_interrupted_files(db_path) == 0
+    assert _file_statuses(db_path, job_id) == ["processing"]
+
+
+def test_claims_record_owner_and_renewed_lease(db_path, spool_files, monkeypatch):
+    job_id = enqueue_upload_job(db_path, spool_files([b"a"]))
+    monkeypatch.setattr(jobs, "UPLOAD_JOB_LEASE_SECONDS", -1)
+    claim_files(db_path)
+
+    monkeypatch.setattr(jobs, "UPLOAD_JOB_LEASE_SECONDS", 120)
+    assert renew_leases(db_path) == 1
+    assert requeue_interrupted_files(db_path) == 0
+    with connection(db_path) as conn:
+        owner, expires_at = conn.execute(
+            """SELECT Claimed_By, Lease_Expires_At FROM upload_job_files
+                WHERE Job_Id = ?""",
+            (job_id,),
+        ).fetchone()
+    assert owner == jobs._owner
+    assert expires_at > jobs._now()
+
+    # Another process's heartbeat does not touch claims it does not own
+    monkeypatch.setattr(jobs, "_owner", "other-host:1:abcd1234")
+    assert renew_leases(db_path) == 0
+
+
+def test_unknown_job_is_none(db_path):
+    assert get_job(db_path, "missing") is None
+
+
+def test_claimed_files_are_processed_and_discarded(
+    db_path, spool_files, make_pdf, fake_llm
+):
+    spooled = spool_files([make_pdf([resume_text("jane@example.com")]), b"junk"])
+    job_id = enqueue_upload_job(db_path, spooled)
+
+    jobs._process_claimed(claim_files(db_path, limit=2), "model-a", PROMPT, db_path)
+
+    job = get_job(db_path, job_id)
+    assert job["status"] == "completed"
+    assert job["files"][0]["status"] == "completed"
+    assert job["files"][0]["result"]["email"] == "jane@example.com"
+    assert job["files"][1]["status"] == "failed"
+    assert all(not os.path.exists(path) for _, path, _ in spooled)
+
+
+def test_queue_created_without_leases_is_migrated(tmp_path):
+    conn = sqlite3.connect(tmp_path / "old.db")
+    conn.execute(
+        """CREATE TABLE upload_job_files
+             (Job_Id TEXT, File_Index INTEGER, Filename TEXT, Status TEXT,
+              Pdf_Path TEXT, Pdf_Size INTEGER, Result_Json TEXT, Error TEXT,
+              Updated_At TEXT, PRIMARY KEY (Job_Id, File_Index))"""
+    )
+    jobs.create_job_tables(conn)
+
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(upload_job_files)")}
+    assert {"Claimed_By", "Lease_Expires_At"} <= columns
+    conn.close()
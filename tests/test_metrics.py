@@ -0,0 +1,104 @@
+import pytest
+from fastapi.testclient import TestClient
+import main
+import metrics
+from metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    server_timing_header,
+    start_request_timings,
+    timed,
+)
+
+
+@pytest.fixture(autouse=True)
+def registry(monkeypatch):
+    # Metrics made by a test are left out of the process-wide registry
+    monkeypatch.setattr(metrics, "_metrics", list(metrics._metrics))
+
+
+def test_metric_base_cannot_be_instantiated():
+    with pytest.raises(TypeError):
+        metrics._Metric("base", "Abstract.")
+
+
+def test_subclass_without_samples_cannot_be_instantiated():
+    class Summary(metrics._Metric):
+        type_name = "summary"
+
+    with pytest.raises(TypeError):
+        Summary("summary", "No samples.")
+
+
+def test_counter_renders_one_series_per_label_set():
+    counter = Counter("jobs_total", "Jobs.", ("state",))
+    counter.inc(state="done")
+    counter.inc(2, state="done")
+    counter.inc(state='say "hi"')
+
+    assert counter.render().splitlines() == [
+        "# HELP jobs_total Jobs.",
+        "# TYPE jobs_total counter",
+        'jobs_total{state="done"} 3.0',
+        'jobs_total{state="say \\"hi\\""} 1.0',
+    ]
+
+
+def test_unlabelled_metrics_start_at_zero():
+    assert Counter("starts_total", "Starts.").render().endswith("starts_total 0.0")
+
+
+def test_gauge_set_inc_dec_and_functions(capsys):
+    gauge = Gauge("depth", "Depth.", ("queue",))
+    gauge.set(5, queue="a")
+    gauge.dec(2, queue="a")
+    gauge.set_function(lambda: 7, queue="b")
+    gauge.set_function(lambda: 1 / 0, queue="c")
+
+    lines = gauge.render().splitlines()
+    assert 'depth{queue="a"} 3.0' in lines
+    assert 'depth{queue="b"} 7.0' in lines
+    assert not any('queue="c"' in line for line in lines)
+    assert "Error collecting metric depth" in capsys.readouterr().out
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram("latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(value)
+
+    assert histogram.render().splitlines()[2:] == [
+        'latency_seconds_bucket{le="0.1"} 1.0',
+        'latency_seconds_bucket{le="1.0"} 3.0',
+        'latency_seconds_bucket{le="+Inf"} 4.0',
+        "latency_seconds_sum 4.25",
+        "latency_seconds_count 4.0",
+    ]
+
+
+def test_timed_counts_errors_and_collects_request_timings():
+    timings = start_request_timings()
+    with timed("unit-test-stage"):
+        pass
+    with pytest.raises(ValueError):
+        with timed("unit-test-stage"):
+            raise ValueError("boom")
+
+    assert [stage for stage, _ in timings] == ["unit-test-stage"] * 2
+    assert 'stage="unit-test-stage"} 1.0' in metrics.STAGE_ERRORS.render()
+
+
+def test_server_timing_header_sums_repeated_stages():
+    header = server_timing_header([("embed", 0.01), ("embed", 0.02)], 0.05)
+    assert header == "embed;dur=30.0, total;dur=50.0"
+
+
+def test_metrics_endpoint_renders_the_registry():
+    Counter("endpoint_test_total", "Rendered by /metrics.").inc()
+    response = TestClient(main.app).get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert "endpoint_test_total 1.0" in response.text
+    assert "# TYPE resume_matcher_stage_seconds histogram" in response.text
@@ -0,0 +1,94 @@
+import sys
+import pytest
+import model
+
+
+class FakeClient:
+    def __init__(self, model_id, responses=()):
+        self.model_id = model_id
+        self.responses = list(responses)
+
+    def generate(self, prompt):
+        if self.responses:
+            response = self.responses.pop(0)
+            if isinstance(response, Exception):
+                raise response
+            return response
+        return {"results": [{"generated_text": f"{self.model_id}: {prompt}"}]}
+
+
+class AuthError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"Status code: {status_code}")
+        self.response = type("Response", (), {"status_code": status_code})()
+
+
+@pytest.fixture
+def built(monkeypatch):
+    """Record every client initialize_model builds."""
+    clients = []
+
+    def initialize(model_id):
+        clients.append(FakeClient(model_id))
+        return clients[-1]
+
+    monkeypatch.setattr(model, "initialize_model", initialize)
+    monkeypatch.setattr(model, "_client_pool", {})
+    return clients
+
+
+def test_clients_are_pooled_per_model(built):
+    first = model.get_model_client("model-a")
+    assert model.get_model_client("model-a") is first
+    assert model.get_model_client("model-b") is not first
+    assert [client.model_id for client in built] == ["model-a", "model-b"]
+
+
+def test_clients_are_rebuilt_after_the_ttl(built, monkeypatch):
+    first = model.get_model_client("model-a")
+    monkeypatch.setattr(model, "WATSONX_CLIENT_TTL", -1)
+    assert model.get_model_client("model-a") is not first
+
+
+def test_failed_initialization_raises(monkeypatch):
+    monkeypatch.setattr(model, "initialize_model", lambda model_id: None)
+    monkeypatch.setattr(model, "_client_pool", {})
+    with pytest.raises(RuntimeError):
+        model.get_model_client("model-a")
+
+
+def test_auth_errors_rebuild_the_client_once(built, monkeypatch):
+    client = model.get_model_client("model-a")
+    client.responses = [AuthError(401)]
+
+    assert model.generate_text("model-a", "hello") == "model-a: hello"
+    assert len(built) == 2
+
+
+def test_other_errors_are_raised(built):
+    model.get_model_client("model-a").responses = [AuthError(500)]
+    with pytest.raises(AuthError):
+        model.generate_text("model-a", "hello")
+    assert len(built) == 1
+
+
+def test_generation_url_skips_the_watsonx_sdk(monkeypatch):
+    created = []
+
+    class FakeHttpClient:
+        def __init__(self, url, model_id, params):
+            created.append((url, model_id, params))
+
+    monkeypatch.setattr(model, "GENERATION_URL", "http://localhost:9000")
+    monkeypatch.setattr(model, "HttpGenerationClient", FakeHttpClient)
+    # Any import of the SDK fails loudly
+    monkeypatch.setitem(sys.modules, "ibm_watson_machine_learning", None)
+
+    assert isinstance(model.initialize_model("model-a"), FakeHttpClient)
+    assert created == [
+        (
+            "http://localhost:9000",
+            "model-a",
+            {"decoding_method": "greedy", "max_new_tokens": 1024},
+        )
+    ]
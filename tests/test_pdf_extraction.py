@@ -0,0 +1,105 @@
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import pdf_extraction
+from extraction_cache import get_cached_text, sha256_hex
+from pdf_extraction import extract_text_from_pdf, is_usable_text
+from utils import extract_resume_text
+
+RESUME_TEXT = (
+    "Jane Doe, jane@example.com. Senior data engineer at Acme with eight years "
+    "of Python, SQL and Spark experience."
+)
+
+
+@pytest.fixture
+def ocr_calls(monkeypatch):
+    """Run OCR in threads with a fake recognizer that records the pages."""
+    calls = []
+
+    def fake_ocr_page(pdf_bytes, page_number, dpi, grayscale):
+        calls.append(page_number)
+        return f"ocr text of page {page_number}", {"tesseract": 0.01}
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(pdf_extraction, "_ocr_page", fake_ocr_page)
+    monkeypatch.setattr(pdf_extraction, "get_ocr_pool", lambda: pool)
+    yield calls
+    pool.shutdown()
+
+
+def test_is_usable_text_rejects_short_or_garbled_layers():
+    assert is_usable_text(RESUME_TEXT)
+    assert not is_usable_text("Jane Doe")
+    assert not is_usable_text("�\x01\x02" * 40)
+
+
+def test_digital_pdf_skips_ocr(ocr_calls, make_pdf):
+    text, stats = extract_text_from_pdf(make_pdf([RESUME_TEXT, RESUME_TEXT]))
+
+    assert ocr_calls == []
+    assert "Senior data engineer" in text
+    assert stats["pages"] == stats["text_layer_pages"] == 2
+    assert stats["ocr_pages"] == 0
+
+
+def test_only_pages_without_a_text_layer_are_ocrd(ocr_calls, make_pdf):
+    text, stats = extract_text_from_pdf(make_pdf([RESUME_TEXT, "", RESUME_TEXT]))
+
+    assert ocr_calls == [1]
+    assert text.index("Senior data engineer") < text.index("ocr text of page 1")
+    assert stats["text_layer_pages"] == 2
+    assert stats["ocr_pages"] == 1
+
+
+
+def test_unopenable_pdf_is_ocrd_page_by_page(ocr_calls, monkeypatch):
+    def broken_open(*args, **kwargs):
+        raise RuntimeError("cannot open broken document")
+
+    monkeypatch.setattr(pdf_extraction.fitz, "open", broken_open)
+    monkeypatch.setattr(
+        pdf_extraction, "pdfinfo_from_bytes", lambda _: {"Pages": 3}
+    )
+
+    text, stats = extract_text_from_pdf(b"%PDF-broken")
+    assert sorted(ocr_calls) == [0, 1, 2]
+    assert text.splitlines() == [f"ocr text of page {i}" for i in range(3)]
+    assert stats["pages"] == stats["ocr_pages"] == 3
+
+
+def test_unreadable_file_raises(ocr_calls, monkeypatch):
+    def no_info(_):
+        raise RuntimeError("Syntax Error: Couldn't find trailer dictionary")
+
+    monkeypatch.setattr(pdf_extraction, "pdfinfo_from_bytes", no_info)
+    with pytest.raises(ValueError):
+        extract_text_from_pdf(b"not a pdf")
+    assert ocr_calls == []
+
+
+def test_failed_pages_are_left_out_and_not_cached(
+    db_path, monkeypatch, ocr_calls, make_pdf
+):
+    def failing_ocr_page(pdf_bytes, page_number, dpi, grayscale):
+        if page_number == 1:
+            return pdf_extraction.EXTRACT_FAILED_TEXT, {}
+        return f"ocr text of page {page_number}", {}
+
+    monkeypatch.setattr(pdf_extraction, "_ocr_page", failing_ocr_page)
+    pdf_bytes = make_pdf([RESUME_TEXT, "", ""])
+
+    text, stats = extract_resume_text(pdf_bytes, db_path)
+    assert pdf_extraction.EXTRACT_FAILED_TEXT not in text
+    assert "ocr text of page 2" in text
+    assert stats["failed_pages"] == 1
+    assert get_cached_text(db_path, sha256_hex(pdf_bytes)) is None
+
+
+def test_pdf_without_any_readable_page_raises(monkeypatch, ocr_calls, make_pdf):
+    monkeypatch.setattr(
+        pdf_extraction,
+        "_ocr_page",
+        lambda *args: (pdf_extraction.CONVERT_FAILED_TEXT, {}),
+    )
+    with pytest.raises(ValueError):
+        extract_text_from_pdf(make_pdf(["", ""]))
@@ -0,0 +1,65 @@
+import time
+from matcher import match_profiles_with_job_description
+from query_cache import (
+    QueryCache,
+    get_query_cache_stats,
+    normalize_query,
+    top_matches_cache,
+)
+
+
+def test_normalize_query_folds_case_whitespace_and_unicode():
+    assert normalize_query("  Senior\tPython\n\nEngineer ") == "senior python engineer"
+    assert normalize_query("ＰＹＴＨＯＮ") == "python"
+    assert normalize_query(None) == ""
+
+
+def test_entries_expire_after_the_ttl():
+    cache = QueryCache("test", maxsize=2, ttl=0.05)
+    cache.put("a", 1)
+    assert cache.get("a") == 1
+    time.sleep(0.1)
+    assert cache.get("a") is None
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_ratio": 0.5}
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = QueryCache("test", maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+
+
+def test_repeated_job_description_is_embedded_once(add_resume, encoder):
+    add_resume("jane@example.com", "python sql")
+    encoded = encoder.encoded
+
+    first = match_profiles_with_job_description(
+        "Python  SQL", retrieval_mode="semantic"
+    )
+    hits = get_query_cache_stats()["top_matches"]["hits"]
+    again = match_profiles_with_job_description("python sql", retrieval_mode="semantic")
+    assert again == first
+    assert encoder.encoded == encoded + 1
+    assert get_query_cache_stats()["top_matches"]["hits"] == hits + 1
+
+    # Another mode reuses the embedding but not the ranking
+    match_profiles_with_job_description("python sql", retrieval_mode="hybrid")
+    assert encoder.encoded == encoded + 1
+
+
+def test_rankings_are_invalidated_when_the_index_changes(add_resume):
+    add_resume("jane@example.com", "python sql")
+    first = match_profiles_with_job_description("python sql", retrieval_mode="semantic")
+    assert [profile[1] for profile, _ in first] == ["jane@example.com"]
+
+    add_resume("john@example.com", "python sql")
+    assert len(top_matches_cache._cache) == 0
+    again = match_profiles_with_job_description("python sql", retrieval_mode="semantic")
+    assert {profile[1] for profile, _ in again} == {
+        "jane@example.com",
+        "john@example.com",
+    }
@@ -0,0 +1,62 @@
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+
+@pytest.fixture
+def readiness(monkeypatch, encoder):
+    monkeypatch.setattr(main, "_readiness", dict.fromkeys(main._readiness, False))
+    monkeypatch.setattr(main, "_warm_up_error", None)
+    monkeypatch.setattr(main, "get_embedding_model", lambda: encoder)
+    return main._readiness
+
+
+def _ready():
+    return TestClient(main.app).get("/ready")
+
+
+def test_not_ready_until_warmed_up(readiness, add_resume):
+    add_resume("jane@example.com", "python")
+    response = _ready()
+    assert response.status_code == 503
+    assert response.json()["components"] == {
+        "embedding_model": False,
+        "matching_index": False,
+    }
+
+    main._warm_up()
+    response = _ready()
+    assert response.status_code == 200
+    assert response.json()["ready"] is True
+
+
+def test_warm_up_failure_is_reported(readiness, monkeypatch):
+    def broken_index():
+        raise RuntimeError("index unavailable")
+
+    monkeypatch.setattr(main, "get_index", broken_index)
+    main._warm_up()
+
+    response = _ready()
+    assert response.status_code == 503
+    body = response.json()
+    assert body["components"]["embedding_model"] is True
+    assert body["components"]["matching_index"] is False
+    assert body["error"] == "index unavailable"
+
+
+def test_cross_encoder_is_warmed_up_when_reranking(readiness, monkeypatch):
+    predicted = []
+
+    class CrossEncoder:
+        def predict(self, pairs):
+            predicted.append(pairs)
+            return [0.0] * len(pairs)
+
+    monkeypatch.setattr(main, "CROSS_ENCODER_RERANK", True)
+    monkeypatch.setitem(readiness, "cross_encoder", False)
+    monkeypatch.setattr(main, "get_cross_encoder", CrossEncoder)
+    main._warm_up()
+
+    assert predicted == [[("warm-up", "warm-up")]]
+    assert _ready().json()["components"]["cross_encoder"] is True
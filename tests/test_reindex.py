@@ -0,0 +1,120 @@
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+import embedding_store
+import index_snapshot
+import reindex
+import utils
+from index_snapshot import read_current
+
+
+@pytest.fixture(autouse=True)
+def in_process_pool(monkeypatch):
+    # Spawned workers would load the real embedding model
+    def pool(max_workers, mp_context, initializer, initargs):
+        return ThreadPoolExecutor(max_workers=max_workers)
+
+    monkeypatch.setattr(reindex, "ProcessPoolExecutor", pool)
+
+
+@pytest.fixture
+def new_model(monkeypatch):
+    monkeypatch.setattr(reindex, "EMBEDDING_MODEL_ID", "new-model")
+    monkeypatch.setattr(embedding_store, "EMBEDDING_MODEL_ID", "new-model")
+
+
+@pytest.fixture
+def candidates(add_resume):
+    for i in range(5):
+        add_resume(f"c{i}@example.com", f"skill{i} python")
+
+
+def _models(db_path, table="resume_embeddings"):
+    with sqlite3.connect(db_path) as conn:
+        return dict(conn.execute(f"SELECT Email, Model_Name FROM {table}"))
+
+
+def _has_staging_table(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return bool(
+            conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = ?", (reindex.STAGING_TABLE,)
+            ).fetchone()
+        )
+
+
+def test_reindex_cuts_over_once_every_profile_is_staged(
+    db_path, candidates, new_model, encoder
+):
+    encoded = encoder.encoded
+    reindex.reindex(db_path, workers=2, chunk_size=2)
+
+    assert encoder.encoded - encoded == 5
+    assert set(_models(db_path).values()) == {"new-model"}
+    assert not _has_staging_table(db_path)
+
+
+def test_stage_only_keeps_serving_the_old_vectors(db_path, candidates, new_model):
+    old = _models(db_path)
+    reindex.reindex(db_path, workers=1, chunk_size=2, stage_only=True)
+
+    assert _models(db_path) == old
+    assert set(_models(db_path, reindex.STAGING_TABLE).values()) == {"new-model"}
+
+
+def test_a_second_run_resumes_from_the_staged_vectors(
+    db_path, candidates, new_model, encoder
+):
+    reindex.reindex(db_path, workers=1, chunk_size=2, stage_only=True)
+    encoded = encoder.encoded
+    reindex.reindex(db_path, workers=1, chunk_size=2)
+
+    assert encoder.encoded == encoded
+    assert set(_models(db_path).values()) == {"new-model"}
+
+
+def test_no_cut_over_while_profiles_keep_changing(
+    db_path, candidates, new_model, monkeypatch
+):
+    old = _models(db_path)
+    monkeypatch.setattr(reindex, "embed_pass", lambda *args: 1)
+
+    with pytest.raises(RuntimeError, match="still changing"):
+        reindex.reindex(db_path, workers=1, chunk_size=2)
+    assert _models(db_path) == old
+    assert _has_staging_table(db_path)
+
+
+def test_unsettled_run_exits_non_zero(db_path, candidates, monkeypatch, capsys):
+    monkeypatch.setattr(reindex, "embed_pass", lambda *args: 1)
+    monkeypatch.setattr(reindex, "close_database", lambda: None)
+    monkeypatch.setattr(
+        "sys.argv", ["reindex.py", "--db-path", db_path, "--workers", "1"]
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        reindex.main()
+    assert exit_info.value.code == 1
+    assert "Staged vectors are kept" in capsys.readouterr().out
+
+
+def test_snapshot_is_built_from_the_reindexed_database(
+    db_path, candidates, new_model, tmp_path, monkeypatch
+):
+    snapshot_dir = str(tmp_path / "snapshots")
+    monkeypatch.setattr(reindex, "VECTOR_INDEX_SNAPSHOT_DIR", snapshot_dir)
+    monkeypatch.setattr(index_snapshot, "VECTOR_INDEX_SNAPSHOT_DIR", snapshot_dir)
+    other_db = str(tmp_path / "other.db")
+    for i in range(2):
+        resume = {
+            "name": f"o{i}",
+            "email": f"o{i}@example.com",
+            "phone_number": "555-0100",
+            "current_organization": "Acme",
+            "years_experience": 3,
+            "skills": "go",
+        }
+        utils.store_resume(resume, {}, other_db)
+
+    reindex.reindex(other_db, workers=1, chunk_size=2)
+    assert read_current(snapshot_dir)["size"] == 2
@@ -0,0 +1,154 @@
+import sys
+import threading
+import types
+import pytest
+import matcher
+import model
+from matcher import match_profiles_with_job_description, rerank_with_cross_encoder
+
+
+def _profile(i, skills):
+    return (f"Name {i}", f"p{i}@example.com", "555-0100", "Acme", 5, skills)
+
+
+def _emails(results):
+    return [profile[1] for profile, _ in results]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def perf_counter(self):
+        return self.now
+
+
+class FakeCrossEncoder:
+    """Scores pairs by how often "rust" appears, taking `seconds` per batch."""
+
+    def __init__(self, clock=None, seconds=0.0, error=None):
+        self.clock = clock
+        self.seconds = seconds
+        self.error = error
+        self.batches = []
+
+    def predict(self, pairs, batch_size=32):
+        if self.error:
+            raise self.error
+        self.batches.append(len(pairs))
+        if self.clock:
+            self.clock.now += self.seconds
+        return [text.count("rust") for _, text in pairs]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(matcher.time, "perf_counter", clock.perf_counter)
+    return clock
+
+
+@pytest.fixture
+def first_stage():
+    # Best first by first-stage score; the cross-encoder prefers the last ones
+    return [(_profile(i, "rust " * i), 1.0 - i / 10) for i in range(6)]
+
+
+@pytest.fixture
+def cross_encoder(monkeypatch, clock):
+    encoder = FakeCrossEncoder(clock, seconds=0.1)
+    monkeypatch.setattr(matcher, "get_cross_encoder", lambda: encoder)
+    monkeypatch.setattr(matcher, "CROSS_ENCODER_BATCH_SIZE", 2)
+    return encoder
+
+
+def test_rerank_reorders_within_the_deadline(cross_encoder, clock, first_stage):
+    results, outcome = rerank_with_cross_encoder(
+        "rust engineer", first_stage, deadline=clock.now + 1.0, k=3
+    )
+    assert outcome == "completed"
+    assert _emails(results) == ["p5@example.com", "p4@example.com", "p3@example.com"]
+    assert cross_encoder.batches == [2, 2, 2]
+
+
+def test_rerank_stops_before_a_batch_that_would_miss_the_deadline(
+    cross_encoder, clock, first_stage
+):
+    # Batches take 0.1s: the third would start at 0.2s and end past 0.25s
+    results, outcome = rerank_with_cross_encoder(
+        "rust engineer", first_stage, deadline=clock.now + 0.25, k=3
+    )
+    assert outcome == "deadline_exceeded"
+    assert cross_encoder.batches == [2, 2]
+    assert results == first_stage[:3]
+
+
+def test_rerank_errors_fall_back_to_the_first_stage(monkeypatch, first_stage):
+    encoder = FakeCrossEncoder(error=RuntimeError("model failed"))
+    monkeypatch.setattr(matcher, "get_cross_encoder", lambda: encoder)
+
+    results, outcome = rerank_with_cross_encoder(
+        "rust engineer", first_stage, deadline=float("inf"), k=3
+    )
+    assert outcome == "error"
+    assert results == first_stage[:3]
+
+
+@pytest.fixture
+def candidates(add_resume):
+    for i in range(4):
+        add_resume(f"c{i}@example.com", "python " * (4 - i) + "rust " * i)
+
+
+def _rerank_count(outcome):
+    return matcher.RERANK_OUTCOMES._values.get((outcome,), 0)
+
+
+def test_fallback_rankings_are_not_cached(candidates, monkeypatch, encoder):
+    monkeypatch.setattr(matcher, "CROSS_ENCODER_DEADLINE_MS", 0)
+    cross_encoder = FakeCrossEncoder()
+    monkeypatch.setattr(matcher, "get_cross_encoder", lambda: cross_encoder)
+    exceeded = _rerank_count("deadline_exceeded")
+
+    first = match_profiles_with_job_description(
+        "python rust", retrieval_mode="semantic", rerank=True
+    )
+    unranked = match_profiles_with_job_description(
+        "python rust", retrieval_mode="semantic", rerank=False
+    )
+    assert first == unranked
+    assert cross_encoder.batches == []
+    assert _rerank_count("deadline_exceeded") == exceeded + 1
+
+    # The next request retries the rerank instead of reading the fallback
+    monkeypatch.setattr(matcher, "CROSS_ENCODER_DEADLINE_MS", 60_000)
+    reranked = match_profiles_with_job_description(
+        "python rust", retrieval_mode="semantic", rerank=True
+    )
+    assert cross_encoder.batches
+    assert _emails(reranked)[0] == "c3@example.com"
+
+
+def test_cross_encoder_load_does_not_wait_for_the_embedding_model(monkeypatch):
+    loaded = []
+
+    class CrossEncoder:
+        def __init__(self, name):
+            loaded.append(name)
+
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        types.SimpleNamespace(CrossEncoder=CrossEncoder),
+    )
+    monkeypatch.setattr(model, "_cross_encoder", None)
+    monkeypatch.setattr(model, "CROSS_ENCODER_MODEL_PATH", None)
+    monkeypatch.setattr(model, "EMBEDDING_MODEL_OFFLINE", False)
+
+    # As if the embedding model were being loaded on another thread
+    with model._embedding_model_lock:
+        thread = threading.Thread(target=model.get_cross_encoder)
+        thread.start()
+        thread.join(timeout=5)
+        assert not thread.is_alive()
+    assert loaded == [model.CROSS_ENCODER_MODEL]
@@ -0,0 +1,82 @@
+import pytest
+from fastapi.testclient import TestClient
+import main
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def candidates(add_resume):
+    add_resume("jane@example.com", "python sql spark")
+    add_resume("john@example.com", "python django")
+    add_resume("ann@example.com", "java spring")
+
+
+def _search(client, job_description):
+    response = client.post("/top-matches", json={"job_description": job_description})
+    assert response.status_code == 200
+    return response.json()
+
+
+def _mark(client, search_id, email, interested=True):
+    return client.post(
+        "/update-availability",
+        json={
+            "search_id": search_id,
+            "email": email,
+            "interested": interested,
+            "interview_time": "2026-01-05T10:00:00" if interested else None,
+        },
+    )
+
+
+def _interested(client, search_id):
+    response = client.get("/available-candidates", params={"search_id": search_id})
+    assert response.status_code == 200
+    return [p["email"] for p in response.json()["interested_profiles"]]
+
+
+def test_each_search_keeps_its_own_shortlist(client, candidates):
+    first = _search(client, "python sql engineer")
+    second = _search(client, "java developer")
+    assert first["search_id"] != second["search_id"]
+    assert [p["rank"] for p in first["top_matches"]] == [1, 2, 3]
+
+    assert _mark(client, first["search_id"], "jane@example.com").status_code == 200
+    assert _mark(client, second["search_id"], "ann@example.com").status_code == 200
+
+    # A later search neither replaces nor sees the earlier shortlist's marks
+    assert _interested(client, first["search_id"]) == ["jane@example.com"]
+    assert _interested(client, second["search_id"]) == ["ann@example.com"]
+
+
+def test_interest_can_be_withdrawn(client, candidates):
+    search_id = _search(client, "python")["search_id"]
+    _mark(client, search_id, "jane@example.com")
+    _mark(client, search_id, "jane@example.com", interested=False)
+    assert _interested(client, search_id) == []
+
+
+def test_unknown_search_or_email_is_404(client, candidates):
+    search_id = _search(client, "python")["search_id"]
+    assert _mark(client, search_id, "nobody@example.com").status_code == 404
+    assert _mark(client, "missing", "jane@example.com").status_code == 404
+    response = client.get("/available-candidates", params={"search_id": "missing"})
+    assert response.status_code == 404
+
+
+def test_interest_requires_an_interview_time(client, candidates):
+    search_id = _search(client, "python")["search_id"]
+    response = client.post(
+        "/update-availability",
+        json={
+            "search_id": search_id,
+            "email": "jane@example.com",
+            "interested": True,
+            "interview_time": None,
+        },
+    )
+    assert response.status_code == 400
@@ -0,0 +1,113 @@
+import sqlite3
+from database import connection, open_connection, write
+from matcher import match_profiles_with_job_description
+from skill_index import build_match_query, search_skills
+from utils import create_resumes_table, upsert_resume
+
+
+def _insert(db_path, email, skills, organization="Acme", years=5):
+    write(
+        lambda conn: upsert_resume(
+            conn, ("Name", email, "555-0100", organization, years, skills)
+        ),
+        db_path,
+    )
+
+
+def test_build_match_query_drops_stopwords_and_repeats():
+    assert build_match_query("Python and SQL, python!") == '"python" OR "sql"'
+    assert build_match_query("a the of") == ""
+
+
+def test_index_follows_inserts_updates_and_deletes(db_path):
+    _insert(db_path, "a@example.com", "python sql")
+    _insert(db_path, "b@example.com", "java spring")
+    assert search_skills("python", db_path=db_path) == ["a@example.com"]
+
+    _insert(db_path, "a@example.com", "rust go")
+    assert search_skills("python", db_path=db_path) == []
+    assert search_skills("rust", db_path=db_path) == ["a@example.com"]
+
+    write(
+        lambda conn: conn.execute("DELETE FROM resumes WHERE Email = 'b@example.com'"),
+        db_path,
+    )
+    assert search_skills("java", db_path=db_path) == []
+
+
+def test_filters_apply_before_the_limit(db_path):
+    for i in range(5):
+        _insert(db_path, f"excluded{i}@example.com", "python python sql", "Globex")
+    _insert(db_path, "junior@example.com", "python sql", years=1)
+    _insert(db_path, "unknown@example.com", "python sql", years="n/a")
+    _insert(db_path, "match@example.com", "python", years=6)
+
+    assert search_skills(
+        "python",
+        limit=1,
+        db_path=db_path,
+        min_years_experience=3,
+        exclude_organizations=[" GLOBEX "],
+    ) == ["match@example.com"]
+    assert "unknown@example.com" not in search_skills(
+        "python", db_path=db_path, max_years_experience=10
+    )
+
+
+def test_old_email_keyed_index_is_rebuilt(tmp_path):
+    path = str(tmp_path / "old.db")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """CREATE TABLE resumes
+             (Name TEXT, Email TEXT PRIMARY KEY, Phone_Number TEXT,
+              Current_Organization TEXT, Years_Experience INTEGER, Skills TEXT)"""
+    )
+    conn.execute(
+        "CREATE VIRTUAL TABLE resume_skills_fts USING fts5(Email UNINDEXED, Skills)"
+    )
+    conn.execute(
+        "INSERT INTO resumes VALUES ('A', 'a@example.com', '', 'Acme', 5, 'go')"
+    )
+    conn.execute("INSERT INTO resume_skills_fts VALUES ('a@example.com', 'go')")
+    conn.commit()
+    conn.close()
+
+    conn = open_connection(path)
+    create_resumes_table(conn)
+    conn.close()
+    assert search_skills("go", db_path=path) == ["a@example.com"]
+    with connection(path) as conn:
+        conn.execute(
+            """INSERT INTO resumes VALUES
+                 ('B', 'b@example.com', '', 'Acme', 5, 'go rust')"""
+        )
+    assert search_skills("rust", db_path=path) == ["b@example.com"]
+
+
+def test_hybrid_scores_are_the_fused_scores_in_order(add_resume):
+    add_resume("a@example.com", "python sql docker")
+    add_resume("b@example.com", "python")
+    add_resume("c@example.com", "java spring")
+
+    results = match_profiles_with_job_description(
+        "python sql docker", retrieval_mode="hybrid"
+    )
+    assert results[0][0][1] == "a@example.com"
+    assert results[0][1] == 1.0
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_hybrid_shortlist_only_holds_profiles_that_pass(add_resume, monkeypatch):
+    import matcher
+
+    monkeypatch.setattr(matcher, "HYBRID_SHORTLIST_SIZE", 2)
+    for i in range(4):
+        add_resume(f"excluded{i}@example.com", "python python sql", "Globex")
+    add_resume("match@example.com", "python sql")
+
+    results = match_profiles_with_job_description(
+        "python sql", exclude_organizations=["globex"], retrieval_mode="hybrid"
+    )
+    assert [profile[1] for profile, _ in results] == ["match@example.com"]
+    assert results[0][1] == 1.0
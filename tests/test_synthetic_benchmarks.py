@@ -0,0 +1,100 @@
+import json
+import fitz
+import pytest
+import requests
+from benchmarks import synthetic_resumes
+from benchmarks.stub_generation_server import start_stub_server
+from benchmarks.synthetic_resumes import (
+    count_profiles,
+    job_descriptions,
+    seed_corpus,
+    write_resume_pdfs,
+)
+from embedding_store import load_profile_embeddings
+from model import GENERATION_PARAMS, HttpGenerationClient, status_code_of
+from skill_index import search_skills
+
+
+@pytest.fixture(autouse=True)
+def small_pools(monkeypatch):
+    # Building the full Faker pools takes about a second per factory
+    monkeypatch.setattr(synthetic_resumes, "POOL_SIZE", 200)
+
+
+@pytest.fixture
+def stub_server():
+    servers = []
+
+    def start(**config):
+        server, counts = start_stub_server(latency=0, auth_latency=0, **config)
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}", counts
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def test_seeded_profiles_load_without_embedding(db_path, encoder):
+    assert seed_corpus(db_path, 50, encoder.dimension, chunk_size=20) == 50
+
+    profiles, embeddings = load_profile_embeddings(db_path)
+    assert len(profiles) == 50
+    assert embeddings.shape == (50, encoder.dimension)
+    assert encoder.calls == []
+
+
+def test_seeding_tops_up_to_the_requested_size(db_path, encoder):
+    seed_corpus(db_path, 30, encoder.dimension)
+    assert seed_corpus(db_path, 45, encoder.dimension) == 45
+    assert seed_corpus(db_path, 45, encoder.dimension) == 45
+    assert count_profiles(db_path) == 45
+
+
+def test_seeded_skills_are_searchable(db_path, encoder):
+    seed_corpus(db_path, 40, encoder.dimension)
+    assert search_skills("python docker kubernetes sql", db_path=db_path)
+
+
+def test_born_digital_and_scanned_pdfs(tmp_path):
+    files = write_resume_pdfs(str(tmp_path), 6, scanned_fraction=0.5, seed=3)
+    assert {scanned for _, scanned in files} == {True, False}
+
+    for path, scanned in files:
+        with fitz.open(path) as document:
+            page = document[0]
+            assert bool(page.get_text().strip()) is not scanned
+            assert bool(page.get_images()) is scanned
+
+
+def test_job_descriptions_are_distinct_and_repeatable():
+    descriptions = job_descriptions(25)
+    assert len(set(descriptions)) == 25
+    assert job_descriptions(25) == descriptions
+
+
+def test_stub_server_answers_batched_prompts(stub_server):
+    url, counts = stub_server()
+    client = HttpGenerationClient(url, "stub-model", GENERATION_PARAMS)
+    prompt = (
+        "Extract the fields.\n"
+        "### Resume (filename: a.pdf)\nJane Doe\n"
+        "### Resume (filename: b.pdf)\nJohn Roe\n"
+    )
+
+    result = client.generate(prompt)["results"][0]["generated_text"]
+    assert [resume["filename"] for resume in json.loads(result)] == ["a.pdf", "b.pdf"]
+    assert counts["token_requests"] == 1
+    assert counts["generate_requests"] == 1
+
+
+def test_stub_server_throttles_at_the_error_rate(stub_server):
+    url, counts = stub_server(error_rate=1.0)
+    client = HttpGenerationClient(url, "stub-model", GENERATION_PARAMS)
+
+    with pytest.raises(requests.HTTPError) as error:
+        client.generate("Jane Doe")
+    assert status_code_of(error.value) == 429
+    assert error.value.response.headers["Retry-After"] == "0.1"
+    assert counts["throttled_requests"] == 1
@@ -0,0 +1,92 @@
+import asyncio
+import io
+import os
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+from starlette.datastructures import UploadFile
+import main
+import upload_spool
+from upload_spool import (
+    check_upload_size,
+    discard_spooled,
+    spool_uploads,
+    spooled_bytes,
+)
+
+
+@pytest.fixture
+def spool_dir(tmp_path, monkeypatch):
+    directory = str(tmp_path / "spool")
+    monkeypatch.setattr(upload_spool, "UPLOAD_SPOOL_DIR", directory)
+    monkeypatch.setattr(upload_spool, "SPOOL_CHUNK_BYTES", 4)
+    return directory
+
+
+def _spool(files):
+    uploads = [UploadFile(io.BytesIO(data), filename=name) for name, data in files]
+    return asyncio.run(spool_uploads(uploads))
+
+
+def test_files_are_spooled_and_counted(spool_dir, monkeypatch):
+    monkeypatch.setattr(upload_spool, "UPLOAD_MAX_INFLIGHT_BYTES", 100)
+    spooled = _spool([("a.pdf", b"x" * 10), ("b.pdf", b"y" * 7)])
+
+    assert [(name, size) for name, _, size in spooled] == [
+        ("a.pdf", 10),
+        ("b.pdf", 7),
+    ]
+    assert open(spooled[0][1], "rb").read() == b"x" * 10
+    assert spooled_bytes() == 17
+
+    discard_spooled(spooled[0][1])
+    discard_spooled(spooled[0][1])  # Already gone is fine
+    assert spooled_bytes() == 7
+
+
+def test_backlog_from_any_process_counts_against_the_budget(
+    spool_dir, monkeypatch
+):
+    monkeypatch.setattr(upload_spool, "UPLOAD_MAX_INFLIGHT_BYTES", 20)
+    # Spooled by another worker, or queued before a restart
+    os.makedirs(spool_dir)
+    with open(os.path.join(spool_dir, "other.pdf"), "wb") as f:
+        f.write(b"z" * 15)
+
+    with pytest.raises(HTTPException) as error:
+        _spool([("a.pdf", b"x" * 4), ("b.pdf", b"y" * 4)])
+    assert error.value.status_code == 503
+    # Everything this request spooled is removed again
+    assert os.listdir(spool_dir) == ["other.pdf"]
+
+    os.remove(os.path.join(spool_dir, "other.pdf"))
+    assert len(_spool([("a.pdf", b"x" * 8), ("b.pdf", b"y" * 8)])) == 2
+
+
+def test_missing_spool_directory_is_empty(spool_dir):
+    assert spooled_bytes() == 0
+
+
+@pytest.mark.parametrize("content_length", ["abc", "-1", "1.5"])
+def test_malformed_content_length_is_a_bad_request(content_length):
+    with pytest.raises(HTTPException) as error:
+        check_upload_size(content_length)
+    assert error.value.status_code == 400
+
+
+def test_oversized_content_length_is_rejected(monkeypatch):
+    monkeypatch.setattr(upload_spool, "UPLOAD_MAX_INFLIGHT_BYTES", 100)
+    check_upload_size(None)
+    check_upload_size("100")
+    with pytest.raises(HTTPException) as error:
+        check_upload_size("101")
+    assert error.value.status_code == 413
+
+
+def test_upload_with_a_bad_content_length_returns_400():
+    response = TestClient(main.app).post(
+        "/upload",
+        files=[("files", ("a.pdf", b"%PDF", "application/pdf"))],
+        headers={"Content-Length": "not-a-number"},
+    )
+    assert response.status_code == 400
@@ -0,0 +1,85 @@
+import json
+import os
+import pytest
+from fastapi.testclient import TestClient
+import main
+from jobs import enqueue_upload_job, finish_file
+from upload_spool import UPLOAD_SPOOL_DIR
+
+
+def resume_text(email):
+    return (
+        f"Jane Doe, {email}. Senior data engineer at Acme with eight years of "
+        "experience.\nSkills: Python, SQL"
+    )
+
+
+@pytest.fixture
+def client(fake_llm):
+    # Startup events (warm-up, queue workers) only run inside a with block
+    return TestClient(main.app)
+
+
+def _upload(client, files, **params):
+    return client.post(
+        "/upload/stream",
+        params=params,
+        files=[
+            ("files", (name, data, "application/pdf")) for name, data in files
+        ],
+    )
+
+
+def test_ndjson_streams_one_record_per_file(client, make_pdf):
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    spooled_before = set(os.listdir(UPLOAD_SPOOL_DIR))
+    response = _upload(
+        client,
+        [
+            ("good.pdf", make_pdf([resume_text("jane@example.com")])),
+            ("bad.pdf", b"not a pdf"),
+        ],
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    by_name = {record["filename"]: record for record in records}
+    assert len(records) == 2
+    assert by_name["good.pdf"]["status"] == "completed"
+    assert by_name["good.pdf"]["index"] == 0
+    assert by_name["good.pdf"]["result"]["email"] == "jane@example.com"
+    assert by_name["bad.pdf"]["status"] == "failed"
+    assert by_name["bad.pdf"]["error"]
+    # Every spooled file is deleted once its record is sent
+    assert set(os.listdir(UPLOAD_SPOOL_DIR)) == spooled_before
+
+
+def test_sse_frames_each_record_as_an_event(client, make_pdf):
+    response = _upload(
+        client,
+        [("good.pdf", make_pdf([resume_text("jane@example.com")]))],
+        format="sse",
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = [event for event in response.text.split("\n\n") if event]
+    assert len(events) == 1
+    name, data = events[0].split("\n")
+    assert name == "event: result"
+    assert json.loads(data[len("data: ") :])["status"] == "completed"
+
+
+def test_unknown_format_is_rejected(client, make_pdf):
+    response = _upload(client, [("a.pdf", b"%PDF")], format="xml")
+    assert response.status_code == 422
+
+
+def test_job_status_files_match_streamed_records(client, make_pdf, spool_files):
+    response = _upload(client, [("bad.pdf", b"not a pdf")])
+    record = json.loads(response.text.splitlines()[0])
+
+    job_id = enqueue_upload_job(main.DB_PATH, spool_files([b"not a pdf"]))
+    finish_file(main.DB_PATH, job_id, 0, error="Failed to process resume")
+    job = client.get(f"/jobs/{job_id}").json()
+    assert set(job["files"][0]) == set(record)
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+import vector_index
+from vector_index import VectorIndex, get_index, index_version, update_index
+
+
+def _profile(i, organization="Acme", years=5):
+    return (f"Name {i}", f"p{i}@example.com", "555-0100", organization, years, "")
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(0).normal(size=(50, 16)).astype(np.float32)
+
+
+def test_search_matches_brute_force(vectors):
+    index = VectorIndex.from_embeddings(
+        [_profile(i) for i in range(len(vectors))], vectors
+    )
+    query = vectors[7] + 0.1
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    expected = np.argsort(-(normalized @ (query / np.linalg.norm(query))))[:5]
+
+    results = index.search(query, k=5)
+    assert [profile[1] for profile, _ in results] == [
+        f"p{i}@example.com" for i in expected
+    ]
+    scores = [score for _, score in results]
+    assert scores == sorted(scores, reverse=True)
+
+
+def test_upsert_updates_in_place_and_appends(vectors):
+    index = VectorIndex.from_embeddings([_profile(i) for i in range(3)], vectors[:3])
+
+    assert index.upsert(_profile(1, organization="Globex"), vectors[10]) == 1
+    assert len(index) == 3
+    assert index.profile_at(1)[3] == "Globex"
+    assert index.search(vectors[10], k=1)[0][0][1] == "p1@example.com"
+
+    assert index.upsert(_profile(3), vectors[11]) == 3
+    assert len(index) == 4
+    assert index.row_of("p3@example.com") == 3
+
+
+def test_upsert_grows_past_capacity(vectors):
+    index = VectorIndex(16, capacity=2)
+    for i in range(len(vectors)):
+        index.upsert(_profile(i), vectors[i])
+    assert len(index) == len(vectors)
+    for i in (0, 25, 49):
+        assert index.search(vectors[i], k=1)[0][0][1] == f"p{i}@example.com"
+
+
+def test_update_index_patches_the_loaded_index(add_resume):
+    add_resume("a@example.com", "python sql")
+    index = get_index()
+    version = index_version()
+
+    add_resume("b@example.com", "java spring")
+    assert get_index() is index
+    assert len(index) == 2
+    assert index_version() > version
+    assert index.row_of("b@example.com") == 1
+
+
+def test_update_index_before_load_is_a_no_op(vectors):
+    update_index(_profile(0), vectors[0])
+    assert vector_index._index is None
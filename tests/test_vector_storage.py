@@ -0,0 +1,134 @@
+import numpy as np
+import pytest
+from embedding_store import load_embeddings_by_email
+from vector_index import VectorIndex, normalize_rows, quantize_rows
+
+
+def _profile(i):
+    return (f"Name {i}", f"p{i}@example.com", "555-0100", "Acme", 5, "")
+
+
+def _emails(results):
+    return [profile[1] for profile, _ in results]
+
+
+@pytest.fixture
+def vectors():
+    return np.random.default_rng(1).normal(size=(300, 32)).astype(np.float32)
+
+
+@pytest.fixture
+def exact(vectors):
+    return VectorIndex.from_embeddings(
+        [_profile(i) for i in range(len(vectors))], vectors, storage="float32"
+    )
+
+
+def _quantized(vectors, storage):
+    return VectorIndex.from_embeddings(
+        [_profile(i) for i in range(len(vectors))], vectors, storage=storage
+    )
+
+
+def _exact_loader(vectors, calls=None):
+    def load(emails):
+        if calls is not None:
+            calls.append(list(emails))
+        return {email: vectors[int(email[1:].split("@")[0])] for email in emails}
+
+    return load
+
+
+def test_int8_rows_round_trip_within_half_a_step(vectors):
+    normalized = normalize_rows(vectors)
+    quantized, scales = quantize_rows(normalized, "int8")
+
+    assert quantized.dtype == np.int8
+    restored = quantized.astype(np.float32) * scales[:, None]
+    assert np.all(np.abs(restored - normalized) <= scales[:, None] / 2 + 1e-7)
+
+
+def test_int8_zero_rows_keep_a_unit_scale():
+    quantized, scales = quantize_rows(np.zeros((2, 4), dtype=np.float32), "int8")
+    assert scales.tolist() == [1.0, 1.0]
+    assert not quantized.any()
+
+
+def test_unknown_storage_is_rejected():
+    with pytest.raises(ValueError, match="Unknown vector storage"):
+        VectorIndex(4, storage="bfloat16")
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_quantized_search_tracks_float32(vectors, exact, storage):
+    index = _quantized(vectors, storage)
+    assert index._matrix.dtype == np.dtype(storage)
+
+    for query in vectors[:10] + 0.05:
+        expected = exact.search(query, k=10)
+        results = index.search(query, k=10)
+        assert len(set(_emails(results)) & set(_emails(expected))) >= 8
+        np.testing.assert_allclose(
+            [score for _, score in results][:1],
+            [score for _, score in expected][:1],
+            atol=0.02,
+        )
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_search_batch_matches_search(vectors, storage):
+    index = _quantized(vectors, storage)
+    queries = vectors[:4] + 0.05
+
+    batch = index.search_batch(queries, k=5)
+    for query, results in zip(queries, batch):
+        assert _emails(results) == _emails(index.search(query, k=5))
+
+
+def test_rerank_restores_the_float32_ranking(vectors, exact):
+    index = _quantized(vectors, "int8")
+    calls = []
+    index.rerank_loader = _exact_loader(vectors, calls)
+
+    for query in vectors[:10] + 0.05:
+        expected = exact.search(query, k=10)
+        results = index.search(query, k=10)
+        assert _emails(results) == _emails(expected)
+        np.testing.assert_allclose(
+            [score for _, score in results],
+            [score for _, score in expected],
+            rtol=1e-5,
+        )
+    # Only the oversampled candidates are loaded, not the whole index
+    assert all(len(emails) == 40 for emails in calls)
+
+
+def test_rerank_applies_to_search_batch(vectors, exact):
+    index = _quantized(vectors, "int8")
+    index.rerank_loader = _exact_loader(vectors)
+    queries = vectors[:4] + 0.05
+
+    for query, results in zip(queries, index.search_batch(queries, k=10)):
+        assert _emails(results) == _emails(exact.search(query, k=10))
+
+
+def test_failed_rerank_keeps_the_quantized_order(vectors, capsys):
+    index = _quantized(vectors, "int8")
+    query = vectors[3] + 0.05
+    expected = index.search(query, k=5)
+
+    def broken_loader(emails):
+        raise OSError("database is locked")
+
+    index.rerank_loader = broken_loader
+    assert _emails(index.search(query, k=5)) == _emails(expected)
+    assert "Error loading float32 vectors for rerank" in capsys.readouterr().out
+
+
+def test_rerank_loader_reads_current_model_vectors(add_resume):
+    add_resume("a@example.com", "python sql")
+    add_resume("b@example.com", "java spring")
+
+    vectors = load_embeddings_by_email(["a@example.com", "missing@example.com"])
+    assert list(vectors) == ["a@example.com"]
+    assert vectors["a@example.com"].dtype == np.float32
@@ -0,0 +1,120 @@
+import os
+import tempfile
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+UPLOAD_SPOOL_DIR = os.getenv(
+    "UPLOAD_SPOOL_DIR", os.path.join("uploaded_files", "spool")
+)
+UPLOAD_MAX_INFLIGHT_BYTES = int(
+    os.getenv("UPLOAD_MAX_INFLIGHT_BYTES", str(1024 * 1024 * 1024))
+)
+SPOOL_CHUNK_BYTES = 1024 * 1024
+
+
+def spooled_bytes():
+    """
+    Return the size of every file in the spool directory.
+
+    Files stay spooled until they are processed, and every worker process
+    spools to the same directory, so this is the ingestion backlog across
+    processes and restarts.
+    """
+    total = 0
+    try:
+        with os.scandir(UPLOAD_SPOOL_DIR) as entries:
+            for entry in entries:
+                try:
+                    total += entry.stat().st_size
+                except FileNotFoundError:
+                    pass  # Processed while the directory was being read
+    except FileNotFoundError:
+        return 0
+    return total
+
+
+def check_upload_size(content_length):
+    """
+    Reject a request up front if its declared size can never fit the budget.
+    """
+    if not content_length:
+        return
+    try:
+        declared = int(content_length)
+    except ValueError:
+        declared = -1
+    if declared < 0:
+        raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+    if declared > UPLOAD_MAX_INFLIGHT_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=(
+                f"Upload exceeds the {UPLOAD_MAX_INFLIGHT_BYTES} byte ingestion budget"
+            ),
+        )
+
+
+async def spool_uploads(files):
+    """
+    Copy uploaded files to the spool directory in chunks, within the budget.
+
+    Files are never read into memory whole. Before each file the spool
+    directory is measured, and if the backlog plus the file would exceed
+    UPLOAD_MAX_INFLIGHT_BYTES, everything spooled by this request is removed
+    and a 503 is raised so the client can retry later.
+
+    Args:
+        files (list of UploadFile): The uploaded files.
+
+    Returns:
+        list: (filename, path, size) tuples.
+    """
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    spooled = []
+    try:
+        for file in files:
+            # Includes the files this request has spooled so far
+            backlog = spooled_bytes()
+            handle = tempfile.NamedTemporaryFile(
+                dir=UPLOAD_SPOOL_DIR, suffix=".pdf", delete=False
+            )
+            size = 0
+            spooled.append((file.filename, handle.name, size))
+            with handle:
+                while True:
+                    chunk = await file.read(SPOOL_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    if backlog + size + len(chunk) > UPLOAD_MAX_INFLIGHT_BYTES:
+                        raise HTTPException(
+                            status_code=503,
+                            detail="Ingestion is at capacity, retry later",
+                            headers={"Retry-After": "30"},
+                        )
+                    size += len(chunk)
+                    spooled[-1] = (file.filename, handle.name, size)
+                    handle.write(chunk)
+            await file.close()
+    except BaseException:
+        for _, path, _ in spooled:
+            discard_spooled(path)
+        raise
+    return spooled
+
+
+def read_spooled(path):
+    """Read a spooled file."""
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def discard_spooled(path):
+    """Delete a spooled file, which returns its bytes to the budget."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -1,12 +1,32 @@
 import sqlite3
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
 import json
 import os
-import pandas as pd
+import threading
+import uuid
 from dotenv import load_dotenv
-from pdf2image import convert_from_bytes
-import pytesseract
-from model import initialize_model
+from database import connection, register_schema, write
+from metrics import Counter, Gauge, timed
+from extraction_scheduler import get_scheduler
+from prompt import RESUME_BATCH_EXTRACTION_PROMPT_INPUT, RESUME_BATCH_ITEM
+from upload_spool import discard_spooled, read_spooled
+from pdf_extraction import extract_text_from_pdf
+from embedding_store import (
+    embed_profile_text,
+    read_profile_embedding,
+    store_profile_embedding,
+)
+from vector_index import update_index
+from skill_index import create_skill_index
+from extraction_cache import (
+    get_cached_extraction,
+    get_cached_text,
+    llm_cache_key,
+    put_cached_extraction,
+    put_cached_text,
+    sha256_hex,
+)
 from typing import List, Dict, Optional
 from fastapi import HTTPException
 from response_models import InterestedProfileResponse
@@ -17,18 +37,45 @@ load_dotenv()
 
 # Global variables
 DB_PATH = os.getenv("DB_PATH")
-
-
-# Function to check if email exists in SQLite database
-def check_email_exists(conn, email):
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "16"))
+# Number of resumes packed into one generate call (1 disables batching)
+LLM_BATCH_SIZE = int(os.getenv("LLM_BATCH_SIZE", "1"))
+# Files held in memory (read, OCR, LLM, store) at once across all uploads
+INGEST_MAX_FILES_IN_FLIGHT = int(os.getenv("INGEST_MAX_FILES_IN_FLIGHT", "8"))
+
+_ingest_slots_free = INGEST_MAX_FILES_IN_FLIGHT
+_ingest_slots_condition = threading.Condition()
+
+RESUMES_PROCESSED = Counter(
+    "resume_matcher_resumes_processed_total",
+    "Uploaded resumes processed, by outcome (completed or failed).",
+    ("status",),
+)
+INGEST_FILES_IN_FLIGHT = Gauge(
+    "resume_matcher_ingest_files_in_flight",
+    "Files held in memory by ingestion, out of INGEST_MAX_FILES_IN_FLIGHT.",
+)
+INGEST_FILES_IN_FLIGHT.set_function(
+    lambda: INGEST_MAX_FILES_IN_FLIGHT - _ingest_slots_free
+)
+
+
+@contextmanager
+def ingest_slot(count=1):
+    """
+    Hold `count` of the INGEST_MAX_FILES_IN_FLIGHT slots while files are in memory.
+    """
+    global _ingest_slots_free
+    count = min(count, INGEST_MAX_FILES_IN_FLIGHT)
+    with _ingest_slots_condition:
+        _ingest_slots_condition.wait_for(lambda: _ingest_slots_free >= count)
+        _ingest_slots_free -= count
     try:
-        cursor = conn.cursor()
-        cursor.execute("SELECT COUNT(*) FROM resumes WHERE email=?", (email,))
-        result = cursor.fetchone()
-        return result[0] > 0
-    except sqlite3.Error as e:
-        print(f"SQLite error: {e}")
-        return False
+        yield
+    finally:
+        with _ingest_slots_condition:
+            _ingest_slots_free += count
+            _ingest_slots_condition.notify_all()
 
 
 # Function to create resumes table if not exists
@@ -43,218 +90,390 @@ def create_resumes_table(conn):
         conn.commit()
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
+    # The skill index is kept in step by triggers on the resumes table
+    create_skill_index(conn)
+
+
+register_schema(create_resumes_table)
+
+
+# Function to insert or update a resume row in a single statement
+def upsert_resume(conn, resume):
+    conn.execute(
+        """INSERT INTO resumes
+                 (Name, Email, Phone_Number, Current_Organization, Years_Experience, Skills)
+                 VALUES (?, ?, ?, ?, ?, ?)
+                 ON CONFLICT(Email) DO UPDATE SET
+                     Name = excluded.Name,
+                     Phone_Number = excluded.Phone_Number,
+                     Current_Organization = excluded.Current_Organization,
+                     Years_Experience = excluded.Years_Experience,
+                     Skills = excluded.Skills""",
+        resume,
+    )
+
 
+# Function to create the search shortlist tables if not exists
+def create_shortlist_tables(conn):
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS searches
+                 (Search_Id TEXT PRIMARY KEY, Job_Description TEXT, Created_At TEXT)"""
+        )
+        cursor.execute(
+            """CREATE TABLE IF NOT EXISTS shortlist_entries
+                 (Search_Id TEXT, Rank INTEGER, Name TEXT, Email TEXT,
+                  Phone_Number TEXT, Current_Organization TEXT,
+                  Years_Experience INTEGER, Skills TEXT, Relevance_Score REAL,
+                  Interested INTEGER DEFAULT 0, Interview_Time TEXT,
+                  PRIMARY KEY (Search_Id, Email))"""
+        )
+        cursor.execute(
+            """CREATE INDEX IF NOT EXISTS idx_shortlist_entries_email
+                 ON shortlist_entries (Email)"""
+        )
+        cursor.execute(
+            """CREATE INDEX IF NOT EXISTS idx_shortlist_entries_interested
+                 ON shortlist_entries (Search_Id, Interested)"""
+        )
+        conn.commit()
+    except sqlite3.Error as e:
+        print(f"SQLite error: {e}")
 
-def get_available_profiles():
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
 
-    cursor.execute(
-        "SELECT * FROM top_match_user_profiles WHERE interested = ?", (True,)
-    )
-    rows = cursor.fetchall()
+register_schema(create_shortlist_tables)
 
-    columns = [desc[0] for desc in cursor.description]
-    profiles_db = [dict(zip(columns, row)) for row in rows]
 
-    conn.close()
+def get_available_profiles(search_id: str):
+    with connection(DB_PATH) as conn:
+        cursor = conn.cursor()
+        cursor.execute("SELECT 1 FROM searches WHERE Search_Id = ?", (search_id,))
+        if not cursor.fetchone():
+            raise HTTPException(status_code=404, detail="Search not found")
+        cursor.execute(
+            """SELECT Name, Email, Phone_Number, Current_Organization,
+                      Years_Experience, Skills, Relevance_Score, Interview_Time
+                 FROM shortlist_entries
+                WHERE Search_Id = ? AND Interested = 1
+                ORDER BY Rank""",
+            (search_id,),
+        )
+        rows = cursor.fetchall()
 
     available_profiles = [
         InterestedProfileResponse(
-            name=profile["name"],
-            email=profile["email"],
-            phone_number=profile["phone_number"],
-            current_organization=profile["current_organization"],
-            years_experience=profile["years_experience"],
-            skills=profile["skills"],
-            relevance_score=profile["relevance_score"],
-            interview_time=profile["interview_time"],
+            name=row[0],
+            email=row[1],
+            phone_number=row[2],
+            current_organization=row[3],
+            years_experience=row[4],
+            skills=row[5],
+            relevance_score=row[6],
+            interview_time=row[7],
         )
-        for profile in profiles_db
-        if profile["interested"]
+        for row in rows
     ]
 
     return available_profiles
 
 
-# Function to fetch profiles from database
-def get_profiles():
-    try:
-        conn = sqlite3.connect(DB_PATH)
-        cursor = conn.cursor()
-        cursor.execute(
-            "SELECT Name, Email, Phone_Number, Current_Organization, Years_Experience, Skills FROM resumes"
-        )
-        profiles = cursor.fetchall()
-        return profiles
-    except sqlite3.Error as e:
-        print(f"SQLite error: {e}")
-        return []
+# Function to extract (or reuse cached) text from a PDF
+def extract_resume_text(pdf_bytes, db_path):
+    # Identical PDFs reuse the text extracted the first time
+    pdf_hash = sha256_hex(pdf_bytes)
+    cached_text = get_cached_text(db_path, pdf_hash)
+    if cached_text is not None:
+        extracted_text, extraction_stats = cached_text
+        extraction_stats["cached"] = True
+    else:
+        # Extract text from PDF, using the text layer and OCR only as a fallback
+        extracted_text, extraction_stats = extract_text_from_pdf(pdf_bytes)
+        # Text missing pages that failed to OCR is retried on the next upload
+        if not extraction_stats["failed_pages"]:
+            put_cached_text(db_path, pdf_hash, extracted_text, extraction_stats)
+    return extracted_text, extraction_stats
 
 
-# Function to extract text from PDF
-def parse_pdf_with_tesseract(pdf_bytes, page_number=0) -> str:
-    try:
-        images = convert_from_bytes(
-            pdf_bytes, first_page=page_number + 1, last_page=page_number + 1
+# Function to parse the JSON object(s) out of a generated response
+def parse_generated_json(resp, batched=False):
+    opening, closing = ("[", "]") if batched else ("{", "}")
+    first, last = resp.find(opening), resp.rfind(closing)
+    return json.loads(resp[first : last + 1], strict=False)
+
+
+# Function to extract a resume and upsert it, raising on failure
+def extract_and_store_resume(pdf_bytes, model_id, prompt, db_path):
+    extracted_text, extraction_stats = extract_resume_text(pdf_bytes, db_path)
+
+    # Identical text with the same model and prompt reuses the parsed JSON
+    cache_key = llm_cache_key(extracted_text, model_id, prompt)
+    resp_json = get_cached_extraction(db_path, cache_key)
+    if resp_json is None:
+        parsed_pdf_file = "uploaded_file.pdf"  # Placeholder for filename
+        text = extracted_text + "\n" + f"File Name: {parsed_pdf_file}\n"
+        formatted_prompt = prompt.format(filename=parsed_pdf_file, text=text)
+
+        # Generate response within the concurrency and rate limits
+        resp = get_scheduler(model_id).generate(formatted_prompt)
+
+        # Extract JSON from response
+        with timed("json_parse"):
+            resp_json = parse_generated_json(resp)
+        put_cached_extraction(
+            db_path, cache_key, model_id, extracted_text, prompt, resp_json
         )
-        if not images:
-            return "Failed to convert PDF to image"
-        page_image = images[0]
-        extracted_text = pytesseract.image_to_string(page_image)
-        return extracted_text
-    except Exception as e:
-        print(f"Error parsing PDF: {e}")
-        return "Failed to extract text"
 
+    return store_resume(resp_json, extraction_stats, db_path)
 
-# Function to process multiple PDFs in parallel
-def process_multiple_pdfs(pdf_bytes_list, model_id, prompt, db_path):
-    results = []
-    with ThreadPoolExecutor(max_workers=None) as executor:
-        futures = [
-            executor.submit(
-                process_resume_from_pdf, pdf_bytes, model_id, prompt, db_path
-            )
-            for pdf_bytes in pdf_bytes_list
-        ]
-        for future in as_completed(futures):
-            results.append(future.result())
-    return results
 
+# Function to process one spooled PDF within the in-flight limit
+def extract_and_store_spooled_resume(path, model_id, prompt, db_path):
+    with ingest_slot():
+        return extract_and_store_resume(read_spooled(path), model_id, prompt, db_path)
 
-# Function to insert or update resume information in SQLite
-def process_resume_from_pdf(pdf_bytes, model_id, prompt, db_path):
-    try:
-        # Extract text from PDF
-        extracted_text = parse_pdf_with_tesseract(pdf_bytes, 0)
 
-        parsed_pdf_file = "uploaded_file.pdf"  # Placeholder for filename
-        text = extracted_text + "\n" + f"File Name: {parsed_pdf_file}\n"
-        prompt = prompt.format(filename=parsed_pdf_file, text=text)
+# Function to process spooled PDFs in parallel, yielding each result as it completes
+def iter_process_spooled_pdfs(spooled_files, model_id, prompt, db_path):
+    """
+    Process (filename, path, size) spooled files concurrently and yield one
+    record per file as soon as it finishes. Each file is read from disk only
+    when its turn comes and deleted afterwards. Failed files yield an error
+    record instead of an empty result.
+    """
+    with ThreadPoolExecutor(max_workers=INGEST_MAX_WORKERS) as executor:
+        futures = {
+            executor.submit(
+                extract_and_store_spooled_resume, path, model_id, prompt, db_path
+            ): (i, filename, path)
+            for i, (filename, path, _) in enumerate(spooled_files)
+        }
+        try:
+            for future in as_completed(futures):
+                i, filename, path = futures[future]
+                record = {"index": i, "filename": filename}
+                try:
+                    record.update(status="completed", result=future.result())
+                except Exception as e:
+                    print(f"Error processing resume {filename}: {e}")
+                    record.update(status="failed", error=str(e))
+                RESUMES_PROCESSED.inc(status=record["status"])
+                discard_spooled(path)
+                yield record
+        finally:
+            # Stop queued work if the consumer goes away early
+            for future, (_, _, path) in futures.items():
+                if future.cancel():
+                    discard_spooled(path)
+
+
+# Function to extract several resumes with one generate call
+def extract_resume_batch(texts, model_id):
+    items = "\n".join(
+        RESUME_BATCH_ITEM.format(filename=f"resume_{i}.pdf", text=text)
+        for i, text in enumerate(texts)
+    )
+    resp = get_scheduler(model_id).generate(
+        RESUME_BATCH_EXTRACTION_PROMPT_INPUT.format(resumes=items)
+    )
+    with timed("json_parse"):
+        resp_list = parse_generated_json(resp, batched=True)
+
+    # Split the results back per file by filename, falling back to position
+    by_filename = {
+        str(item.get("filename", "")): item
+        for item in resp_list
+        if isinstance(item, dict)
+    }
+    results = []
+    for i in range(len(texts)):
+        item = by_filename.get(f"resume_{i}.pdf")
+        if item is None and len(resp_list) == len(texts):
+            item = resp_list[i]
+        results.append(item)
+    return results
 
-        # Initialize model
-        model = initialize_model(model_id)
 
-        # Generate response
-        resp = model.generate(prompt=prompt)["results"][0]["generated_text"]
+# Function to process PDFs with several resumes packed into each generate call
+def process_pdfs_in_batches(pdf_bytes_list, model_id, db_path):
+    prompt = RESUME_BATCH_EXTRACTION_PROMPT_INPUT
+    results = [{} for _ in pdf_bytes_list]
+    extracted = [None] * len(pdf_bytes_list)
+    resp_jsons = [None] * len(pdf_bytes_list)
 
-        # Extract JSON from response
-        first, last = resp.find("{"), resp.rfind("}")
-        resp_json = json.loads(resp[first : last + 1], strict=False)
-
-        # Extract information from JSON
-        name = resp_json.get("name", "")
-        email = resp_json.get("email", "")
-        phone_number = resp_json.get("phone_number", "")
-        current_organization = resp_json.get("current_organization", "")
-        years_experience = resp_json.get("years_experience", "")
-        skills = resp_json.get("skills", "")
-
-        # Connect to SQLite database
-        with sqlite3.connect(db_path) as conn:
-            # Ensure resumes table exists
-            create_resumes_table(conn)
-
-            # Check if email already exists
-            if check_email_exists(conn, email):
-                # Perform update if email exists
-                cursor = conn.cursor()
-                cursor.execute(
-                    """UPDATE resumes 
-                             SET name=?, phone_number=?, current_organization=?, 
-                                 years_experience=?, skills=?
-                             WHERE email=?""",
-                    (
-                        name,
-                        phone_number,
-                        current_organization,
-                        years_experience,
-                        skills,
-                        email,
-                    ),
+    with ThreadPoolExecutor(max_workers=INGEST_MAX_WORKERS) as executor:
+        # Extract text and look up cached extractions
+        futures = {
+            executor.submit(extract_resume_text, pdf_bytes, db_path): i
+            for i, pdf_bytes in enumerate(pdf_bytes_list)
+        }
+        for future in as_completed(futures):
+            i = futures[future]
+            try:
+                extracted[i] = future.result()
+                resp_jsons[i] = get_cached_extraction(
+                    db_path, llm_cache_key(extracted[i][0], model_id, prompt)
                 )
-            else:
-                # Perform insert if email does not exist
-                cursor = conn.cursor()
-                cursor.execute(
-                    """INSERT INTO resumes 
-                             (name, email, phone_number, current_organization, years_experience, skills) 
-                             VALUES (?, ?, ?, ?, ?, ?)""",
-                    (
-                        name,
-                        email,
-                        phone_number,
-                        current_organization,
-                        years_experience,
-                        skills,
-                    ),
+            except Exception as e:
+                print(f"Error extracting resume text: {e}")
+
+        # Pack the remaining texts into batched generate calls
+        pending = [
+            i
+            for i in range(len(pdf_bytes_list))
+            if extracted[i] is not None and resp_jsons[i] is None
+        ]
+        batches = [
+            pending[start : start + LLM_BATCH_SIZE]
+            for start in range(0, len(pending), LLM_BATCH_SIZE)
+        ]
+        futures = {
+            executor.submit(
+                extract_resume_batch, [extracted[i][0] for i in batch], model_id
+            ): batch
+            for batch in batches
+        }
+        for future in as_completed(futures):
+            batch = futures[future]
+            try:
+                batch_results = future.result()
+            except Exception as e:
+                print(f"Error processing resume batch: {e}")
+                continue
+            for i, resp_json in zip(batch, batch_results):
+                if resp_json is None:
+                    print("Batched generation returned no result for a resume")
+                    continue
+                resp_jsons[i] = resp_json
+                put_cached_extraction(
+                    db_path,
+                    llm_cache_key(extracted[i][0], model_id, prompt),
+                    model_id,
+                    extracted[i][0],
+                    prompt,
+                    resp_json,
                 )
-            conn.commit()
 
-            inferred = {
-                "name": name,
-                "email": email,
-                "phone_number": phone_number,
-                "current_organization": current_organization,
-                "years_experience": years_experience,
-                "skills": skills,
-            }
+    for i, resp_json in enumerate(resp_jsons):
+        if resp_json is None:
+            continue
+        try:
+            results[i] = store_resume(resp_json, extracted[i][1], db_path)
+        except (sqlite3.Error, Exception) as e:
+            print(f"Error processing resume: {e}")
+    return results
 
-            return inferred
 
-    except (json.JSONDecodeError, sqlite3.Error, Exception) as e:
-        print(f"Error processing resume: {e}")
-        return {}
+# Function to insert or update parsed resume information in SQLite
+@timed("store_resume")
+def store_resume(resp_json, extraction_stats, db_path):
+    # Extract information from JSON
+    name = resp_json.get("name", "")
+    email = resp_json.get("email", "")
+    phone_number = resp_json.get("phone_number", "")
+    current_organization = resp_json.get("current_organization", "")
+    years_experience = resp_json.get("years_experience", "")
+    skills = resp_json.get("skills", "")
+
+    def write_resume(conn):
+        upsert_resume(
+            conn,
+            (name, email, phone_number, current_organization, years_experience, skills),
+        )
+        return read_profile_embedding(conn, email)
 
+    # One writer thread commits resume writes for every upload thread
+    profile, text_hash, vector, text = write(write_resume, db_path)
 
-# Function to save profiles to a database table
-def save_profiles_to_db(profiles: List[Dict]):
-    try:
-        # Create a DataFrame from the list of profiles
-        df = pd.DataFrame(profiles)
+    # Embed the profile once here so queries only encode the job description
+    if profile is not None and vector is None:
+        vector = embed_profile_text(email, text)
+        write(
+            lambda conn: store_profile_embedding(conn, email, text_hash, vector),
+            db_path,
+        )
 
-        # Connect to the SQLite database
-        with sqlite3.connect(DB_PATH) as conn:
-            # Create the table if it doesn't exist or overwrite it if it does
-            cursor = conn.cursor()
-            cursor.execute("DROP TABLE IF EXISTS top_match_user_profiles")
-            df.to_sql("top_match_user_profiles", conn, if_exists="replace", index=False)
+    # Patch the in-memory matching index in place
+    update_index(profile, vector)
+
+    inferred = {
+        "name": name,
+        "email": email,
+        "phone_number": phone_number,
+        "current_organization": current_organization,
+        "years_experience": years_experience,
+        "skills": skills,
+        "extraction_stats": extraction_stats,
+    }
+
+    return inferred
+
+
+SHORTLIST_COLUMNS = [
+    "rank",
+    "name",
+    "email",
+    "phone_number",
+    "current_organization",
+    "years_experience",
+    "skills",
+    "relevance_score",
+]
+
+
+# Function to save the profiles matched by a search as its shortlist
+def save_profiles_to_db(profiles: List[Dict], job_description: str = None):
+    search_id = uuid.uuid4().hex
+
+    def insert_shortlist(conn):
+        conn.execute(
+            """INSERT INTO searches (Search_Id, Job_Description, Created_At)
+                 VALUES (?, ?, ?)""",
+            (search_id, job_description, datetime.utcnow().isoformat()),
+        )
+        conn.executemany(
+            """INSERT INTO shortlist_entries
+                 (Search_Id, Rank, Name, Email, Phone_Number, Current_Organization,
+                  Years_Experience, Skills, Relevance_Score)
+                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+            [
+                (search_id, *(profile.get(column) for column in SHORTLIST_COLUMNS))
+                for profile in profiles
+            ],
+        )
 
+    try:
+        write(insert_shortlist, DB_PATH)
+        return search_id
     except sqlite3.Error as e:
         print(f"SQLite error: {e}")
     except Exception as e:
         print(f"Error saving profiles to database: {e}")
+    return None
 
 
 def update_profile_availability(
-    email: str, interested: bool, interview_time: Optional[datetime]
+    search_id: str, email: str, interested: bool, interview_time: Optional[datetime]
 ):
-    conn = sqlite3.connect(DB_PATH)
-    cursor = conn.cursor()
-
-    cursor.execute("SELECT * FROM top_match_user_profiles WHERE email = ?", (email,))
-    profile = cursor.fetchone()
-
-    if not profile:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Profile not found")
-
-    if interested:
-        if not interview_time:
-            raise HTTPException(
-                status_code=400,
-                detail="Interview time is required when interested is true",
-            )
-        cursor.execute(
-            "UPDATE top_match_user_profiles SET interested = ?, interview_time = ? WHERE email = ?",
-            (interested, interview_time, email),
+    if interested and not interview_time:
+        raise HTTPException(
+            status_code=400,
+            detail="Interview time is required when interested is true",
         )
-    else:
+
+    def set_availability(conn):
+        cursor = conn.cursor()
         cursor.execute(
-            "UPDATE top_match_user_profiles SET interested = ?, interview_time = NULL WHERE email = ?",
-            (interested, email),
+            """UPDATE shortlist_entries SET Interested = ?, Interview_Time = ?
+                WHERE Search_Id = ? AND Email = ?""",
+            (
+                int(interested),
+                interview_time.isoformat() if interested else None,
+                search_id,
+                email,
+            ),
         )
+        return cursor.rowcount
 
-    conn.commit()
-    conn.close()
+    if not write(set_availability, DB_PATH):
+        raise HTTPException(status_code=404, detail="Profile not found")
@@ -0,0 +1,883 @@
+import json
+import os
+import threading
+import time
+import numpy as np
+from dotenv import load_dotenv
+from ann_index import HnswIndex, ann_available
+from embedding_store import (
+    EMBEDDING_DTYPE,
+    load_embeddings_by_email,
+    load_profile_embeddings,
+)
+from model import EMBEDDING_MODEL_ID
+from query_cache import invalidate_top_matches
+from index_snapshot import (
+    SNAPSHOT_HEADROOM,
+    SNAPSHOT_MIN_HEADROOM_ROWS,
+    VECTOR_INDEX_POLL_SECONDS,
+    VECTOR_INDEX_PUBLISH_SECONDS,
+    VECTOR_INDEX_SNAPSHOT_DIR,
+    new_snapshot,
+    publish,
+    publisher_lock,
+    read_current,
+    snapshot_prefix,
+)
+
+# Load environment variables
+load_dotenv()
+
+# Global variables
+VECTOR_INDEX_BACKEND = os.getenv("VECTOR_INDEX_BACKEND", "exact")
+# In-memory storage of the normalized vectors: "float32", "float16" or "int8"
+VECTOR_STORAGE_DTYPE = os.getenv("VECTOR_STORAGE_DTYPE", "float32")
+VECTOR_STORAGE_DTYPES = {"float32": np.float32, "float16": np.float16, "int8": np.int8}
+# Rescore the best quantized candidates with the float32 vectors from SQLite
+VECTOR_RERANK = os.getenv("VECTOR_RERANK", "false").lower() == "true"
+VECTOR_RERANK_OVERSAMPLE = int(os.getenv("VECTOR_RERANK_OVERSAMPLE", "4"))
+# Quantized rows are dequantized this many at a time while scoring
+SCORE_BLOCK_ROWS = 16384
+
+
+def normalize_rows(vectors):
+    """
+    L2-normalize each row of a 2-D array (zero rows are left as zeros).
+
+    Args:
+        vectors (numpy.ndarray): Array of shape (n, dim).
+
+    Returns:
+        numpy.ndarray: Contiguous float32 array of normalized rows.
+    """
+    vectors = np.ascontiguousarray(vectors, dtype=EMBEDDING_DTYPE)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def top_k_indices(scores, k):
+    """
+    Return the indices of the k highest scores, best first.
+
+    Uses np.argpartition so only the k selected scores are fully sorted.
+    """
+    k = min(k, scores.shape[0])
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    if k < scores.shape[0]:
+        candidates = np.argpartition(-scores, k - 1)[:k]
+    else:
+        candidates = np.arange(scores.shape[0])
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+def normalize_organization(organization):
+    """Normalize an organization name for filtering."""
+    return (organization or "").strip().casefold()
+
+
+def quantize_rows(vectors, storage):
+    """
+    Convert normalized float32 rows to the storage dtype.
+
+    int8 uses symmetric per-row scalar quantization: each row is divided by
+    its largest absolute component and scaled to [-127, 127], and the scale is
+    kept so scores can be restored.
+
+    Returns:
+        tuple: (stored rows, per-row float32 scales or None).
+    """
+    if storage == "int8":
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        quantized = np.rint(vectors / scales[:, None]).astype(np.int8)
+        return quantized, scales.astype(np.float32)
+    return vectors.astype(VECTOR_STORAGE_DTYPES[storage]), None
+
+
+def _years_value(years_experience):
+    try:
+        return float(years_experience)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _save_strings(path, strings):
+    """Write strings as one UTF-8 byte array plus int64 start offsets (n + 1)."""
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(data) for data in encoded], out=offsets[1:])
+    np.save(f"{path}.npy", np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(f"{path}_offsets.npy", offsets)
+
+
+class _MappedStrings:
+    """Read-only view of strings written by _save_strings, decoded on access."""
+
+    def __init__(self, path):
+        self._offsets = np.load(f"{path}_offsets.npy", mmap_mode="r")
+        # An empty array cannot be mapped
+        self._data = np.load(
+            f"{path}.npy", mmap_mode="r" if self._offsets[-1] else None
+        )
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i):
+        start, end = self._offsets[i], self._offsets[i + 1]
+        return self._data[start:end].tobytes().decode("utf-8")
+
+
+class _MappedProfiles:
+    """
+    Profile tuples of a mapped snapshot, stored as JSON records.
+
+    Rows are decoded when read. Profiles upserted after loading are kept in
+    private overlays, so only they take memory of their own.
+    """
+
+    def __init__(self, prefix):
+        self._records = _MappedStrings(f"{prefix}.profiles")
+        self._size = len(self._records)
+        self._updated = {}
+        self._added = []
+
+    def __len__(self):
+        return self._size + len(self._added)
+
+    def __getitem__(self, row):
+        if row >= self._size:
+            return self._added[row - self._size]
+        profile = self._updated.get(row)
+        if profile is None:
+            profile = tuple(json.loads(self._records[row]))
+        return profile
+
+    def __setitem__(self, row, profile):
+        if row >= self._size:
+            self._added[row - self._size] = profile
+        else:
+            self._updated[row] = profile
+
+    def append(self, profile):
+        self._added.append(profile)
+
+
+class _MappedRows:
+    """
+    email -> row lookup of a mapped snapshot.
+
+    Emails are binary-searched in the snapshot's sorted email order; rows
+    added after loading are kept in a private dict.
+    """
+
+    def __init__(self, prefix):
+        self._emails = _MappedStrings(f"{prefix}.emails")
+        self._order = np.load(f"{prefix}.email_order.npy", mmap_mode="r")
+        self._added = {}
+
+    def get(self, email, default=None):
+        row = self._added.get(email)
+        if row is not None:
+            return row
+        low, high = 0, len(self._order)
+        while low < high:
+            middle = (low + high) // 2
+            row = int(self._order[middle])
+            candidate = self._emails[row]
+            if candidate < email:
+                low = middle + 1
+            elif candidate > email:
+                high = middle
+            else:
+                return row
+        return default
+
+    def __setitem__(self, email, row):
+        self._added[email] = row
+
+
+class VectorIndex:
+    """
+    Process-resident matrix of L2-normalized resume embeddings.
+
+    Rows are addressed through an email -> row mapping so inserts and updates
+    from /upload patch the matrix in place. Capacity grows geometrically, so
+    appends do not rebuild the matrix each time. Years_Experience and
+    Current_Organization are kept as columnar arrays next to the matrix so
+    structured filters become a NumPy mask evaluated before any scoring.
+
+    With float16 or int8 storage, scores are computed from the compact rows
+    in blocks. If a rerank loader is set, the best k * VECTOR_RERANK_OVERSAMPLE
+    candidates are then rescored with their float32 vectors.
+    """
+
+    def __init__(self, dimension, capacity=1024, storage=VECTOR_STORAGE_DTYPE):
+        if storage not in VECTOR_STORAGE_DTYPES:
+            raise ValueError(
+                f"Unknown vector storage {storage!r}, "
+                f"expected one of {sorted(VECTOR_STORAGE_DTYPES)}"
+            )
+        capacity = max(capacity, 1)
+        self.dimension = dimension
+        self.storage = storage
+        self.rerank_loader = None
+        self._matrix = np.zeros(
+            (capacity, dimension), dtype=VECTOR_STORAGE_DTYPES[storage]
+        )
+        self._scales = (
+            np.ones(capacity, dtype=np.float32) if storage == "int8" else None
+        )
+        self._years = np.full(capacity, np.nan)
+        self._org_codes = np.full(capacity, -1, dtype=np.int32)
+        self._org_code_by_name = {}
+        self._size = 0
+        self._profiles = []
+        self._row_by_email = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_embeddings(cls, profiles, embeddings, storage=VECTOR_STORAGE_DTYPE):
+        """
+        Build an index from profiles and their (unnormalized) embeddings.
+
+        Args:
+            profiles (list): Profile tuples; profile[1] is the email.
+            embeddings (numpy.ndarray): Array of shape (len(profiles), dim).
+            storage (str): "float32", "float16" or "int8".
+
+        Returns:
+            VectorIndex: The populated index.
+        """
+        dimension = embeddings.shape[1] if len(profiles) else 0
+        index = cls(dimension, capacity=max(len(profiles), 1024), storage=storage)
+        for start in range(0, len(profiles), SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, len(profiles))
+            index._store_rows(start, normalize_rows(embeddings[start:end]))
+        for row, profile in enumerate(profiles):
+            index._set_columns(row, profile)
+        index._size = len(profiles)
+        index._profiles = list(profiles)
+        index._row_by_email = {profile[1]: i for i, profile in enumerate(profiles)}
+        return index
+
+    def __len__(self):
+        return self._size
+
+    def save_snapshot(self, prefix):
+        """
+        Write the index as .npy files plus a small JSON sidecar under `prefix`.
+
+        The arrays keep SNAPSHOT_HEADROOM spare rows, so processes that map the
+        snapshot can absorb upserts by dirtying only the touched pages.
+        Profiles are written as JSON records and emails as a sorted column,
+        both in string-offset arrays, so they are mapped rather than loaded.
+        """
+        with self._lock:
+            size = self._size
+            headroom = max(int(size * SNAPSHOT_HEADROOM), SNAPSHOT_MIN_HEADROOM_ROWS)
+            capacity = size + headroom
+            arrays = {
+                "vectors": (self._matrix, (capacity, self.dimension), 0),
+                "years": (self._years, (capacity,), np.nan),
+                "org_codes": (self._org_codes, (capacity,), -1),
+            }
+            if self._scales is not None:
+                arrays["scales"] = (self._scales, (capacity,), 1.0)
+            for name, (source, shape, fill) in arrays.items():
+                target = np.lib.format.open_memmap(
+                    f"{prefix}.{name}.npy", mode="w+", dtype=source.dtype, shape=shape
+                )
+                target[:size] = source[:size]
+                target[size:] = fill
+                target.flush()
+                del target
+            profiles = [self._profiles[row] for row in range(size)]
+            org_code_by_name = dict(self._org_code_by_name)
+
+        _save_strings(
+            f"{prefix}.profiles", (json.dumps(list(profile)) for profile in profiles)
+        )
+        emails = [profile[1] for profile in profiles]
+        _save_strings(f"{prefix}.emails", emails)
+        order = sorted(range(size), key=emails.__getitem__)
+        np.save(f"{prefix}.email_order.npy", np.asarray(order, dtype=np.int64))
+        with open(f"{prefix}.json", "w") as f:
+            json.dump(
+                {
+                    "storage": self.storage,
+                    "dimension": self.dimension,
+                    "size": size,
+                    "org_code_by_name": org_code_by_name,
+                },
+                f,
+            )
+
+    @classmethod
+    def load_snapshot(cls, prefix):
+        """
+        Map a snapshot written by save_snapshot.
+
+        Arrays are opened copy-on-write, so every process shares the same
+        page-cache pages and only rows it upserts become private.
+        """
+        with open(f"{prefix}.json") as f:
+            meta = json.load(f)
+        index = cls(meta["dimension"], capacity=1, storage=meta["storage"])
+        index._matrix = np.load(f"{prefix}.vectors.npy", mmap_mode="c")
+        index._years = np.load(f"{prefix}.years.npy", mmap_mode="c")
+        index._org_codes = np.load(f"{prefix}.org_codes.npy", mmap_mode="c")
+        if meta["storage"] == "int8":
+            index._scales = np.load(f"{prefix}.scales.npy", mmap_mode="c")
+        index._org_code_by_name = meta["org_code_by_name"]
+        index._profiles = _MappedProfiles(prefix)
+        index._row_by_email = _MappedRows(prefix)
+        index._size = meta["size"]
+        return index
+
+    def _org_code(self, organization):
+        name = normalize_organization(organization)
+        code = self._org_code_by_name.get(name)
+        if code is None:
+            code = len(self._org_code_by_name)
+            self._org_code_by_name[name] = code
+        return code
+
+    def _store_rows(self, start, normalized):
+        quantized, scales = quantize_rows(normalized, self.storage)
+        self._matrix[start : start + len(quantized)] = quantized
+        if scales is not None:
+            self._scales[start : start + len(quantized)] = scales
+
+    def _decode(self, stored, scales):
+        vectors = stored.astype(EMBEDDING_DTYPE)
+        if scales is not None:
+            vectors *= scales[:, None]
+        return vectors
+
+    def _set_columns(self, row, profile):
+        self._years[row] = _years_value(profile[4])
+        self._org_codes[row] = self._org_code(profile[3])
+
+    def _grow(self):
+        capacity = self._matrix.shape[0] * 2
+        size = self._size
+        matrix = np.zeros((capacity, self.dimension), dtype=self._matrix.dtype)
+        matrix[:size] = self._matrix[:size]
+        if self._scales is not None:
+            scales = np.ones(capacity, dtype=np.float32)
+            scales[:size] = self._scales[:size]
+            self._scales = scales
+        years = np.full(capacity, np.nan)
+        years[:size] = self._years[:size]
+        org_codes = np.full(capacity, -1, dtype=np.int32)
+        org_codes[:size] = self._org_codes[:size]
+        self._matrix, self._years, self._org_codes = matrix, years, org_codes
+
+    def upsert(self, profile, vector):
+        """
+        Insert or update a single profile in place.
+
+        Args:
+            profile (tuple): Profile tuple; profile[1] is the email.
+            vector (numpy.ndarray): The profile embedding (unnormalized).
+
+        Returns:
+            int: The row the profile is stored in.
+        """
+        vector = normalize_rows(np.asarray(vector).reshape(1, -1))[0]
+        with self._lock:
+            if self._size == 0 and self.dimension != vector.shape[0]:
+                self.dimension = vector.shape[0]
+                self._matrix = np.zeros(
+                    (self._matrix.shape[0], self.dimension), dtype=self._matrix.dtype
+                )
+
+            row = self._row_by_email.get(profile[1])
+            if row is None:
+                row = self._size
+                if row == self._matrix.shape[0]:
+                    self._grow()
+                self._profiles.append(profile)
+                self._row_by_email[profile[1]] = row
+                self._store_rows(row, vector.reshape(1, -1))
+                self._set_columns(row, profile)
+                self._size += 1
+            else:
+                self._profiles[row] = profile
+                self._store_rows(row, vector.reshape(1, -1))
+                self._set_columns(row, profile)
+            return row
+
+    def row_of(self, email):
+        """Return the row of a profile, or None if it is not indexed."""
+        return self._row_by_email.get(email)
+
+    def profile_at(self, row):
+        """Return the profile stored at a row."""
+        return self._profiles[row]
+
+    def vectors(self, rows=None):
+        """Return the normalized vectors for the given rows (all rows by default)."""
+        with self._lock:
+            matrix, scales, size = self._matrix, self._scales, self._size
+        if rows is None:
+            rows = slice(0, size)
+        return self._decode(matrix[rows], None if scales is None else scales[rows])
+
+    def filter_rows(
+        self,
+        min_years_experience=None,
+        max_years_experience=None,
+        exclude_organizations=None,
+    ):
+        """
+        Evaluate structured filters as a columnar mask.
+
+        Profiles with an unknown Years_Experience never pass a years filter.
+
+        Args:
+            min_years_experience (int, optional): Minimum years of experience.
+            max_years_experience (int, optional): Maximum years of experience.
+            exclude_organizations (list of str, optional): Current organizations
+                to exclude (case-insensitive).
+
+        Returns:
+            numpy.ndarray or None: Sorted rows that pass, or None if no filter was given.
+        """
+        if (
+            min_years_experience is None
+            and max_years_experience is None
+            and not exclude_organizations
+        ):
+            return None
+
+        with self._lock:
+            size = self._size
+            years = self._years[:size]
+            org_codes = self._org_codes[:size]
+            excluded_codes = [
+                self._org_code_by_name[name]
+                for name in map(normalize_organization, exclude_organizations or [])
+                if name in self._org_code_by_name
+            ]
+
+        mask = np.ones(size, dtype=bool)
+        if min_years_experience is not None:
+            mask &= years >= min_years_experience
+        if max_years_experience is not None:
+            mask &= years <= max_years_experience
+        if excluded_codes:
+            mask &= ~np.isin(org_codes, excluded_codes)
+        return np.flatnonzero(mask)
+
+    def search(self, query_vector, k=10, rows=None):
+        """
+        Return the k profiles most similar to the query vector.
+
+        Args:
+            query_vector (numpy.ndarray): The (unnormalized) query embedding.
+            k (int): Number of results.
+            rows (numpy.ndarray, optional): Restrict scoring to these rows.
+
+        Returns:
+            list: (profile, similarity_score) tuples, best first.
+        """
+        with self._lock:
+            matrix, scales = self._matrix, self._scales
+            size, profiles = self._size, self._profiles
+        if size == 0 or (rows is not None and len(rows) == 0):
+            return []
+
+        query = normalize_rows(np.asarray(query_vector).reshape(1, -1))[0]
+        if rows is None:
+            scores = self._score(
+                matrix[:size], None if scales is None else scales[:size], query
+            )
+        else:
+            scores = self._score(
+                matrix[rows], None if scales is None else scales[rows], query
+            )
+
+        rerank = self.storage != "float32" and self.rerank_loader is not None
+        selected = top_k_indices(
+            scores, k * VECTOR_RERANK_OVERSAMPLE if rerank else k
+        )
+        selected_rows = selected if rows is None else rows[selected]
+        if rerank:
+            selected, scores = self._rerank(
+                query, [profiles[row][1] for row in selected_rows], selected, scores, k
+            )
+            selected_rows = selected if rows is None else rows[selected]
+        return [
+            (profiles[row], float(scores[i])) for row, i in zip(selected_rows, selected)
+        ]
+
+    def search_batch(self, query_vectors, k=10, rows=None):
+        """
+        Return the k most similar profiles for each of several queries.
+
+        All queries are scored together: each block of SCORE_BLOCK_ROWS
+        profiles is multiplied with the query matrix once, and only the best
+        k per query are carried over between blocks, so memory stays at
+        queries x SCORE_BLOCK_ROWS scores however large the index is.
+
+        Args:
+            query_vectors (numpy.ndarray): Query embeddings (unnormalized), one per row.
+            k (int): Number of results per query.
+            rows (numpy.ndarray, optional): Restrict scoring to these rows.
+
+        Returns:
+            list: One list of (profile, similarity_score) tuples per query,
+                  best first.
+        """
+        with self._lock:
+            matrix, scales = self._matrix, self._scales
+            size, profiles = self._size, self._profiles
+        queries = normalize_rows(
+            np.asarray(query_vectors).reshape(len(query_vectors), -1)
+        )
+        if size == 0 or (rows is not None and len(rows) == 0):
+            return [[] for _ in range(len(queries))]
+
+        rerank = self.storage != "float32" and self.rerank_loader is not None
+        depth = k * VECTOR_RERANK_OVERSAMPLE if rerank else k
+        pool = size if rows is None else len(rows)
+        best_positions = np.empty((len(queries), 0), dtype=np.int64)
+        best_scores = np.empty((len(queries), 0), dtype=EMBEDDING_DTYPE)
+        for start in range(0, pool, SCORE_BLOCK_ROWS):
+            end = min(start + SCORE_BLOCK_ROWS, pool)
+            block_rows = slice(start, end) if rows is None else rows[start:end]
+            block = matrix[block_rows]
+            if self.storage != "float32":
+                block = self._decode(
+                    block, None if scales is None else scales[block_rows]
+                )
+            # Re-select the best of the running top-k and this block's scores
+            block_positions = np.broadcast_to(
+                np.arange(start, end), (len(queries), end - start)
+            )
+            positions = np.hstack([best_positions, block_positions])
+            scores = np.hstack([best_scores, queries @ block.T])
+            keep = min(depth, scores.shape[1])
+            if keep < scores.shape[1]:
+                selected = np.argpartition(-scores, keep - 1, axis=1)[:, :keep]
+                positions = np.take_along_axis(positions, selected, axis=1)
+                scores = np.take_along_axis(scores, selected, axis=1)
+            best_positions, best_scores = positions, scores
+
+        results = []
+        for query, positions, scores in zip(queries, best_positions, best_scores):
+            order = np.argsort(-scores, kind="stable")
+            positions, scores = positions[order], scores[order]
+            selected_rows = positions if rows is None else rows[positions]
+            if rerank:
+                selected, scores = self._rerank(
+                    query,
+                    [profiles[row][1] for row in selected_rows],
+                    np.arange(len(positions)),
+                    scores,
+                    k,
+                )
+                selected_rows = selected_rows[selected]
+                scores = scores[selected]
+            results.append(
+                [
+                    (profiles[row], float(score))
+                    for row, score in zip(selected_rows[:k], scores[:k])
+                ]
+            )
+        return results
+
+    def _score(self, stored, scales, query):
+        if self.storage == "float32":
+            return stored @ query
+        # Dequantize a block at a time so no float32 copy of the matrix is made
+        scores = np.empty(len(stored), dtype=EMBEDDING_DTYPE)
+        for start in range(0, len(stored), SCORE_BLOCK_ROWS):
+            block = stored[start : start + SCORE_BLOCK_ROWS]
+            scores[start : start + len(block)] = block.astype(EMBEDDING_DTYPE) @ query
+        if scales is not None:
+            scores *= scales
+        return scores
+
+    def _rerank(self, query, emails, selected, scores, k):
+        """Rescore candidates with their float32 vectors and keep the best k."""
+        try:
+            exact_vectors = self.rerank_loader(emails)
+        except Exception as e:
+            print(f"Error loading float32 vectors for rerank: {e}")
+            return selected[:k], scores
+        scores = scores.copy()
+        for i, email in zip(selected, emails):
+            vector = exact_vectors.get(email)
+            if vector is not None:
+                scores[i] = normalize_rows(vector.reshape(1, -1))[0] @ query
+        return selected[top_k_indices(scores[selected], k)], scores
+
+
+_index = None
+_index_version = 0
+_index_lock = threading.Lock()
+_snapshot_version = None
+_snapshot_checked_at = 0.0
+# time.time_ns() of this worker's latest upsert, None until there is one
+_last_upsert_at = None
+# email -> (profile, vector, time.time_ns()) of upserts made by this worker
+# that the snapshot it maps may not include yet
+_pending_upserts = {}
+
+
+def _bump_index_version():
+    # Callers hold _index_lock
+    global _index_version
+    _index_version += 1
+    invalidate_top_matches()
+
+
+def index_version():
+    """Return a counter that changes whenever the process-wide index changes."""
+    return _index_version
+
+
+def _build_index(db_path=None):
+    profiles, embeddings = load_profile_embeddings(db_path)
+    return VectorIndex.from_embeddings(profiles, embeddings)
+
+
+def _changed_rows(previous_prefix, index):
+    """
+    Return the rows of index that are new or hold a different vector than in
+    the snapshot under previous_prefix, or None if the two cannot be compared.
+    """
+    previous = VectorIndex.load_snapshot(previous_prefix)
+    if previous.dimension != index.dimension:
+        return None
+    emails = _MappedStrings(f"{previous_prefix}.emails")
+    changed = np.ones(len(index), dtype=bool)
+    for start in range(0, len(emails), SCORE_BLOCK_ROWS):
+        pairs = [
+            (index.row_of(emails[old_row]), old_row)
+            for old_row in range(start, min(start + SCORE_BLOCK_ROWS, len(emails)))
+        ]
+        pairs = np.asarray(
+            [pair for pair in pairs if pair[0] is not None], dtype=np.int64
+        ).reshape(-1, 2)
+        rows, old_rows = pairs[:, 0], pairs[:, 1]
+        same = np.all(index.vectors(rows) == previous.vectors(old_rows), axis=1)
+        changed[rows[same]] = False
+    return np.flatnonzero(changed)
+
+
+def _rebuild_and_publish(db_path=None):
+    """
+    Build the index from the embedding store and publish it as a snapshot.
+
+    Callers hold publisher_lock. The pointer records when the build started,
+    so workers can tell whether their upserts are included, and, relative to
+    the previous snapshot, which rows changed, so workers swapping from it
+    only patch those rows into their HNSW graph.
+    """
+    built_at = time.time_ns()
+    index = _build_index(db_path)
+    previous = read_current()
+    version, prefix = new_snapshot()
+    index.save_snapshot(prefix)
+    metadata = {
+        "storage": index.storage,
+        "model": EMBEDDING_MODEL_ID,
+        "size": len(index),
+        "built_at": built_at,
+    }
+    if _usable_snapshot(previous):
+        try:
+            changed = _changed_rows(snapshot_prefix(previous), index)
+        except FileNotFoundError:
+            changed = None
+        if changed is not None:
+            np.save(f"{prefix}.changed.npy", changed)
+            metadata["previous"] = previous["version"]
+    publish(version, prefix, metadata)
+
+
+def publish_snapshot(db_path=None):
+    """
+    Build the index from the embedding store and publish it as the shared
+    snapshot, which workers on the same embedding model swap to on their next
+    poll.
+
+    Args:
+        db_path (str, optional): Path to the SQLite database. Defaults to DB_PATH.
+    """
+    with publisher_lock():
+        _rebuild_and_publish(db_path)
+
+
+def _usable_snapshot(pointer):
+    return (
+        pointer is not None
+        and pointer.get("storage") == VECTOR_STORAGE_DTYPE
+        and pointer.get("model") == EMBEDDING_MODEL_ID
+    )
+
+
+def _snapshot_includes(pointer, upserted_at):
+    # True if the snapshot was built from SQLite after the upsert was committed
+    return _usable_snapshot(pointer) and pointer.get("built_at", 0) > upserted_at
+
+
+def _load_shared_index():
+    """
+    Map the current snapshot, building and publishing one first if needed.
+
+    Returns:
+        tuple: (VectorIndex, snapshot version).
+    """
+    pointer = read_current()
+    if not _usable_snapshot(pointer):
+        with publisher_lock():
+            # Another worker may have published while we waited for the lock
+            pointer = read_current()
+            if not _usable_snapshot(pointer):
+                _rebuild_and_publish()
+                pointer = read_current()
+    index = VectorIndex.load_snapshot(snapshot_prefix(pointer))
+    return index, pointer["version"]
+
+
+def _wrap_backend(index, previous=None, changed_rows=None):
+    """
+    Put the configured search backend around an exact index.
+
+    When swapping snapshots with the changed rows known, the HNSW graph of the
+    previous index is patched with just those rows instead of being reloaded
+    and reconciled against every vector.
+    """
+    if VECTOR_RERANK:
+        index.rerank_loader = load_embeddings_by_email
+    if VECTOR_INDEX_BACKEND == "hnsw":
+        if ann_available():
+            if (
+                isinstance(previous, HnswIndex)
+                and changed_rows is not None
+                and previous.rebind(index, changed_rows)
+            ):
+                return previous
+            index = HnswIndex(index)
+            if not index.load() and len(index):
+                index.build()
+                index.save()
+        else:
+            print("hnswlib is not installed, using exact search")
+    return index
+
+
+def _refresh_shared_index():
+    # Swap to a newer snapshot published by any worker; callers hold _index_lock
+    global _index, _snapshot_version, _snapshot_checked_at
+    _snapshot_checked_at = time.monotonic()
+    pointer = read_current()
+    if not _usable_snapshot(pointer) or pointer["version"] == _snapshot_version:
+        return
+    prefix = snapshot_prefix(pointer)
+    try:
+        index = VectorIndex.load_snapshot(prefix)
+        changed_rows = None
+        if pointer.get("previous") == _snapshot_version:
+            changed_rows = np.load(f"{prefix}.changed.npy")
+    except FileNotFoundError:
+        # Superseded while we were reading the pointer; pick it up next poll
+        return
+    _index = _wrap_backend(index, previous=_index, changed_rows=changed_rows)
+    # Upserts made after the snapshot was built are re-applied, so they do not
+    # drop out of this worker's results until the next publish
+    built_at = pointer.get("built_at", 0)
+    for email, (profile, vector, upserted_at) in list(_pending_upserts.items()):
+        if upserted_at < built_at:
+            del _pending_upserts[email]
+        else:
+            _index.upsert(profile, vector)
+    _snapshot_version = pointer["version"]
+    _bump_index_version()
+
+
+def _publisher_loop():
+    while True:
+        time.sleep(VECTOR_INDEX_PUBLISH_SECONDS)
+        upserted_at = _last_upsert_at
+        if upserted_at is None or _snapshot_includes(read_current(), upserted_at):
+            continue
+        try:
+            # Only one worker rebuilds at a time; the others skip this round
+            # and usually find their upserts in the snapshot it publishes
+            with publisher_lock(blocking=False) as acquired:
+                # Rebuilt from SQLite, so uploads handled by every worker are included
+                if acquired and not _snapshot_includes(read_current(), upserted_at):
+                    _rebuild_and_publish()
+        except Exception as e:
+            print(f"Error publishing index snapshot: {e}")
+
+
+def get_index():
+    """
+    Return the process-wide index, loading it from the embedding store on first use.
+
+    VECTOR_INDEX_BACKEND selects the implementation: "exact" (default) for the
+    brute-force VectorIndex, or "hnsw" for an HnswIndex that is loaded from disk
+    (or built) and falls back to exact search for small pools.
+
+    With VECTOR_INDEX_SNAPSHOT_DIR set, workers map a shared on-disk snapshot
+    instead of each holding a private copy, check for a newer snapshot every
+    VECTOR_INDEX_POLL_SECONDS, and one at a time republishes after upserts.
+    """
+    global _index, _snapshot_version, _snapshot_checked_at
+    if (
+        _index is not None
+        and VECTOR_INDEX_SNAPSHOT_DIR
+        and time.monotonic() - _snapshot_checked_at > VECTOR_INDEX_POLL_SECONDS
+    ):
+        with _index_lock:
+            if time.monotonic() - _snapshot_checked_at > VECTOR_INDEX_POLL_SECONDS:
+                _refresh_shared_index()
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                if VECTOR_INDEX_SNAPSHOT_DIR:
+                    index, _snapshot_version = _load_shared_index()
+                    _snapshot_checked_at = time.monotonic()
+                    threading.Thread(
+                        target=_publisher_loop, name="index-publisher", daemon=True
+                    ).start()
+                else:
+                    index = _build_index()
+                _index = _wrap_backend(index)
+                _bump_index_version()
+    return _index
+
+
+def save_index():
+    """Persist the process-wide index if its backend supports it."""
+    with _index_lock:
+        index = _index
+    if index is not None and hasattr(index, "save"):
+        index.save()
+
+
+def update_index(profile, vector):
+    """
+    Patch the process-wide index after an upsert.
+
+    Nothing is done if the index has not been loaded yet; it will pick the
+    profile up from the embedding store when it is.
+    """
+    global _last_upsert_at
+    with _index_lock:
+        index = _index
+        if index is not None and vector is not None:
+            index.upsert(profile, vector)
+            _bump_index_version()
+            _last_upsert_at = time.time_ns()
+            if VECTOR_INDEX_SNAPSHOT_DIR:
+                _pending_upserts[profile[1]] = (profile, vector, _last_upsert_at)